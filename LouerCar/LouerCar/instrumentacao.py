@@ -0,0 +1,197 @@
+"""
+Instrumentação por requisição: número de consultas SQL, tempo de banco,
+consultas repetidas (mesmo SQL com parâmetros diferentes, típico de N+1)
+e tempo de renderização de templates.
+
+- InstrumentacaoMiddleware: mede a requisição, expõe o cabeçalho
+  Server-Timing e registra as requisições lentas no logger
+  'LouerCar.instrumentacao' (uma linha JSON com as piores consultas).
+  Em respostas em streaming o corpo é gerado depois que os cabeçalhos
+  saem: o Server-Timing só cobre a view, mas as consultas feitas durante
+  a iteração do corpo também são medidas e entram no log, avaliado quando
+  o corpo termina.
+- DjangoTemplatesMedidos: backend de templates que soma o tempo de render
+  na medição da requisição atual (configurado em TEMPLATES).
+
+Configuração (settings):
+- INSTRUMENTACAO_LIMITE_LENTO_MS: requisição acima disso é logada (500)
+- INSTRUMENTACAO_LIMITE_CONSULTAS: mais consultas que isso também (100)
+- INSTRUMENTACAO_SERVER_TIMING: envia o cabeçalho Server-Timing (True)
+"""
+import contextvars
+import json
+import logging
+import re
+import time
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+logger = logging.getLogger(__name__)
+
+_medicao_atual = contextvars.ContextVar('medicao_atual', default=None)
+
+_LITERAIS = [
+    (re.compile(r"'(?:[^']|'')*'"), '?'),                    # strings
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),                 # números
+    (re.compile(r'\bIN\s*\((?:\s*(?:\?|%s)\s*,?)+\)', re.I), 'IN (...)'),
+    (re.compile(r'\s+'), ' '),
+]
+
+
+def impressao_digital(sql):
+    """SQL sem os valores literais: consultas iguais a menos dos parâmetros coincidem"""
+    for padrao, troca in _LITERAIS:
+        sql = padrao.sub(troca, sql)
+    return sql.strip()
+
+
+class Medicao:
+    """Números de uma requisição"""
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.consultas = []  # (sql, segundos)
+        self.tempo_sql = 0.0
+        self.tempo_template = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        """Wrapper de connection.execute_wrapper"""
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duracao = time.perf_counter() - inicio
+            self.tempo_sql += duracao
+            self.consultas.append((sql, duracao))
+
+    @property
+    def tempo_total(self):
+        return time.perf_counter() - self.inicio
+
+    def agrupar(self):
+        """{impressão digital: [repetições, segundos]}"""
+        grupos = defaultdict(lambda: [0, 0.0])
+        for sql, duracao in self.consultas:
+            grupo = grupos[impressao_digital(sql)]
+            grupo[0] += 1
+            grupo[1] += duracao
+        return grupos
+
+
+class InstrumentacaoMiddleware:
+    """Mede consultas, tempo de banco e de templates de cada requisição"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.limite_lento = getattr(settings, 'INSTRUMENTACAO_LIMITE_LENTO_MS', 500)
+        self.limite_consultas = getattr(settings, 'INSTRUMENTACAO_LIMITE_CONSULTAS', 100)
+        self.server_timing = getattr(settings, 'INSTRUMENTACAO_SERVER_TIMING', True)
+
+    @contextmanager
+    def medindo(self, medicao):
+        """Liga a medição (consultas de todas as conexões e templates) dentro do bloco"""
+        token = _medicao_atual.set(medicao)
+        try:
+            with ExitStack() as pilha:
+                for conexao in connections.all():
+                    pilha.enter_context(conexao.execute_wrapper(medicao))
+                yield
+        finally:
+            _medicao_atual.reset(token)
+
+    def __call__(self, request):
+        medicao = Medicao()
+        with self.medindo(medicao):
+            response = self.get_response(request)
+
+        if self.server_timing:
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={medicao.tempo_sql * 1000:.1f};desc="{len(medicao.consultas)} consultas"',
+                f'tpl;dur={medicao.tempo_template * 1000:.1f}',
+                f'total;dur={medicao.tempo_total * 1000:.1f}',
+            ])
+        if response.streaming and not response.is_async:
+            response.streaming_content = self.corpo_medido(
+                request, response, medicao, response.streaming_content
+            )
+        else:
+            self.verificar(request, response, medicao)
+        return response
+
+    def corpo_medido(self, request, response, medicao, conteudo):
+        """Itera o corpo em streaming medindo cada pedaço; verifica os limites no fim"""
+        iterador = iter(conteudo)
+        try:
+            while True:
+                with self.medindo(medicao):
+                    try:
+                        pedaco = next(iterador)
+                    except StopIteration:
+                        return
+                yield pedaco
+        finally:
+            self.verificar(request, response, medicao)
+
+    def verificar(self, request, response, medicao):
+        total_ms = medicao.tempo_total * 1000
+        if total_ms >= self.limite_lento or len(medicao.consultas) > self.limite_consultas:
+            self.registrar_lenta(request, response, medicao, total_ms)
+
+    def registrar_lenta(self, request, response, medicao, total_ms):
+        grupos = medicao.agrupar()
+        piores = sorted(grupos.items(), key=lambda item: item[1][1], reverse=True)[:5]
+        repetidas = sorted(
+            ((sql, dados) for sql, dados in grupos.items() if dados[0] > 1),
+            key=lambda item: item[1][0], reverse=True,
+        )[:5]
+        logger.warning(json.dumps({
+            'evento': 'requisicao_lenta',
+            'metodo': request.method,
+            'caminho': request.path,
+            'status': response.status_code,
+            'total_ms': round(total_ms, 1),
+            'sql_ms': round(medicao.tempo_sql * 1000, 1),
+            'template_ms': round(medicao.tempo_template * 1000, 1),
+            'consultas': len(medicao.consultas),
+            'consultas_repetidas': sum(dados[0] - 1 for dados in grupos.values()),
+            'piores_sql': [
+                {'sql': sql, 'vezes': vezes, 'ms': round(segundos * 1000, 1)}
+                for sql, (vezes, segundos) in piores
+            ],
+            'repetidas': [
+                {'sql': sql, 'vezes': vezes, 'ms': round(segundos * 1000, 1)}
+                for sql, (vezes, segundos) in repetidas
+            ],
+        }, ensure_ascii=False))
+
+
+class TemplateMedido(Template):
+    """Template que soma o tempo de render na medição da requisição"""
+
+    def render(self, context=None, request=None):
+        medicao = _medicao_atual.get()
+        if medicao is None:
+            return super().render(context, request)
+        inicio = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            medicao.tempo_template += time.perf_counter() - inicio
+
+
+class DjangoTemplatesMedidos(DjangoTemplates):
+    """Backend DjangoTemplates que devolve TemplateMedido"""
+
+    def from_string(self, template_code):
+        return TemplateMedido(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TemplateMedido(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
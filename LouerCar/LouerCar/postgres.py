@@ -0,0 +1,54 @@
+"""
+Configuração do PostgreSQL a partir de variáveis de ambiente (DB_ENGINE=postgresql).
+
+Duas formas de reaproveitar conexões, uma ou outra (o Django não aceita as
+duas juntas):
+- Conexões persistentes (padrão): cada processo mantém a sua conexão
+  aberta por DB_CONN_MAX_AGE segundos entre requisições.
+- Pool do psycopg 3 (DB_POOL=1, exige psycopg[pool]): cada processo tem
+  um pool de DB_POOL_MIN a DB_POOL_MAX conexões, emprestadas por
+  requisição; quem não consegue uma em DB_POOL_TIMEOUT segundos recebe
+  erro.
+
+Nos dois casos CONN_HEALTH_CHECKS fica ligado: uma conexão derrubada pelo
+servidor é descartada antes de ser usada (no pool, o Django passa
+check_connection ao psycopg) em vez de falhar no meio da requisição.
+
+Não há alias 'leitura' no PostgreSQL: uma réplica assíncrona atrasada
+repovoaria o cache (versões incrementadas após o commit no primário) com
+dados antigos sob a chave nova, e quebraria o redirect após gravar.
+"""
+
+
+def _pool(ambiente):
+    return {
+        'min_size': int(ambiente.get('DB_POOL_MIN', 2)),
+        'max_size': int(ambiente.get('DB_POOL_MAX', 10)),
+        'timeout': float(ambiente.get('DB_POOL_TIMEOUT', 10)),
+    }
+
+
+def banco(ambiente):
+    """Entrada de DATABASES para o PostgreSQL descrito em `ambiente` (ex.: os.environ)"""
+    usar_pool = ambiente.get('DB_POOL', '0') == '1'
+    configuracao = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': ambiente.get('DB_NAME', 'louercar'),
+        'USER': ambiente.get('DB_USER', 'louercar'),
+        'PASSWORD': ambiente.get('DB_PASSWORD', ''),
+        'HOST': ambiente.get('DB_HOST', 'localhost'),
+        'PORT': ambiente.get('DB_PORT', '5432'),
+        'CONN_MAX_AGE': 0 if usar_pool else int(ambiente.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'connect_timeout': int(ambiente.get('DB_CONNECT_TIMEOUT', 5)),
+        },
+    }
+    if usar_pool:
+        configuracao['OPTIONS']['pool'] = _pool(ambiente)
+    return configuracao
+
+
+def bancos(ambiente):
+    """DATABASES completo"""
+    return {'default': banco(ambiente)}
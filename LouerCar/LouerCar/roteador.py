@@ -0,0 +1,39 @@
+"""
+Roteador de leitura/escrita (settings.DATABASE_ROUTERS).
+
+Leituras vão para o alias 'leitura', uma conexão somente leitura ao
+mesmo arquivo: com WAL, relatórios e listagens longas leem um snapshot
+sem segurar o lock que as escritas (aprovações, logins) disputam.
+
+Dentro de uma transação na conexão principal as leituras ficam nela,
+para enxergar o que a própria transação gravou e manter os travamentos
+(select_for_update já é roteado como escrita).
+
+O alias aponta para o mesmo arquivo, então uma leitura logo após um commit
+já o enxerga (não há atraso de réplica). No PostgreSQL o alias não existe
+(ver LouerCar/postgres.py) e tudo vai para o default.
+"""
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+ALIAS_LEITURA = 'leitura'
+
+
+class RoteadorLeituraEscrita:
+
+    def db_for_read(self, model, **hints):
+        if ALIAS_LEITURA not in settings.DATABASES:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return ALIAS_LEITURA
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Os dois aliases são o mesmo banco
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
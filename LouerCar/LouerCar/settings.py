@@ -1,6 +1,9 @@
 from pathlib import Path
 import os
 
+from LouerCar import postgres
+from LouerCar.sqlite import init_command, uri_somente_leitura
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -26,6 +29,9 @@ INSTALLED_APPS = [
     'user',
     'carro',
     'aluguel',
+    'busca',
+    'sincronizacao',
+    'relatorios',
     'rest_framework',
 ]
 
@@ -37,9 +43,13 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # Paginação keyset (cursor) sobre (criado_em, pk) - ver api/pagination.py
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.KeysetPagination',
+    'PAGE_SIZE': int(os.environ.get('API_PAGE_SIZE', 50)),
 }
 
 MIDDLEWARE = [
+    'LouerCar.instrumentacao.InstrumentacaoMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -54,7 +64,8 @@ ROOT_URLCONF = 'LouerCar.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates que mede o tempo de render (ver LouerCar/instrumentacao.py)
+        'BACKEND': 'LouerCar.instrumentacao.DjangoTemplatesMedidos',
         'DIRS': [BASE_DIR / 'template'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -70,14 +81,110 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'LouerCar.wsgi.application'
 
-# Database
-DATABASES = {
+# Instrumentação de requisições (Server-Timing e log de requisições lentas)
+INSTRUMENTACAO_LIMITE_LENTO_MS = int(os.environ.get('INSTRUMENTACAO_LIMITE_LENTO_MS', 500))
+INSTRUMENTACAO_LIMITE_CONSULTAS = int(os.environ.get('INSTRUMENTACAO_LIMITE_CONSULTAS', 100))
+INSTRUMENTACAO_SERVER_TIMING = True
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'LouerCar.instrumentacao': {'handlers': ['console'], 'level': 'WARNING', 'propagate': False},
+    },
+}
+
+# Database: SQLite por padrão. Para PostgreSQL (exige psycopg, ver LouerCar/postgres.py):
+#   DB_ENGINE=postgresql DB_NAME=louercar DB_USER=louercar DB_PASSWORD=... DB_HOST=localhost DB_PORT=5432
+#   DB_CONN_MAX_AGE=60                  conexões persistentes com health check (padrão)
+#   DB_POOL=1 DB_POOL_MIN=2 DB_POOL_MAX=10 DB_POOL_TIMEOUT=10   pool do psycopg no lugar delas
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+
+# Ajustes por conexão do SQLite (ver LouerCar/sqlite.py)
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 20000,      # ms, igual ao OPTIONS['timeout']
+    'cache_size': -20000,       # KiB
+    'mmap_size': 268435456,     # 256 MB
+    'temp_store': 'MEMORY',
+}
+# A conexão de leitura não muda o journal_mode (é gravado no arquivo)
+SQLITE_PRAGMAS_LEITURA = {
+    nome: valor for nome, valor in SQLITE_PRAGMAS.items() if nome != 'journal_mode'
+}
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = postgres.bancos(os.environ)
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            'OPTIONS': {
+                # BEGIN IMMEDIATE: transações de escrita pegam o lock do banco no
+                # início e as concorrentes esperam (até `timeout` segundos) em vez
+                # de falhar com "database is locked" no meio da transação
+                'transaction_mode': 'IMMEDIATE',
+                'timeout': 20,
+                'init_command': init_command(SQLITE_PRAGMAS),
+            },
+            # Banco de testes em arquivo (não em memória) para os testes de
+            # concorrência poderem abrir várias conexões
+            'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
+        },
+        # Mesmo arquivo, somente leitura: recebe as leituras fora de transação
+        # (LouerCar/roteador.py)
+        'leitura': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': uri_somente_leitura(BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                'uri': True,
+                'timeout': 20,
+                'init_command': init_command(SQLITE_PRAGMAS_LEITURA),
+            },
+            'TEST': {'MIRROR': 'default'},
+        },
+    }
+
+DATABASE_ROUTERS = ['LouerCar.roteador.RoteadorLeituraEscrita']
+
+# Cache: locmem por padrão (testes e desenvolvimento, um cache por processo).
+# Em produção com vários processos use um backend compartilhado, ex.:
+#   CACHE_BACKEND=file CACHE_LOCATION=/var/tmp/louercar_cache
+#   CACHE_BACKEND=db CACHE_LOCATION=cache_louercar   (rode `manage.py createcachetable`)
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'db': 'django.core.cache.backends.db.DatabaseCache',
+}
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem')
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+        'LOCATION': os.environ.get('CACHE_LOCATION', {
+            'locmem': 'louercar',
+            'file': str(BASE_DIR / 'cache'),
+            'db': 'cache_louercar',
+        }[CACHE_BACKEND]),
+        'TIMEOUT': int(os.environ.get('CACHE_TIMEOUT', 300)),
+        'OPTIONS': {
+            # O padrão do Django (300) é pouco para fragmentos por carro
+            'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 20000)),
+        },
     }
 }
 
+# Índice de disponibilidade em memória (aluguel/disponibilidade.py): cada
+# processo guarda o seu e o invalida pela versão no cache, então só é seguro
+# com cache compartilhado. Com locmem a checagem vai ao banco.
+DISPONIBILIDADE_INDICE_MEMORIA = os.environ.get(
+    'DISPONIBILIDADE_INDICE_MEMORIA', '0' if CACHE_BACKEND == 'locmem' else '1'
+) == '1'
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -0,0 +1,27 @@
+"""
+Ajustes do SQLite por conexão.
+
+O Django executa o init_command de DATABASES[...]['OPTIONS'] em cada
+conexão nova; aqui ele é montado a partir de um dicionário de PRAGMAs
+(settings.SQLITE_PRAGMAS e SQLITE_PRAGMAS_LEITURA), que o comando
+benchmark_concorrencia também usa.
+
+- journal_mode=WAL: leitores não bloqueiam o escritor nem são bloqueados
+  por ele; só escritas concorrentes esperam umas pelas outras. O modo fica
+  gravado no arquivo, mas é reaplicado (sem custo) a cada conexão.
+- synchronous=NORMAL: com WAL, fsync só nos checkpoints. Não corrompe o
+  banco; uma queda de energia pode perder as últimas transações.
+- busy_timeout: quanto uma escrita espera pelo lock antes de "database is
+  locked" (igual ao OPTIONS['timeout'], em milissegundos).
+- cache_size negativo é em KiB; mmap_size em bytes.
+"""
+
+
+def init_command(pragmas):
+    """'PRAGMA a=b;PRAGMA c=d' para OPTIONS['init_command']"""
+    return ';'.join(f'PRAGMA {nome}={valor}' for nome, valor in pragmas.items())
+
+
+def uri_somente_leitura(caminho):
+    """NAME de uma conexão que só lê o arquivo (exige OPTIONS['uri'] = True)"""
+    return f'file:{caminho}?mode=ro'
@@ -6,6 +6,7 @@ urlpatterns = [
     path('', include('user.urls')),  
     path('', include('carro.urls')),
     path('', include('aluguel.urls')),
+    path('', include('relatorios.urls')),
     
     # API REST
     path('api/', include('api.urls')),
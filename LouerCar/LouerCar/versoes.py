@@ -0,0 +1,107 @@
+"""
+Versões por tabela para requisições condicionais (ETag / 304).
+
+Cada grupo de tabelas ('carro', 'aluguel', 'solicitacao', 'usuario') tem um
+contador no cache, incrementado após o commit de cada escrita (signals e,
+em quem grava com update()/bulk_create, chamadas explícitas). A ETag de uma
+resposta é derivada das versões das tabelas que ela lê: conferir se o
+cliente já tem a versão atual custa um get_many no cache, sem consultar o
+banco nem renderizar/serializar nada.
+
+Quando a chave some do cache (reinício, remoção por falta de espaço) a
+versão recomeça de um valor tirado do relógio, e não de 1, para uma ETag
+antiga não voltar a valer por engano.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+
+TABELAS = ('carro', 'aluguel', 'solicitacao', 'usuario')
+
+
+def _chave(tabela):
+    return f'versao:{tabela}'
+
+
+def _inicial():
+    return time.time_ns() // 1000
+
+
+def versoes(*tabelas):
+    """Versões atuais das tabelas, na ordem pedida"""
+    chaves = [_chave(tabela) for tabela in tabelas]
+    valores = cache.get_many(chaves)
+    resultado = []
+    for chave in chaves:
+        valor = valores.get(chave)
+        if valor is None:
+            # Outro processo pode ter criado a chave ao mesmo tempo: vale a dele
+            cache.add(chave, _inicial(), None)
+            valor = cache.get(chave)
+        resultado.append(valor)
+    return resultado
+
+
+def incrementar(*tabelas):
+    """Marca as tabelas como alteradas"""
+    for tabela in tabelas:
+        try:
+            cache.incr(_chave(tabela))
+        except ValueError:
+            cache.set(_chave(tabela), _inicial(), None)
+
+
+def incrementar_apos_commit(*tabelas):
+    """
+    Incrementa só depois do commit: antes dele, uma leitura concorrente
+    guardaria os dados antigos sob a versão nova.
+    """
+    transaction.on_commit(lambda: incrementar(*tabelas))
+
+
+def etag(tabelas, *partes):
+    """ETag (já entre aspas) das versões das tabelas + partes que variam a resposta"""
+    texto = '|'.join(str(valor) for valor in [*versoes(*tabelas), *partes])
+    return quote_etag(hashlib.md5(texto.encode()).hexdigest())
+
+
+def marcar_resposta(resposta, valor_etag):
+    """Envia a ETag e pede ao cliente para revalidar sempre"""
+    resposta['ETag'] = valor_etag
+    patch_cache_control(resposta, private=True, no_cache=True)
+    return resposta
+
+
+def resposta_condicional(*tabelas):
+    """
+    Decorator de views HTML: responde 304 quando o If-None-Match do cliente
+    bate com a versão atual das tabelas. A ETag varia com a URL e o usuário
+    da sessão. Com mensagens pendentes a página é sempre renderizada (o 304
+    esconderia a mensagem).
+    """
+    def decorator(view):
+        @wraps(view)
+        def _view(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or len(get_messages(request)):
+                return view(request, *args, **kwargs)
+
+            valor_etag = etag(
+                tabelas, request.get_full_path(),
+                request.session.get('user_id'), request.session.get('is_staff'),
+            )
+            nao_modificada = get_conditional_response(request, etag=valor_etag)
+            if nao_modificada is not None:
+                return marcar_resposta(nao_modificada, valor_etag)
+
+            resposta = view(request, *args, **kwargs)
+            if resposta.status_code == 200:
+                marcar_resposta(resposta, valor_etag)
+            return resposta
+        return _view
+    return decorator
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Aluguel
+from .models import Aluguel, EmailPendente
+from busca.indice import buscar_alugueis
 
 @admin.register(Aluguel)
 class AluguelAdmin(admin.ModelAdmin):
@@ -46,4 +47,18 @@ class AluguelAdmin(admin.ModelAdmin):
         """Torna alguns campos readonly após criação"""
         if obj:  # Editando
             return self.readonly_fields + ('carro', 'perfil_cliente')
-        return self.readonly_fields
\ No newline at end of file
+        return self.readonly_fields
+
+    def get_search_results(self, request, queryset, search_term):
+        """Busca pelo índice textual quando disponível"""
+        encontrados = buscar_alugueis(queryset, search_term) if search_term else None
+        if encontrados is None:
+            return super().get_search_results(request, queryset, search_term)
+        return encontrados, False
+
+@admin.register(EmailPendente)
+class EmailPendenteAdmin(admin.ModelAdmin):
+    list_display = ('id_email', 'destinatario', 'assunto', 'status', 'tentativas', 'proxima_tentativa', 'enviado_em')
+    list_filter = ('status',)
+    search_fields = ('destinatario', 'assunto')
+    readonly_fields = ('criado_em', 'enviado_em', 'ultimo_erro')
@@ -0,0 +1,87 @@
+"""
+Aprovação de solicitações como uma única transação.
+
+A solicitação e o carro são travados (select_for_update) antes de conferir
+o período contra os aluguéis ativos no banco, então duas aprovações
+concorrentes para o mesmo carro nunca criam aluguéis sobrepostos: a segunda
+espera a primeira terminar e encontra o conflito.
+
+No PostgreSQL quem serializa são os locks de linha do select_for_update;
+no SQLite ele não tem efeito e quem serializa é o BEGIN IMMEDIATE
+configurado em DATABASES (transaction_mode).
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from carro.models import Carro
+
+from .models import Aluguel, Pagamento, SolicitacaoAluguel
+
+PRAZO_PAGAMENTO = timedelta(days=3)
+CHAVE_PIX = 'louercar@pix.com'  # Configure sua chave PIX
+QR_CODE_PIX = '00020126580014BR.GOV.BCB.PIX...'  # QR Code gerado
+
+
+class ConflitoAprovacao(Exception):
+    """A solicitação não pode mais ser aprovada"""
+
+
+def periodo_ocupado(carro_id, data_inicio, data_fim):
+    """Confere no banco (não no índice em memória) se há aluguel ativo no período"""
+    return Aluguel.objects.filter(
+        carro_id=carro_id,
+        status='ativo',
+        data_inicio__lt=data_fim,
+        data_fim__gt=data_inicio,
+    ).exists()
+
+
+def aprovar_solicitacao(solicitacao_id, funcionario):
+    """
+    Aprova a solicitação: cria aluguel e pagamento, marca a solicitação como
+    aprovada e agenda o email, tudo ou nada. Retorna o aluguel criado.
+    Levanta ConflitoAprovacao se a solicitação já foi tratada ou o carro
+    não está livre no período.
+    """
+    with transaction.atomic():
+        # Ordem fixa dos travamentos (solicitação, depois carro) evita deadlock
+        solicitacao = (
+            SolicitacaoAluguel.objects.select_for_update()
+            .select_related('perfil_cliente__usuario')
+            .get(pk=solicitacao_id)
+        )
+        if solicitacao.status != 'pendente':
+            raise ConflitoAprovacao('Esta solicitação não está mais pendente!')
+
+        carro = Carro.objects.select_for_update().get(pk=solicitacao.carro_id)
+        if carro.status == 'manutencao':
+            raise ConflitoAprovacao('O carro está em manutenção!')
+        if periodo_ocupado(carro.pk, solicitacao.data_inicio, solicitacao.data_fim):
+            raise ConflitoAprovacao('O carro já está alugado nesse período!')
+
+        aluguel = Aluguel.objects.create(
+            perfil_cliente=solicitacao.perfil_cliente,
+            carro=carro,
+            funcionario=funcionario,
+            data_inicio=solicitacao.data_inicio,
+            data_fim=solicitacao.data_fim,
+            valor=solicitacao.valor_estimado,
+            status='ativo',
+        )
+
+        solicitacao.status = 'aprovado'
+        solicitacao.aluguel_criado = aluguel
+        solicitacao.save(update_fields=['status', 'aluguel_criado', 'atualizado_em'])
+
+        pagamento = Pagamento.objects.create(
+            aluguel=aluguel,
+            valor=solicitacao.valor_estimado,
+            data_vencimento=timezone.now() + PRAZO_PAGAMENTO,
+            chave_pix=CHAVE_PIX,
+            qr_code_pix=QR_CODE_PIX,
+        )
+        pagamento.enfileirar_email_pagamento_pendente()
+
+    return aluguel
@@ -0,0 +1,221 @@
+"""
+Motor de disponibilidade dos carros por período.
+
+Mantém em memória os períodos dos aluguéis ativos em duas estruturas:
+- uma árvore de intervalos (todos os carros) para "quais carros estão
+  ocupados/livres em [inicio, fim)?";
+- um índice por carro (inícios ordenados + máximo acumulado dos términos)
+  para "o carro X está livre em [inicio, fim)?" em O(log n).
+
+O índice é reconstruído sob demanda quando a versão guardada no cache muda,
+o que acontece a cada gravação de Aluguel (ver aluguel/signals.py). Essa
+versão só avisa os outros processos se o cache for compartilhado: com o
+locmem (um cache por processo) DISPONIBILIDADE_INDICE_MEMORIA fica
+desligado e carro_livre() confere no banco, pelo índice
+aluguel_ativo_periodo_idx.
+
+carros_livres() filtra sempre no banco (NOT EXISTS de aluguel ativo no
+período), sem mandar a lista de carros ocupados como parâmetro.
+
+Só aluguéis ativos ocupam o carro. Solicitações pendentes ficam de fora de
+propósito: vários clientes podem pedir o mesmo carro no mesmo período, e é
+a aprovação (aluguel/aprovacao.py, conferindo no banco com o carro
+travado) que reserva o período.
+"""
+import threading
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef
+
+from .models import Aluguel
+
+CACHE_KEY_VERSAO = 'disponibilidade:versao'
+
+
+def _segundos(data):
+    """Converte datetime em timestamp (os intervalos são comparados como números)"""
+    return data.timestamp()
+
+
+class ArvoreIntervalos:
+    """Árvore de intervalos centrada e estática sobre intervalos [inicio, fim)"""
+
+    __slots__ = ('centro', 'por_inicio', 'por_fim', 'esquerda', 'direita')
+
+    def __init__(self, intervalos):
+        # O centro é o início do intervalo mediano: esse intervalo sempre fica
+        # neste nó, e cada lado recebe no máximo metade dos intervalos.
+        inicios = sorted(inicio for inicio, _, _ in intervalos)
+        self.centro = inicios[len(inicios) // 2]
+
+        aqui, esquerda, direita = [], [], []
+        for intervalo in intervalos:
+            inicio, fim, _ = intervalo
+            if fim <= self.centro:
+                esquerda.append(intervalo)
+            elif inicio > self.centro:
+                direita.append(intervalo)
+            else:
+                aqui.append(intervalo)
+
+        self.por_inicio = sorted(aqui, key=lambda i: i[0])
+        self.por_fim = sorted(aqui, key=lambda i: i[1], reverse=True)
+        self.esquerda = ArvoreIntervalos(esquerda) if esquerda else None
+        self.direita = ArvoreIntervalos(direita) if direita else None
+
+    def sobrepostos(self, inicio, fim):
+        """Gera as chaves dos intervalos que se sobrepõem a [inicio, fim)"""
+        no = self
+        pilha = []
+        while no is not None:
+            if fim <= no.centro:
+                for a, _, chave in no.por_inicio:
+                    if a >= fim:
+                        break
+                    yield chave
+                no = no.esquerda
+            elif inicio > no.centro:
+                for _, b, chave in no.por_fim:
+                    if b <= inicio:
+                        break
+                    yield chave
+                no = no.direita
+            else:
+                for _, _, chave in no.por_inicio:
+                    yield chave
+                if no.direita is not None:
+                    pilha.append(no.direita)
+                no = no.esquerda
+            if no is None and pilha:
+                no = pilha.pop()
+
+
+class IndiceDisponibilidade:
+    """Índice em memória dos períodos ocupados de cada carro"""
+
+    def __init__(self, periodos):
+        # periodos: iterável de (carro_id, id_aluguel, data_inicio, data_fim)
+        por_carro = {}
+        intervalos = []
+        for carro_id, id_aluguel, data_inicio, data_fim in periodos:
+            inicio, fim = _segundos(data_inicio), _segundos(data_fim)
+            if fim <= inicio:
+                continue
+            por_carro.setdefault(carro_id, []).append((inicio, fim, id_aluguel))
+            intervalos.append((inicio, fim, carro_id))
+
+        self.arvore = ArvoreIntervalos(intervalos) if intervalos else None
+        self.carros = {}
+        for carro_id, lista in por_carro.items():
+            lista.sort()
+            maximo, maximos = float('-inf'), []
+            for _, fim, _ in lista:
+                maximo = max(maximo, fim)
+                maximos.append(maximo)
+            self.carros[carro_id] = ([i[0] for i in lista], maximos, lista)
+
+    def carro_livre(self, carro_id, data_inicio, data_fim):
+        """O carro está livre em [data_inicio, data_fim)?"""
+        dados = self.carros.get(carro_id)
+        if dados is None:
+            return True
+        inicios, maximos, _ = dados
+        # Só os períodos que começam antes de data_fim podem colidir
+        limite = bisect_left(inicios, _segundos(data_fim))
+        return limite == 0 or maximos[limite - 1] <= _segundos(data_inicio)
+
+    def conflitos(self, carro_id, data_inicio, data_fim):
+        """Retorna os ids dos aluguéis do carro que colidem com o período"""
+        dados = self.carros.get(carro_id)
+        if dados is None:
+            return []
+        inicios, _, lista = dados
+        inicio, fim = _segundos(data_inicio), _segundos(data_fim)
+        limite = bisect_left(inicios, fim)
+        return [id_aluguel for _, b, id_aluguel in lista[:limite] if b > inicio]
+
+    def carros_ocupados(self, data_inicio, data_fim):
+        """Retorna o conjunto de ids dos carros ocupados no período"""
+        if self.arvore is None:
+            return set()
+        return set(self.arvore.sobrepostos(_segundos(data_inicio), _segundos(data_fim)))
+
+
+_lock = threading.Lock()
+_indice = None
+_versao_indice = None
+
+
+def _versao_atual():
+    versao = cache.get(CACHE_KEY_VERSAO)
+    if versao is None:
+        versao = 1
+        cache.add(CACHE_KEY_VERSAO, versao, None)
+    return versao
+
+
+def carregar_indice():
+    """Lê do banco os períodos dos aluguéis ativos e monta um novo índice"""
+    periodos = Aluguel.objects.filter(status='ativo').values_list(
+        'carro_id', 'id_aluguel', 'data_inicio', 'data_fim'
+    )
+    return IndiceDisponibilidade(periodos.iterator(chunk_size=5000))
+
+
+def obter_indice():
+    """Retorna o índice do processo, reconstruindo-o se estiver desatualizado"""
+    global _indice, _versao_indice
+    versao = _versao_atual()
+    if _indice is None or _versao_indice != versao:
+        with _lock:
+            if _indice is None or _versao_indice != versao:
+                _indice = carregar_indice()
+                _versao_indice = versao
+    return _indice
+
+
+def invalidar_indice():
+    """Marca o índice de todos os processos como desatualizado"""
+    try:
+        cache.incr(CACHE_KEY_VERSAO)
+    except ValueError:
+        cache.set(CACHE_KEY_VERSAO, 2, None)
+
+
+def indice_em_memoria():
+    """O índice em memória só é usado quando o cache (e a versão) é compartilhado"""
+    return getattr(settings, 'DISPONIBILIDADE_INDICE_MEMORIA', False)
+
+
+def periodos_ativos(data_inicio, data_fim):
+    """Aluguéis ativos que se sobrepõem a [data_inicio, data_fim)"""
+    return Aluguel.objects.filter(status='ativo', data_inicio__lt=data_fim, data_fim__gt=data_inicio)
+
+
+def carro_livre(carro, data_inicio, data_fim, ignorar_aluguel=None):
+    """Verifica se o carro está livre em [data_inicio, data_fim)"""
+    carro_id = getattr(carro, 'pk', carro)
+    if not indice_em_memoria():
+        conflitos = periodos_ativos(data_inicio, data_fim).filter(carro_id=carro_id)
+        if ignorar_aluguel is not None:
+            conflitos = conflitos.exclude(pk=ignorar_aluguel)
+        return not conflitos.exists()
+
+    indice = obter_indice()
+    if ignorar_aluguel is None:
+        return indice.carro_livre(carro_id, data_inicio, data_fim)
+    conflitos = indice.conflitos(carro_id, data_inicio, data_fim)
+    return not [id_aluguel for id_aluguel in conflitos if id_aluguel != ignorar_aluguel]
+
+
+def carros_ocupados(data_inicio, data_fim):
+    """Ids dos carros com aluguel ativo no período"""
+    return obter_indice().carros_ocupados(data_inicio, data_fim)
+
+
+def carros_livres(queryset, data_inicio, data_fim):
+    """Filtra o queryset de carros deixando só os livres no período"""
+    ocupado = periodos_ativos(data_inicio, data_fim).filter(carro=OuterRef('pk'))
+    return queryset.exclude(status='manutencao').filter(~Exists(ocupado))
@@ -0,0 +1,60 @@
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+
+from .models import Aluguel, SolicitacaoAluguel
+
+CACHE_KEY_ALUGUEIS = 'estatisticas:alugueis'
+CACHE_KEY_SOLICITACOES = 'estatisticas:solicitacoes'
+CACHE_TIMEOUT = 300  # segundos
+
+
+def calcular_estatisticas_alugueis():
+    """Conta os aluguéis por status e soma os valores em uma única consulta"""
+    estatisticas = Aluguel.objects.aggregate(
+        total=Count('pk'),
+        ativos=Count('pk', filter=Q(status='ativo')),
+        finalizados=Count('pk', filter=Q(status='finalizado')),
+        cancelados=Count('pk', filter=Q(status='cancelado')),
+        valor_total_ativos=Sum('valor', filter=Q(status='ativo')),
+        valor_recebido=Sum('pagamento__valor', filter=Q(pagamento__status='aprovado')),
+    )
+    estatisticas['valor_total_ativos'] = estatisticas['valor_total_ativos'] or 0
+    estatisticas['valor_recebido'] = estatisticas['valor_recebido'] or 0
+    return estatisticas
+
+
+def calcular_estatisticas_solicitacoes():
+    """Conta as solicitações por status em uma única consulta"""
+    return SolicitacaoAluguel.objects.aggregate(
+        pendentes=Count('pk', filter=Q(status='pendente')),
+        aprovadas=Count('pk', filter=Q(status='aprovado')),
+        rejeitadas=Count('pk', filter=Q(status='rejeitado')),
+    )
+
+
+def _do_cache(chave, calcular):
+    estatisticas = cache.get(chave)
+    if estatisticas is None:
+        estatisticas = calcular()
+        cache.set(chave, estatisticas, CACHE_TIMEOUT)
+    return estatisticas
+
+
+def estatisticas_alugueis():
+    """Retorna as estatísticas de aluguéis usando o cache"""
+    return _do_cache(CACHE_KEY_ALUGUEIS, calcular_estatisticas_alugueis)
+
+
+def estatisticas_solicitacoes():
+    """Retorna as estatísticas de solicitações usando o cache"""
+    return _do_cache(CACHE_KEY_SOLICITACOES, calcular_estatisticas_solicitacoes)
+
+
+def invalidar_estatisticas_alugueis():
+    """Remove as estatísticas de aluguéis (e pagamentos) do cache"""
+    cache.delete(CACHE_KEY_ALUGUEIS)
+
+
+def invalidar_estatisticas_solicitacoes():
+    """Remove as estatísticas de solicitações do cache"""
+    cache.delete(CACHE_KEY_SOLICITACOES)
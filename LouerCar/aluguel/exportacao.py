@@ -0,0 +1,96 @@
+"""
+Exportação do histórico de aluguéis (com carro, cliente e pagamento) em
+CSV ou NDJSON, gerada linha a linha.
+
+As linhas vêm de um único SELECT com joins lido em blocos
+(values_list + iterator), sem instanciar models nem carregar o histórico
+inteiro: a memória usada é a mesma para mil ou para milhões de aluguéis.
+"""
+import csv
+from datetime import datetime, time, timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from .models import Aluguel
+
+TAMANHO_BLOCO = 2000
+
+# (nome da coluna, campo)
+COLUNAS = [
+    ('id_aluguel', 'id_aluguel'),
+    ('status', 'status'),
+    ('data_inicio', 'data_inicio'),
+    ('data_fim', 'data_fim'),
+    ('valor', 'valor'),
+    ('criado_em', 'criado_em'),
+    ('id_carro', 'carro_id'),
+    ('carro_modelo', 'carro__modelo'),
+    ('carro_placa', 'carro__placa'),
+    ('id_perfil_cliente', 'perfil_cliente_id'),
+    ('cliente', 'perfil_cliente__usuario__username'),
+    ('cliente_cnh', 'perfil_cliente__CNH'),
+    ('funcionario', 'funcionario__username'),
+    ('id_pagamento', 'pagamento__id_pagamento'),
+    ('pagamento_status', 'pagamento__status'),
+    ('pagamento_metodo', 'pagamento__metodo_pagamento'),
+    ('pagamento_valor', 'pagamento__valor'),
+    ('pagamento_vencimento', 'pagamento__data_vencimento'),
+    ('pagamento_data', 'pagamento__data_pagamento'),
+]
+NOMES = [nome for nome, _ in COLUNAS]
+FORMATOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def _inicio_do_dia(dia):
+    """Meia-noite (aware) do dia local"""
+    return timezone.make_aware(datetime.combine(dia, time.min))
+
+
+def filtrar_alugueis(inicio=None, fim=None, status=None):
+    """Aluguéis com data de início entre as datas (inclusive) e com os status pedidos"""
+    alugueis = Aluguel.objects.all()
+    # Limites aware em vez de __date: a comparação usa o índice de data_inicio
+    if inicio:
+        alugueis = alugueis.filter(data_inicio__gte=_inicio_do_dia(inicio))
+    if fim:
+        alugueis = alugueis.filter(data_inicio__lt=_inicio_do_dia(fim + timedelta(days=1)))
+    if status:
+        alugueis = alugueis.filter(status__in=status)
+    return alugueis.order_by('pk')
+
+
+def linhas(alugueis):
+    """Tuplas das colunas, lidas do banco em blocos"""
+    return alugueis.values_list(*[campo for _, campo in COLUNAS]).iterator(chunk_size=TAMANHO_BLOCO)
+
+
+class _Eco:
+    """'Arquivo' que devolve o que recebe, para o csv.writer gerar strings"""
+
+    def write(self, valor):
+        return valor
+
+
+def gerar_csv(alugueis):
+    escritor = csv.writer(_Eco())
+    yield escritor.writerow(NOMES)
+    for linha in linhas(alugueis):
+        yield escritor.writerow(
+            ['' if valor is None else valor.isoformat() if hasattr(valor, 'isoformat') else valor
+             for valor in linha]
+        )
+
+
+def gerar_ndjson(alugueis):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for linha in linhas(alugueis):
+        yield encoder.encode(dict(zip(NOMES, linha))) + '\n'
+
+
+def gerar(alugueis, formato):
+    """Gerador de pedaços de texto no formato pedido ('csv' ou 'ndjson')"""
+    return gerar_csv(alugueis) if formato == 'csv' else gerar_ndjson(alugueis)
@@ -1,8 +1,12 @@
+from datetime import timedelta
+
 from django import forms
 from .models import Aluguel, SolicitacaoAluguel
 from carro.models import Carro
 from user.models import PerfilCliente, Usuario
 from django.utils import timezone
+from .disponibilidade import carro_livre
+from .precificacao import DIAS_MAXIMOS
 
 class SolicitacaoAluguelForm(forms.ModelForm):
     """
@@ -39,8 +43,8 @@ class SolicitacaoAluguelForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         
-        # Apenas carros disponíveis
-        self.fields['carro'].queryset = Carro.objects.filter(status='disponivel')
+        # Carros fora de manutenção (a ocupação é validada pelo período)
+        self.fields['carro'].queryset = Carro.objects.exclude(status='manutencao')
         
         # Melhorar exibição dos carros
         carro_choices = []
@@ -67,13 +71,24 @@ class SolicitacaoAluguelForm(forms.ModelForm):
                 raise forms.ValidationError(
                     'A data de início não pode ser no passado!'
                 )
+            
+            if data_fim - data_inicio > timedelta(days=DIAS_MAXIMOS):
+                raise forms.ValidationError(
+                    f'O aluguel pode durar no máximo {DIAS_MAXIMOS} dias!'
+                )
         
-        # Validar se o carro está disponível
-        if carro and carro.status != 'disponivel':
+        # Validar se o carro está disponível no período
+        if carro and carro.status == 'manutencao':
             raise forms.ValidationError(
-                f'O carro {carro.modelo} não está disponível no momento!'
+                f'O carro {carro.modelo} está em manutenção!'
             )
         
+        if carro and data_inicio and data_fim and data_fim > data_inicio:
+            if not carro_livre(carro, data_inicio, data_fim):
+                raise forms.ValidationError(
+                    f'O carro {carro.modelo} já está alugado neste período!'
+                )
+        
         return cleaned_data
 
 
@@ -122,7 +137,7 @@ class AluguelForm(forms.ModelForm):
             'status': 'Status do Aluguel',
         }
         help_texts = {
-            'carro': 'Apenas carros disponíveis serão listados',
+            'carro': 'Carros em manutenção não são listados',
             'funcionario': 'Funcionário que está registrando o aluguel',
             'valor': 'Valor total do aluguel em reais',
         }
@@ -130,9 +145,9 @@ class AluguelForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         
-        # Filtrar apenas carros disponíveis (quando criando novo aluguel)
+        # Filtrar carros fora de manutenção (quando criando novo aluguel)
         if not self.instance.pk:  # Novo aluguel
-            self.fields['carro'].queryset = Carro.objects.filter(status='disponivel')
+            self.fields['carro'].queryset = Carro.objects.exclude(status='manutencao')
         
         # Filtrar apenas funcionários (is_staff=True)
         self.fields['funcionario'].queryset = Usuario.objects.filter(is_staff=True)
@@ -164,11 +179,19 @@ class AluguelForm(forms.ModelForm):
                         'A data de início não pode ser no passado!'
                     )
         
-        # Validar se o carro está disponível (apenas para novos aluguéis)
+        # Validar se o carro está em manutenção (apenas para novos aluguéis)
         if carro and not self.instance.pk:
-            if carro.status != 'disponivel':
+            if carro.status == 'manutencao':
+                raise forms.ValidationError(
+                    f'O carro {carro.modelo} está em manutenção!'
+                )
+        
+        # Validar sobreposição com outros aluguéis ativos do mesmo carro
+        status = cleaned_data.get('status')
+        if carro and data_inicio and data_fim and data_fim > data_inicio and status == 'ativo':
+            if not carro_livre(carro, data_inicio, data_fim, ignorar_aluguel=self.instance.pk):
                 raise forms.ValidationError(
-                    f'O carro {carro.modelo} não está disponível no momento!'
+                    f'O carro {carro.modelo} já está alugado neste período!'
                 )
         
         return cleaned_data
@@ -0,0 +1,45 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from aluguel.exportacao import FORMATOS, filtrar_alugueis, gerar
+
+
+class Command(BaseCommand):
+    help = 'Exporta aluguéis + pagamentos em CSV ou NDJSON, em streaming'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--formato', choices=sorted(FORMATOS), default='csv')
+        parser.add_argument('--inicio', help='Data de início mínima (AAAA-MM-DD)')
+        parser.add_argument('--fim', help='Data de início máxima (AAAA-MM-DD)')
+        parser.add_argument('--status', nargs='+', help='Status dos aluguéis (ativo, finalizado, cancelado)')
+        parser.add_argument('--saida', help='Arquivo de saída (padrão: stdout)')
+
+    def handle(self, *args, **options):
+        datas = []
+        for opcao in ('inicio', 'fim'):
+            valor = options[opcao]
+            try:
+                data = parse_date(valor) if valor else None
+            except ValueError:
+                data = None
+            if valor and not data:
+                raise CommandError(f'Data inválida em --{opcao}: {valor}')
+            datas.append(data)
+
+        alugueis = filtrar_alugueis(datas[0], datas[1], options['status'])
+        if options['saida']:
+            with open(options['saida'], 'w', encoding='utf-8', newline='') as arquivo:
+                total = self.escrever(arquivo, alugueis, options['formato'])
+            self.stderr.write(self.style.SUCCESS(f"✅ {total} aluguel(is) exportado(s) para {options['saida']}"))
+        else:
+            self.escrever(sys.stdout, alugueis, options['formato'])
+
+    def escrever(self, arquivo, alugueis, formato):
+        total = 0
+        for pedaco in gerar(alugueis, formato):
+            arquivo.write(pedaco)
+            total += 1
+        # No CSV a primeira linha é o cabeçalho
+        return total - 1 if formato == 'csv' else total
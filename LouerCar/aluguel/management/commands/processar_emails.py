@@ -0,0 +1,117 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from aluguel.models import EmailPendente
+from aluguel.vencimentos import travar_livres
+
+
+class Command(BaseCommand):
+    help = 'Envia os emails da caixa de saída (outbox) em lotes, com novas tentativas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=100, help='Emails por lote')
+        parser.add_argument('--max-tentativas', type=int, default=5,
+                            help='Tentativas antes de marcar o email como falho')
+        parser.add_argument('--espera-base', type=int, default=60,
+                            help='Segundos de espera após a 1ª falha (dobra a cada falha)')
+        parser.add_argument('--reserva', type=int, default=300,
+                            help='Segundos que um lote fica reservado para este processo')
+        parser.add_argument('--loop', action='store_true',
+                            help='Continua rodando, verificando a fila periodicamente')
+        parser.add_argument('--intervalo', type=int, default=10,
+                            help='Segundos entre verificações no modo --loop')
+
+    def handle(self, *args, **options):
+        while True:
+            total = 0
+            while True:
+                enviados, falhas = self.processar_lote(options)
+                total += enviados + falhas
+                if enviados + falhas < options['lote']:
+                    break
+
+            if total:
+                self.stdout.write(f'📬 {total} email(s) processado(s)')
+
+            if not options['loop']:
+                break
+            time.sleep(options['intervalo'])
+
+    def reservar_lote(self, options):
+        """
+        Reserva um lote para este processo: na mesma transação que lê os
+        emails, adia a proxima_tentativa deles pelo prazo da reserva. Outro
+        processar_emails rodando ao mesmo tempo não pega os mesmos emails; se
+        este processo parar no meio do envio, eles voltam à fila quando a
+        reserva vence.
+        """
+        agora = timezone.now()
+        with transaction.atomic():
+            emails = list(
+                travar_livres(
+                    EmailPendente.objects.filter(status='pendente', proxima_tentativa__lte=agora)
+                ).order_by('proxima_tentativa')[:options['lote']]
+            )
+            if emails:
+                EmailPendente.objects.filter(pk__in=[email.pk for email in emails]).update(
+                    proxima_tentativa=agora + timedelta(seconds=options['reserva'])
+                )
+        return emails
+
+    def processar_lote(self, options):
+        """Envia um lote usando uma única conexão com o servidor de email"""
+        emails = self.reservar_lote(options)
+        if not emails:
+            return 0, 0
+
+        enviados, falhas = [], []
+        conexao = get_connection(fail_silently=False)
+        try:
+            conexao.open()
+            for email in emails:
+                mensagem = EmailMessage(
+                    email.assunto,
+                    email.mensagem,
+                    settings.DEFAULT_FROM_EMAIL,
+                    [email.destinatario],
+                    connection=conexao,
+                )
+                try:
+                    conexao.send_messages([mensagem])
+                    enviados.append(email.pk)
+                except Exception as e:
+                    falhas.append((email, e))
+        except Exception as e:
+            # Falha ao abrir a conexão: o lote inteiro volta para a fila
+            falhas = [(email, e) for email in emails if email.pk not in enviados]
+        finally:
+            conexao.close()
+
+        agora = timezone.now()
+        if enviados:
+            EmailPendente.objects.filter(pk__in=enviados).update(
+                status='enviado',
+                enviado_em=agora,
+                ultimo_erro=None,
+            )
+
+        for email, erro in falhas:
+            email.tentativas += 1
+            email.ultimo_erro = str(erro)
+            if email.tentativas >= options['max_tentativas']:
+                email.status = 'falhou'
+            else:
+                espera = options['espera_base'] * 2 ** (email.tentativas - 1)
+                email.proxima_tentativa = agora + timedelta(seconds=espera)
+            email.save(update_fields=['tentativas', 'ultimo_erro', 'status', 'proxima_tentativa'])
+
+        if falhas:
+            self.stdout.write(self.style.WARNING(f'⚠️  {len(falhas)} email(s) falharam e serão reenviados'))
+
+        return len(enviados), len(falhas)
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from aluguel import ocupacao
+from carro.models import Carro
+
+
+class Command(BaseCommand):
+    help = 'Confere Carro.status e Carro.alugueis_ativos com os aluguéis ativos e corrige divergências'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--corrigir', action='store_true',
+                            help='Corrige as divergências (sem esta opção só as lista)')
+        parser.add_argument('--mostrar', type=int, default=50,
+                            help='Quantas divergências listar')
+
+    def handle(self, *args, **options):
+        divergentes = ocupacao.anotar_divergencias(Carro.objects.all()).order_by('pk')
+        total = divergentes.count()
+        if not total:
+            self.stdout.write(self.style.SUCCESS('✅ Nenhuma divergência encontrada'))
+            return
+
+        linhas = divergentes.values_list('pk', 'placa', 'status', 'alugueis_ativos', 'ativos_reais')
+        for pk, placa, status, contador, reais in linhas[:options['mostrar']]:
+            self.stdout.write(
+                f'  Carro #{pk} ({placa}): status={status}, contador={contador}, aluguéis ativos={reais}'
+            )
+        if total > options['mostrar']:
+            self.stdout.write(f"  … e mais {total - options['mostrar']}")
+
+        if options['corrigir']:
+            corrigidos = ocupacao.recalcular()
+            self.stdout.write(self.style.SUCCESS(f'✅ {corrigidos} carro(s) corrigido(s)'))
+        else:
+            self.stdout.write(self.style.WARNING(
+                f'⚠️  {total} carro(s) divergente(s). Use --corrigir para corrigir.'
+            ))
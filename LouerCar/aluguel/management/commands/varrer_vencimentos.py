@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from aluguel.vencimentos import TAMANHO_LOTE, varrer
+
+
+class Command(BaseCommand):
+    help = 'Expira pagamentos vencidos e finaliza aluguéis cujo período terminou'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=TAMANHO_LOTE, help='Linhas por transação')
+        parser.add_argument('--loop', action='store_true',
+                            help='Continua rodando, varrendo periodicamente')
+        parser.add_argument('--intervalo', type=int, default=60,
+                            help='Segundos entre varreduras no modo --loop')
+
+    def handle(self, *args, **options):
+        while True:
+            resultado = varrer(tamanho_lote=options['lote'])
+            if resultado['pagamentos_expirados'] or resultado['alugueis_finalizados']:
+                self.stdout.write(
+                    f"⏰ {resultado['pagamentos_expirados']} pagamento(s) expirado(s), "
+                    f"{resultado['alugueis_finalizados']} aluguel(is) finalizado(s), "
+                    f"{resultado['carros_atualizados']} carro(s) atualizado(s)"
+                )
+
+            if not options['loop']:
+                break
+            time.sleep(options['intervalo'])
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-17 18:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aluguel', '0003_pagamento'),
+        ('carro', '0004_alter_carro_preco_diaria'),
+        ('user', '0003_tag_grupo_atualizado_em_grupo_criado_em_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='aluguel',
+            index=models.Index(fields=['carro', 'data_inicio', 'data_fim'], name='aluguel_carro_periodo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='solicitacaoaluguel',
+            index=models.Index(fields=['carro', 'data_inicio', 'data_fim'], name='solicitacao_carro_periodo_idx'),
+        ),
+    ]
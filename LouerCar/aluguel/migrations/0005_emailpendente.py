@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-17 18:43
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aluguel', '0004_indices_periodo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailPendente',
+            fields=[
+                ('id_email', models.AutoField(primary_key=True, serialize=False)),
+                ('destinatario', models.EmailField(max_length=255)),
+                ('assunto', models.CharField(max_length=255)),
+                ('mensagem', models.TextField()),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('enviado', 'Enviado'), ('falhou', 'Falhou')], default='pendente', max_length=20)),
+                ('tentativas', models.PositiveSmallIntegerField(default=0)),
+                ('proxima_tentativa', models.DateTimeField(default=django.utils.timezone.now)),
+                ('ultimo_erro', models.TextField(blank=True, null=True)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('enviado_em', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Email Pendente',
+                'verbose_name_plural': 'Emails Pendentes',
+                'db_table': 'email_pendente',
+                'ordering': ['criado_em'],
+                'indexes': [models.Index(fields=['status', 'proxima_tentativa'], name='email_status_tentativa_idx')],
+            },
+        ),
+    ]
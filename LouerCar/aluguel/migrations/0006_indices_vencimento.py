@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aluguel', '0005_emailpendente'),
+        ('carro', '0004_alter_carro_preco_diaria'),
+        ('user', '0003_tag_grupo_atualizado_em_grupo_criado_em_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='aluguel',
+            index=models.Index(fields=['status', 'data_fim'], name='aluguel_status_fim_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pagamento',
+            index=models.Index(fields=['status', 'data_vencimento'], name='pagamento_status_venc_idx'),
+        ),
+    ]
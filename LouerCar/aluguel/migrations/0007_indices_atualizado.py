@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aluguel', '0006_indices_vencimento'),
+        ('carro', '0006_indice_atualizado'),
+        ('user', '0003_tag_grupo_atualizado_em_grupo_criado_em_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='aluguel',
+            index=models.Index(fields=['atualizado_em', 'id_aluguel'], name='aluguel_atualizado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='solicitacaoaluguel',
+            index=models.Index(fields=['atualizado_em', 'id_solicitacao'], name='solicitacao_atualizado_idx'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aluguel', '0007_indices_atualizado'),
+        ('carro', '0007_indices_consultas'),
+        ('user', '0003_tag_grupo_atualizado_em_grupo_criado_em_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='aluguel',
+            index=models.Index(fields=['-criado_em'], name='aluguel_criado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='aluguel',
+            index=models.Index(fields=['status', '-criado_em'], name='aluguel_status_criado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='aluguel',
+            index=models.Index(fields=['perfil_cliente', '-criado_em'], name='aluguel_cliente_criado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='aluguel',
+            index=models.Index(fields=['funcionario', 'criado_em'], name='aluguel_funcionario_criado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='aluguel',
+            index=models.Index(condition=models.Q(('status', 'ativo')), fields=['carro', 'data_inicio', 'data_fim'], name='aluguel_ativo_periodo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pagamento',
+            index=models.Index(fields=['status', '-criado_em'], name='pagamento_status_criado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pagamento',
+            index=models.Index(condition=models.Q(('status', 'aprovado')), fields=['data_pagamento'], name='pagamento_aprovado_data_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='solicitacaoaluguel',
+            index=models.Index(fields=['status', '-criado_em'], name='solicitacao_status_criado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='solicitacaoaluguel',
+            index=models.Index(fields=['perfil_cliente', '-criado_em'], name='solicitacao_cliente_criado_idx'),
+        ),
+    ]
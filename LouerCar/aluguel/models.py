@@ -1,10 +1,12 @@
 # ADICIONE ESTE MODELO NO FINAL DO ARQUIVO aluguel/models.py
 
-from django.db import models
+from django.db import models, transaction
 from user.models import PerfilCliente, Usuario
 from carro.models import Carro
-from django.core.mail import send_mail
 from django.conf import settings
+from django.utils import timezone
+
+from . import ocupacao
 
 class Pagamento(models.Model):
     """
@@ -62,6 +64,15 @@ class Pagamento(models.Model):
         verbose_name = 'Pagamento'
         verbose_name_plural = 'Pagamentos'
         ordering = ['-criado_em']
+        indexes = [
+            models.Index(fields=['status', 'data_vencimento'], name='pagamento_status_venc_idx'),
+            models.Index(fields=['status', '-criado_em'], name='pagamento_status_criado_idx'),
+            # Pagamentos confirmados por dia (relatorios/resumos.py)
+            models.Index(
+                fields=['data_pagamento'], name='pagamento_aprovado_data_idx',
+                condition=models.Q(status='aprovado'),
+            ),
+        ]
     
     def __str__(self):
         return f"Pagamento #{self.id_pagamento} - Aluguel #{self.aluguel.id_aluguel}"
@@ -77,8 +88,8 @@ class Pagamento(models.Model):
         }
         return badges.get(self.status, 'bg-secondary')
     
-    def enviar_email_pagamento_pendente(self):
-        """Envia email notificando sobre pagamento pendente"""
+    def enfileirar_email_pagamento_pendente(self):
+        """Agenda o email notificando sobre pagamento pendente"""
         cliente = self.aluguel.perfil_cliente.usuario
         
         subject = f'🚗 Pagamento Pendente - Aluguel #{self.aluguel.id_aluguel}'
@@ -103,19 +114,14 @@ class Pagamento(models.Model):
         Equipe LouerCar
         """
         
-        try:
-            send_mail(
-                subject,
-                message,
-                settings.DEFAULT_FROM_EMAIL,
-                [cliente.email],
-                fail_silently=False,
-            )
-        except Exception as e:
-            print(f"Erro ao enviar email: {e}")
+        return EmailPendente.objects.create(
+            destinatario=cliente.email,
+            assunto=subject,
+            mensagem=message,
+        )
     
-    def enviar_email_pagamento_aprovado(self):
-        """Envia email notificando pagamento aprovado"""
+    def enfileirar_email_pagamento_aprovado(self):
+        """Agenda o email notificando pagamento aprovado"""
         cliente = self.aluguel.perfil_cliente.usuario
         
         subject = f'✅ Pagamento Confirmado - Aluguel #{self.aluguel.id_aluguel}'
@@ -136,16 +142,57 @@ class Pagamento(models.Model):
         Equipe LouerCar
         """
         
-        try:
-            send_mail(
-                subject,
-                message,
-                settings.DEFAULT_FROM_EMAIL,
-                [cliente.email],
-                fail_silently=False,
-            )
-        except Exception as e:
-            print(f"Erro ao enviar email: {e}")
+        return EmailPendente.objects.create(
+            destinatario=cliente.email,
+            assunto=subject,
+            mensagem=message,
+        )
+    
+    # Nomes antigos: o email agora vai para a caixa de saída (processar_emails)
+    def enviar_email_pagamento_pendente(self):
+        """Agenda o email de pagamento pendente (use enfileirar_email_pagamento_pendente)"""
+        return self.enfileirar_email_pagamento_pendente()
+    
+    def enviar_email_pagamento_aprovado(self):
+        """Agenda o email de pagamento aprovado (use enfileirar_email_pagamento_aprovado)"""
+        return self.enfileirar_email_pagamento_aprovado()
+
+
+class EmailPendente(models.Model):
+    """
+    Caixa de saída (outbox) de emails.
+    Os emails são gravados na mesma transação da alteração que os gerou
+    e enviados depois pelo comando `processar_emails`.
+    """
+    STATUS_CHOICES = [
+        ('pendente', 'Pendente'),
+        ('enviado', 'Enviado'),
+        ('falhou', 'Falhou'),
+    ]
+    
+    id_email = models.AutoField(primary_key=True)
+    destinatario = models.EmailField(max_length=255)
+    assunto = models.CharField(max_length=255)
+    mensagem = models.TextField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pendente')
+    tentativas = models.PositiveSmallIntegerField(default=0)
+    proxima_tentativa = models.DateTimeField(default=timezone.now)
+    ultimo_erro = models.TextField(blank=True, null=True)
+    
+    criado_em = models.DateTimeField(auto_now_add=True)
+    enviado_em = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'email_pendente'
+        verbose_name = 'Email Pendente'
+        verbose_name_plural = 'Emails Pendentes'
+        ordering = ['criado_em']
+        indexes = [
+            models.Index(fields=['status', 'proxima_tentativa'], name='email_status_tentativa_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Email #{self.id_email} para {self.destinatario} ({self.get_status_display()})"
 
 
 class SolicitacaoAluguel(models.Model):
@@ -197,6 +244,13 @@ class SolicitacaoAluguel(models.Model):
         verbose_name = 'Solicitação de Aluguel'
         verbose_name_plural = 'Solicitações de Aluguel'
         ordering = ['-criado_em']
+        indexes = [
+            models.Index(fields=['carro', 'data_inicio', 'data_fim'], name='solicitacao_carro_periodo_idx'),
+            models.Index(fields=['atualizado_em', 'id_solicitacao'], name='solicitacao_atualizado_idx'),
+            # Solicitações pendentes (funcionário) e do cliente, mais recentes primeiro
+            models.Index(fields=['status', '-criado_em'], name='solicitacao_status_criado_idx'),
+            models.Index(fields=['perfil_cliente', '-criado_em'], name='solicitacao_cliente_criado_idx'),
+        ]
     
     def __str__(self):
         return f"Solicitação #{self.id_solicitacao} - {self.perfil_cliente.usuario.username}"
@@ -266,6 +320,23 @@ class Aluguel(models.Model):
         verbose_name = 'Aluguel'
         verbose_name_plural = 'Aluguéis'
         ordering = ['-criado_em']
+        indexes = [
+            models.Index(fields=['carro', 'data_inicio', 'data_fim'], name='aluguel_carro_periodo_idx'),
+            models.Index(fields=['status', 'data_fim'], name='aluguel_status_fim_idx'),
+            models.Index(fields=['atualizado_em', 'id_aluguel'], name='aluguel_atualizado_idx'),
+            # Listagens: ordenação padrão, com filtro de status ou do cliente
+            models.Index(fields=['-criado_em'], name='aluguel_criado_idx'),
+            models.Index(fields=['status', '-criado_em'], name='aluguel_status_criado_idx'),
+            models.Index(fields=['perfil_cliente', '-criado_em'], name='aluguel_cliente_criado_idx'),
+            # Resumos por funcionário (relatorios/resumos.py)
+            models.Index(fields=['funcionario', 'criado_em'], name='aluguel_funcionario_criado_idx'),
+            # Só os ativos: conflito de período na aprovação, índice de
+            # disponibilidade e contagem de ocupação dos carros
+            models.Index(
+                fields=['carro', 'data_inicio', 'data_fim'], name='aluguel_ativo_periodo_idx',
+                condition=models.Q(status='ativo'),
+            ),
+        ]
     
     def __str__(self):
         return f"Aluguel #{self.id_aluguel} - {self.carro.modelo} ({self.get_status_display()})"
@@ -294,20 +365,39 @@ class Aluguel(models.Model):
         """Verifica se tem pagamento associado"""
         return hasattr(self, 'pagamento')
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        aluguel = super().from_db(db, field_names, values)
+        # Estado gravado no banco, para o save() saber se o status 'ativo' mudou
+        aluguel._estado_banco = (aluguel.__dict__.get('status'), aluguel.__dict__.get('carro_id'))
+        # Chaves dos resumos diários (relatorios) que dependem do estado gravado
+        aluguel._periodo_banco = aluguel._periodo()
+        return aluguel
+    
+    def _periodo(self):
+        campos = ('carro_id', 'funcionario_id', 'data_inicio', 'data_fim', 'criado_em')
+        return tuple(self.__dict__.get(campo) for campo in campos)
+    
+    def _carro_ou_chave(self):
+        """O carro já carregado, ou uma instância só com a chave (sem consulta)"""
+        if Aluguel.carro.is_cached(self):
+            return self.carro
+        return Carro(pk=self.carro_id)
+    
     def save(self, *args, **kwargs):
-        """Atualiza o status do carro ao salvar o aluguel"""
-        if self.status == 'ativo' and self.carro.status != 'alugado':
-            self.carro.status = 'alugado'
-            self.carro.save()
+        """Grava o aluguel e atualiza a ocupação do carro quando o status 'ativo' muda"""
+        status_antes, carro_antes = getattr(self, '_estado_banco', (None, None))
+        era_ativo = status_antes == 'ativo'
+        ativo = self.status == 'ativo'
+        trocou_carro = era_ativo and ativo and carro_antes != self.carro_id
         
-        if self.status in ['finalizado', 'cancelado']:
-            outros_ativos = Aluguel.objects.filter(
-                carro=self.carro, 
-                status='ativo'
-            ).exclude(id_aluguel=self.pk).exists()
-            
-            if not outros_ativos:
-                self.carro.status = 'disponivel'
-                self.carro.save()
+        # Sem savepoint: dentro de outra transação, um erro já desfaz tudo
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+            if era_ativo and (not ativo or trocou_carro):
+                ocupacao.saida(Carro(pk=carro_antes) if trocou_carro else self._carro_ou_chave())
+            if ativo and (not era_ativo or trocou_carro):
+                ocupacao.entrada(self._carro_ou_chave())
         
-        super().save(*args, **kwargs)
\ No newline at end of file
+        self._estado_banco = (self.status, self.carro_id)
+        self._periodo_banco = self._periodo()
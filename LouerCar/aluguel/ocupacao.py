@@ -0,0 +1,105 @@
+"""
+Ocupação dos carros: mantém Carro.alugueis_ativos e Carro.status de acordo
+com os aluguéis ativos.
+
+Aluguel.save() chama entrada()/saida() só quando o aluguel entra ou sai do
+status 'ativo'. Cada chamada é um único UPDATE com expressões F(): o
+contador muda no banco, sem ler o carro, sem exists() sobre os outros
+aluguéis e sem regravar as outras colunas. Quem altera aluguéis em massa
+com update() (varredura de vencimentos, carga de dados) usa recalcular(),
+que também é a base do comando reconciliar_frota.
+"""
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from carro.cache_catalogo import invalidar_catalogo
+from carro.estatisticas import invalidar_estatisticas_frota
+from carro.models import Carro
+from LouerCar.versoes import incrementar_apos_commit
+
+
+def _invalidar():
+    # update() não dispara os signals do Carro
+    transaction.on_commit(invalidar_estatisticas_frota)
+    transaction.on_commit(invalidar_catalogo)
+    incrementar_apos_commit('carro')
+
+
+def entrada(carro):
+    """Um aluguel do carro passou a ser ativo"""
+    Carro.objects.filter(pk=carro.pk).update(
+        alugueis_ativos=F('alugueis_ativos') + 1,
+        status='alugado',
+        atualizado_em=timezone.now(),
+    )
+    # Mantém a instância em memória coerente com o banco
+    carro.alugueis_ativos += 1
+    carro.status = 'alugado'
+    _invalidar()
+
+
+def saida(carro):
+    """Um aluguel do carro deixou de ser ativo"""
+    # No UPDATE, o CASE enxerga o contador de antes do decremento
+    Carro.objects.filter(pk=carro.pk, alugueis_ativos__gt=0).update(
+        alugueis_ativos=F('alugueis_ativos') - 1,
+        status=Case(
+            When(alugueis_ativos__lte=1, status='alugado', then=Value('disponivel')),
+            default=F('status'),
+        ),
+        atualizado_em=timezone.now(),
+    )
+    if carro.alugueis_ativos > 0:
+        carro.alugueis_ativos -= 1
+        if carro.alugueis_ativos == 0 and carro.status == 'alugado':
+            carro.status = 'disponivel'
+    _invalidar()
+
+
+def _contagem_real():
+    from .models import Aluguel
+
+    return Coalesce(
+        Subquery(
+            Aluguel.objects.filter(carro=OuterRef('pk'), status='ativo')
+            .order_by().values('carro').annotate(total=Count('pk')).values('total'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def anotar_divergencias(queryset):
+    """Carros cujo contador ou status não bate com os aluguéis ativos (valor real em `ativos_reais`)"""
+    return queryset.annotate(ativos_reais=_contagem_real()).filter(
+        ~Q(alugueis_ativos=F('ativos_reais'))
+        | Q(ativos_reais__gt=0) & ~Q(status='alugado')
+        | Q(ativos_reais=0, status='alugado')
+    )
+
+
+def recalcular(carro_ids=None, tamanho_lote=1000):
+    """
+    Corrige contador e status dos carros divergentes a partir dos aluguéis
+    ativos (todos os carros se carro_ids for None), com dois UPDATEs por
+    lote. Carros em manutenção sem aluguel ativo continuam em manutenção.
+    Retorna quantos carros foram corrigidos.
+    """
+    carros = Carro.objects.all() if carro_ids is None else Carro.objects.filter(pk__in=carro_ids)
+    ids = list(anotar_divergencias(carros).values_list('pk', flat=True))
+    agora = timezone.now()
+    for inicio in range(0, len(ids), tamanho_lote):
+        with transaction.atomic():
+            lote = Carro.objects.filter(pk__in=ids[inicio:inicio + tamanho_lote])
+            lote.update(alugueis_ativos=_contagem_real(), atualizado_em=agora)
+            # O status segue o contador já corrigido
+            lote.update(status=Case(
+                When(alugueis_ativos__gt=0, then=Value('alugado')),
+                When(status='alugado', then=Value('disponivel')),
+                default=F('status'),
+            ))
+    if ids:
+        _invalidar()
+    return len(ids)
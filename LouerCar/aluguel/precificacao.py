@@ -0,0 +1,131 @@
+"""
+Precificação e cotação de aluguéis.
+
+O preço é diária do carro × fator do período. O fator depende só das datas
+(diárias cobradas, fins de semana, temporada, desconto por duração), então
+é calculado uma vez por período e aplicado a todos os carros de uma vez:
+cotar N carros para as mesmas datas custa um cálculo de período e N
+multiplicações em Decimal (uma por preço de diária distinto), sem percorrer
+os dias de novo para cada carro.
+
+Regras:
+- A diária tem 24 h contadas da hora de retirada. A fração final até
+  TOLERANCIA não é cobrada; até MEIA_DIARIA vale meia diária; acima disso,
+  uma diária inteira. Mínimo de uma diária.
+- Cada diária é multiplicada por MULTIPLICADOR_FIM_DE_SEMANA se começa num
+  sábado ou domingo e por MULTIPLICADOR_TEMPORADA se começa num mês de
+  MESES_TEMPORADA.
+- Desconto por duração (DESCONTOS_DURACAO) sobre o total, pelo número de
+  diárias cobradas.
+- Tudo em Decimal; o arredondamento para centavos (ROUND_HALF_UP) é feito
+  só no valor final.
+- O período vai no máximo até DIAS_MAXIMOS dias: o cálculo percorre as
+  diárias uma a uma e as datas vêm de parâmetros da requisição.
+"""
+from datetime import timedelta
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.utils import timezone
+
+DIA = timedelta(days=1)
+TOLERANCIA = timedelta(hours=1)
+MEIA_DIARIA = timedelta(hours=6)
+DIAS_MAXIMOS = 366
+
+MULTIPLICADOR_FIM_DE_SEMANA = Decimal('1.20')
+MULTIPLICADOR_TEMPORADA = Decimal('1.15')
+MESES_TEMPORADA = {1, 7, 12}
+
+# (mínimo de diárias, desconto), do maior para o menor
+DESCONTOS_DURACAO = [
+    (Decimal(28), Decimal('0.20')),
+    (Decimal(7), Decimal('0.10')),
+]
+
+CENTAVO = Decimal('0.01')
+MEIA = Decimal('0.5')
+UM = Decimal(1)
+
+
+def diarias(inicio, fim):
+    """Lista de (início da diária, fração cobrada: 1 ou 0.5)"""
+    if fim <= inicio:
+        raise ValueError('A data de término deve ser posterior à de início')
+    duracao = fim - inicio
+    if duracao > DIAS_MAXIMOS * DIA:
+        raise ValueError(f'O período pode ter no máximo {DIAS_MAXIMOS} dias')
+    inteiras, resto = divmod(duracao, DIA)
+    resultado = [(inicio + n * DIA, UM) for n in range(inteiras)]
+    if resto > MEIA_DIARIA:
+        resultado.append((inicio + inteiras * DIA, UM))
+    elif resto > TOLERANCIA or not resultado:
+        resultado.append((inicio + inteiras * DIA, MEIA if resultado else UM))
+    return resultado
+
+
+def multiplicador(dia):
+    """Multiplicador de fim de semana/temporada de uma diária"""
+    local = timezone.localtime(dia) if timezone.is_aware(dia) else dia
+    fator = UM
+    if local.weekday() >= 5:
+        fator *= MULTIPLICADOR_FIM_DE_SEMANA
+    if local.month in MESES_TEMPORADA:
+        fator *= MULTIPLICADOR_TEMPORADA
+    return fator
+
+
+def desconto_duracao(quantidade):
+    for minimo, desconto in DESCONTOS_DURACAO:
+        if quantidade >= minimo:
+            return desconto
+    return Decimal(0)
+
+
+def fator_periodo(inicio, fim):
+    """
+    Fator do período: valor = diária × fator.
+    Retorna {'diarias', 'desconto', 'fator'} (Decimais).
+    """
+    lista = diarias(inicio, fim)
+    quantidade = sum((fracao for _, fracao in lista), Decimal(0))
+    soma = sum((fracao * multiplicador(dia) for dia, fracao in lista), Decimal(0))
+    desconto = desconto_duracao(quantidade)
+    return {
+        'diarias': quantidade,
+        'desconto': desconto,
+        'fator': soma * (UM - desconto),
+    }
+
+
+def aplicar(preco_diaria, fator):
+    return (Decimal(preco_diaria) * fator).quantize(CENTAVO, rounding=ROUND_HALF_UP)
+
+
+def cotar(preco_diaria, inicio, fim):
+    """Valor de um carro no período"""
+    return aplicar(preco_diaria, fator_periodo(inicio, fim)['fator'])
+
+
+def cotar_em_lote(pares):
+    """
+    Cota vários (chave, preço da diária, início, fim) de uma vez.
+    O fator é calculado uma vez por período e o valor uma vez por
+    (período, preço). Retorna {chave: valor}.
+    """
+    fatores = {}
+    valores = {}
+    resultado = {}
+    for chave, preco_diaria, inicio, fim in pares:
+        periodo = (inicio, fim)
+        if periodo not in fatores:
+            fatores[periodo] = fator_periodo(inicio, fim)['fator']
+        par = (periodo, preco_diaria)
+        if par not in valores:
+            valores[par] = aplicar(preco_diaria, fatores[periodo])
+        resultado[chave] = valores[par]
+    return resultado
+
+
+def cotar_periodo(precos, inicio, fim):
+    """Cota (chave, preço da diária) para o mesmo período; retorna {chave: valor}"""
+    return cotar_em_lote((chave, preco, inicio, fim) for chave, preco in precos)
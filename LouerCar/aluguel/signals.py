@@ -0,0 +1,42 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .disponibilidade import invalidar_indice
+from .estatisticas import invalidar_estatisticas_alugueis, invalidar_estatisticas_solicitacoes
+from carro.models import Carro
+from LouerCar.versoes import incrementar_apos_commit
+
+from . import ocupacao
+from .models import Aluguel, Pagamento, SolicitacaoAluguel
+
+
+@receiver([post_save, post_delete], sender=Aluguel)
+@receiver([post_save, post_delete], sender=Pagamento)
+def aluguel_alterado(sender, instance, **kwargs):
+    """Invalida as estatísticas de aluguéis quando um aluguel ou pagamento muda"""
+    invalidar_estatisticas_alugueis()
+    incrementar_apos_commit('aluguel')
+
+
+@receiver([post_save, post_delete], sender=SolicitacaoAluguel)
+def solicitacao_alterada(sender, instance, **kwargs):
+    """Invalida as estatísticas de solicitações quando uma solicitação muda"""
+    invalidar_estatisticas_solicitacoes()
+    incrementar_apos_commit('solicitacao')
+
+
+@receiver([post_save, post_delete], sender=Aluguel)
+def periodo_alterado(sender, instance, **kwargs):
+    """Desatualiza o índice de disponibilidade quando um aluguel muda"""
+    # Só após o commit: antes disso outra requisição recarregaria o índice
+    # sem enxergar a gravação ainda não confirmada
+    transaction.on_commit(invalidar_indice)
+
+
+@receiver(post_delete, sender=Aluguel)
+def aluguel_removido(sender, instance, **kwargs):
+    """Um aluguel ativo removido deixa de ocupar o carro"""
+    status, carro_id = getattr(instance, '_estado_banco', (instance.status, instance.carro_id))
+    if status == 'ativo':
+        ocupacao.saida(Carro(pk=carro_id))
@@ -1,3 +1,739 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import os
+import re
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from carro.models import Carro
+from user.models import PerfilCliente, Usuario
+
+from .aprovacao import ConflitoAprovacao, aprovar_solicitacao
+from .management.commands.processar_emails import Command as ProcessarEmails
+from .disponibilidade import ArvoreIntervalos, IndiceDisponibilidade, carro_livre, carros_livres
+from . import ocupacao, precificacao
+from .estatisticas import estatisticas_alugueis, estatisticas_solicitacoes
+from .models import Aluguel, EmailPendente, Pagamento, SolicitacaoAluguel
+from .vencimentos import varrer
+
+
+class AprovacaoConcorrenteTest(TransactionTestCase):
+    """Aprovações simultâneas para o mesmo carro não podem gerar dupla reserva"""
+
+    # As leituras fora de transação vão para o alias de leitura (espelho do
+    # default), quando ele existe
+    databases = '__all__'
+    concorrentes = 8
+
+    def setUp(self):
+        cache.clear()
+        self.funcionario = Usuario.objects.create(
+            username='funcionario', email='func@louercar.com', is_staff=True
+        )
+        self.carro = Carro.objects.create(modelo='Onix', placa='ABC-1234', ano=2024)
+        inicio = timezone.now() + timedelta(days=1)
+        self.solicitacoes = []
+        for n in range(self.concorrentes):
+            cliente = Usuario.objects.create(username=f'cliente{n}', email=f'cliente{n}@teste.com')
+            perfil = PerfilCliente.objects.create(
+                usuario=cliente, CNH=f'CNH{n}', telefone='11999999999', endereco='Rua A'
+            )
+            # Todos os períodos se sobrepõem
+            self.solicitacoes.append(SolicitacaoAluguel.objects.create(
+                perfil_cliente=perfil, carro=self.carro,
+                data_inicio=inicio + timedelta(hours=n),
+                data_fim=inicio + timedelta(days=3, hours=n),
+                valor_estimado=300,
+            ))
+
+    def aprovar_em_paralelo(self, ids):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('SQLite em memória não aceita conexões concorrentes')
+        largada = threading.Barrier(len(ids))
+        aprovadas, conflitos, erros = [], [], []
+
+        def aprovar(solicitacao_id):
+            try:
+                largada.wait()
+                aprovar_solicitacao(solicitacao_id, self.funcionario)
+                aprovadas.append(solicitacao_id)
+            except ConflitoAprovacao:
+                conflitos.append(solicitacao_id)
+            except Exception as erro:  # noqa: BLE001 - o teste falha listando o erro
+                erros.append(erro)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=aprovar, args=(pk,)) for pk in ids]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return aprovadas, conflitos, erros
+
+    def test_apenas_uma_aprovacao_por_periodo(self):
+        aprovadas, conflitos, erros = self.aprovar_em_paralelo(
+            [solicitacao.pk for solicitacao in self.solicitacoes]
+        )
+
+        self.assertEqual(erros, [])
+        self.assertEqual(len(aprovadas), 1)
+        self.assertEqual(len(conflitos), self.concorrentes - 1)
+        self.assertEqual(Aluguel.objects.filter(carro=self.carro, status='ativo').count(), 1)
+        self.assertEqual(Pagamento.objects.count(), 1)
+        self.assertEqual(EmailPendente.objects.count(), 1)
+        self.assertEqual(
+            list(SolicitacaoAluguel.objects.filter(status='aprovado').values_list('pk', flat=True)),
+            aprovadas,
+        )
+        self.carro.refresh_from_db()
+        self.assertEqual(self.carro.status, 'alugado')
+
+    def test_mesma_solicitacao_aprovada_uma_vez(self):
+        solicitacao = self.solicitacoes[0]
+        aprovadas, conflitos, erros = self.aprovar_em_paralelo([solicitacao.pk] * 4)
+
+        self.assertEqual(erros, [])
+        self.assertEqual(aprovadas, [solicitacao.pk])
+        self.assertEqual(Aluguel.objects.count(), 1)
+
+    def test_conflito_nao_deixa_gravacao_parcial(self):
+        aprovar_solicitacao(self.solicitacoes[0].pk, self.funcionario)
+
+        with self.assertRaises(ConflitoAprovacao):
+            aprovar_solicitacao(self.solicitacoes[1].pk, self.funcionario)
+
+        self.assertEqual(Aluguel.objects.count(), 1)
+        self.assertEqual(Pagamento.objects.count(), 1)
+        self.solicitacoes[1].refresh_from_db()
+        self.assertEqual(self.solicitacoes[1].status, 'pendente')
+
+
+class ProcessarEmailsTest(TestCase):
+    """Caixa de saída: envio em lote, novas tentativas com espera e reserva do lote"""
+
+    def setUp(self):
+        for n in range(3):
+            EmailPendente.objects.create(destinatario=f'cliente{n}@teste.com', assunto='Oi', mensagem='...')
+
+    def processar(self, **opcoes):
+        call_command('processar_emails', stdout=io.StringIO(), **opcoes)
+
+    def test_envio(self):
+        self.processar()
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(EmailPendente.objects.filter(status='enviado').count(), 3)
+        self.processar()
+        self.assertEqual(len(mail.outbox), 3)
+
+    def test_nomes_antigos_enfileiram(self):
+        cliente = Usuario.objects.create(username='cliente', email='cliente@teste.com')
+        perfil = PerfilCliente.objects.create(
+            usuario=cliente, CNH='CNH1', telefone='11999999999', endereco='Rua A'
+        )
+        carro = Carro.objects.create(modelo='Onix', placa='ABC-1234', ano=2024)
+        agora = timezone.now()
+        aluguel = Aluguel.objects.create(
+            perfil_cliente=perfil, carro=carro,
+            funcionario=Usuario.objects.create(username='funcionario', is_staff=True),
+            data_inicio=agora, data_fim=agora + timedelta(days=2), valor=300,
+        )
+        pagamento = Pagamento.objects.create(aluguel=aluguel, valor=300, data_vencimento=agora)
+        EmailPendente.objects.all().delete()
+
+        pendente = pagamento.enviar_email_pagamento_pendente()
+        aprovado = pagamento.enviar_email_pagamento_aprovado()
+        self.assertEqual(list(EmailPendente.objects.order_by('pk')), [pendente, aprovado])
+        self.assertEqual(pendente.destinatario, 'cliente@teste.com')
+        self.assertIn('Pagamento Confirmado', aprovado.assunto)
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_espera_dobra_e_marca_falhou(self):
+        email = EmailPendente.objects.first()
+        EmailPendente.objects.exclude(pk=email.pk).delete()
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages',
+                        side_effect=OSError('servidor fora')):
+            antes = timezone.now()
+            self.processar(espera_base=60, max_tentativas=3)
+            email.refresh_from_db()
+            self.assertEqual((email.status, email.tentativas, email.ultimo_erro), ('pendente', 1, 'servidor fora'))
+            self.assertAlmostEqual((email.proxima_tentativa - antes).total_seconds(), 60, delta=5)
+
+            # Ainda não chegou a hora: nada é tentado
+            self.processar(espera_base=60, max_tentativas=3)
+            email.refresh_from_db()
+            self.assertEqual(email.tentativas, 1)
+
+            EmailPendente.objects.update(proxima_tentativa=timezone.now())
+            antes = timezone.now()
+            self.processar(espera_base=60, max_tentativas=3)
+            email.refresh_from_db()
+            self.assertAlmostEqual((email.proxima_tentativa - antes).total_seconds(), 120, delta=5)
+
+            EmailPendente.objects.update(proxima_tentativa=timezone.now())
+            self.processar(espera_base=60, max_tentativas=3)
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.tentativas), ('falhou', 3))
+        self.assertEqual(mail.outbox, [])
+
+    def test_lote_reservado_nao_e_pego_de_novo(self):
+        comando = ProcessarEmails()
+        opcoes = {'lote': 2, 'reserva': 300}
+        primeiro = comando.reservar_lote(opcoes)
+        segundo = comando.reservar_lote(opcoes)
+        self.assertEqual(len(primeiro), 2)
+        self.assertEqual(len(segundo), 1)
+        self.assertFalse({email.pk for email in primeiro} & {email.pk for email in segundo})
+        self.assertEqual(comando.reservar_lote(opcoes), [])
+        # Reserva vencida (processo parou no meio do envio): volta para a fila
+        EmailPendente.objects.update(proxima_tentativa=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(len(comando.reservar_lote({'lote': 10, 'reserva': 300})), 3)
+
+
+class DisponibilidadeTest(TestCase):
+    """Árvore de intervalos, índice por carro e filtro de carros livres"""
+
+    def setUp(self):
+        cache.clear()
+        self.base = timezone.now().replace(microsecond=0)
+
+    def h(self, horas):
+        return self.base + timedelta(hours=horas)
+
+    def test_arvore_igual_a_forca_bruta(self):
+        intervalos = [(a, a + d, n) for n, (a, d) in enumerate(
+            (a, d) for a in range(0, 100, 3) for d in (1, 5, 17)
+        )]
+        arvore = ArvoreIntervalos(intervalos)
+        for inicio in range(-5, 110, 4):
+            for fim in (inicio + 1, inicio + 6, inicio + 30):
+                esperado = {chave for a, b, chave in intervalos if a < fim and b > inicio}
+                self.assertEqual(set(arvore.sobrepostos(inicio, fim)), esperado, (inicio, fim))
+
+    def test_intervalos_que_se_tocam_nao_colidem(self):
+        arvore = ArvoreIntervalos([(0, 10, 'a'), (10, 20, 'b')])
+        self.assertEqual(set(arvore.sobrepostos(10, 15)), {'b'})
+        self.assertEqual(set(arvore.sobrepostos(5, 10)), {'a'})
+        self.assertEqual(set(arvore.sobrepostos(9, 11)), {'a', 'b'})
+        self.assertEqual(set(arvore.sobrepostos(20, 30)), set())
+
+    def test_varios_alugueis_por_carro(self):
+        indice = IndiceDisponibilidade([
+            (1, 10, self.h(0), self.h(48)),     # longo: cobre o buraco entre os outros
+            (1, 11, self.h(10), self.h(12)),
+            (1, 12, self.h(60), self.h(72)),
+            (2, 20, self.h(24), self.h(30)),
+        ])
+        self.assertFalse(indice.carro_livre(1, self.h(20), self.h(22)))
+        self.assertEqual(indice.conflitos(1, self.h(11), self.h(61)), [10, 11, 12])
+        # Encostar no término/início não é conflito
+        self.assertTrue(indice.carro_livre(1, self.h(48), self.h(60)))
+        self.assertFalse(indice.carro_livre(1, self.h(48), self.h(61)))
+        self.assertTrue(indice.carro_livre(1, self.h(72), self.h(80)))
+        self.assertTrue(indice.carro_livre(3, self.h(0), self.h(100)))
+        self.assertEqual(indice.carros_ocupados(self.h(30), self.h(49)), {1})
+        self.assertEqual(indice.carros_ocupados(self.h(29), self.h(30)), {1, 2})
+
+    def test_carros_livres_acompanha_gravacoes(self):
+        funcionario = Usuario.objects.create(username='funcionario', is_staff=True)
+        cliente = Usuario.objects.create(username='cliente', email='cliente@teste.com')
+        perfil = PerfilCliente.objects.create(
+            usuario=cliente, CNH='CNH1', telefone='11999999999', endereco='Rua A'
+        )
+        onix = Carro.objects.create(modelo='Onix', placa='ABC-1234', ano=2024)
+        gol = Carro.objects.create(modelo='Gol', placa='XYZ-9876', ano=2020)
+
+        def livres(inicio, fim):
+            return set(carros_livres(Carro.objects.all(), self.h(inicio), self.h(fim)))
+
+        def onix_livre(inicio, fim, **kwargs):
+            return carro_livre(onix, self.h(inicio), self.h(fim), **kwargs)
+
+        self.assertEqual(livres(24, 48), {onix, gol})
+        with self.captureOnCommitCallbacks(execute=True):
+            aluguel = Aluguel.objects.create(
+                perfil_cliente=perfil, carro=onix, funcionario=funcionario,
+                data_inicio=self.h(24), data_fim=self.h(48), valor=300,
+            )
+        self.assertEqual(livres(30, 31), {gol})
+        self.assertEqual(livres(48, 60), {onix, gol})
+        # Filtro no banco, sem a lista de carros ocupados como parâmetro
+        sql = str(carros_livres(Carro.objects.all(), self.h(30), self.h(31)).query)
+        self.assertIn('NOT EXISTS', sql)
+
+        # Banco (cache por processo) e índice em memória (cache compartilhado)
+        for memoria in (False, True):
+            with self.subTest(memoria=memoria), self.settings(DISPONIBILIDADE_INDICE_MEMORIA=memoria):
+                self.assertFalse(onix_livre(30, 31))
+                self.assertTrue(onix_livre(48, 60))
+                self.assertTrue(onix_livre(30, 31, ignorar_aluguel=aluguel.pk))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            aluguel.status = 'cancelado'
+            aluguel.save()
+        self.assertEqual(livres(30, 31), {onix, gol})
+        for memoria in (False, True):
+            with self.subTest(memoria=memoria), self.settings(DISPONIBILIDADE_INDICE_MEMORIA=memoria):
+                self.assertTrue(onix_livre(30, 31))
+
+    @override_settings(ALLOWED_HOSTS=['testserver'])
+    def test_periodo_invalido_na_listagem(self):
+        usuario = Usuario.objects.create(username='cliente', email='cliente@teste.com')
+        sessao = self.client.session
+        sessao['user_id'] = usuario.pk
+        sessao['is_staff'] = False
+        sessao.save()
+        Carro.objects.create(modelo='Onix', placa='ABC-1234', ano=2024)
+        resposta = self.client.get('/carros/', {
+            'data_inicio': '2026-13-01T00:00', 'data_fim': '2026-13-05T00:00',
+        })
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(len(resposta.context['carros']), 1)
+
+
+class VarreduraVencimentosTest(TestCase):
+    """A varredura expira pagamentos vencidos e finaliza aluguéis encerrados"""
+
+    def setUp(self):
+        cache.clear()
+        self.agora = timezone.now()
+        self.funcionario = Usuario.objects.create(username='funcionario', is_staff=True)
+        cliente = Usuario.objects.create(username='cliente', email='cliente@teste.com')
+        self.perfil = PerfilCliente.objects.create(
+            usuario=cliente, CNH='CNH1', telefone='11999999999', endereco='Rua A'
+        )
+
+    def alugar(self, placa, inicio, fim, vencimento, status_pagamento='pendente'):
+        carro = Carro.objects.create(modelo='Onix', placa=placa, ano=2024)
+        aluguel = Aluguel.objects.create(
+            perfil_cliente=self.perfil, carro=carro, funcionario=self.funcionario,
+            data_inicio=self.agora + inicio, data_fim=self.agora + fim, valor=300,
+        )
+        Pagamento.objects.create(
+            aluguel=aluguel, valor=300, status=status_pagamento,
+            data_vencimento=self.agora + vencimento,
+        )
+        return aluguel
+
+    def test_varredura(self):
+        expirado = self.alugar('AAA-0001', timedelta(days=2), timedelta(days=5), timedelta(hours=-1))
+        encerrado = self.alugar('AAA-0002', timedelta(days=-5), timedelta(hours=-1), timedelta(days=-8),
+                                status_pagamento='aprovado')
+        em_dia = self.alugar('AAA-0003', timedelta(days=1), timedelta(days=4), timedelta(days=1))
+
+        resultado = varrer(self.agora, tamanho_lote=1)
+
+        self.assertEqual(resultado, {
+            'pagamentos_expirados': 1, 'alugueis_finalizados': 1, 'carros_atualizados': 2,
+        })
+        for aluguel, status, status_pagamento, status_carro in (
+            (expirado, 'cancelado', 'cancelado', 'disponivel'),
+            (encerrado, 'finalizado', 'aprovado', 'disponivel'),
+            (em_dia, 'ativo', 'pendente', 'alugado'),
+        ):
+            aluguel.refresh_from_db()
+            self.assertEqual(aluguel.status, status)
+            self.assertEqual(aluguel.pagamento.status, status_pagamento)
+            self.assertEqual(aluguel.carro.status, status_carro)
+        self.assertEqual(EmailPendente.objects.count(), 2)
+
+        # Nada mais vencido: a próxima passagem não altera nada
+        self.assertEqual(varrer(self.agora)['alugueis_finalizados'], 0)
+
+
+class OcupacaoCarroTest(TestCase):
+    """Contador de aluguéis ativos e status do carro acompanham os aluguéis"""
+
+    def setUp(self):
+        cache.clear()
+        self.funcionario = Usuario.objects.create(username='funcionario', is_staff=True)
+        cliente = Usuario.objects.create(username='cliente', email='cliente@teste.com')
+        self.perfil = PerfilCliente.objects.create(
+            usuario=cliente, CNH='CNH1', telefone='11999999999', endereco='Rua A'
+        )
+        self.carro = Carro.objects.create(modelo='Onix', placa='ABC-1234', ano=2024)
+
+    def alugar(self, dias):
+        inicio = timezone.now() + timedelta(days=dias)
+        return Aluguel.objects.create(
+            perfil_cliente=self.perfil, carro=self.carro, funcionario=self.funcionario,
+            data_inicio=inicio, data_fim=inicio + timedelta(days=2), valor=300,
+        )
+
+    def assertOcupacao(self, contador, status):
+        self.carro.refresh_from_db()
+        self.assertEqual((self.carro.alugueis_ativos, self.carro.status), (contador, status))
+
+    def test_contador_acompanha_status(self):
+        primeiro = self.alugar(1)
+        segundo = self.alugar(10)
+        self.assertOcupacao(2, 'alugado')
+
+        primeiro = Aluguel.objects.get(pk=primeiro.pk)
+        primeiro.status = 'finalizado'
+        # UPDATE do aluguel + UPDATE do contador, sem ler nem regravar o carro
+        with self.assertNumQueries(2):
+            primeiro.save(update_fields=['status', 'atualizado_em'])
+        self.assertOcupacao(1, 'alugado')
+
+        # Salvar de novo sem mudar o status não mexe no carro
+        with self.assertNumQueries(1):
+            primeiro.save(update_fields=['status', 'atualizado_em'])
+
+        segundo.status = 'cancelado'
+        segundo.save()
+        self.assertOcupacao(0, 'disponivel')
+
+        terceiro = self.alugar(20)
+        terceiro.delete()
+        self.assertOcupacao(0, 'disponivel')
+
+    def test_reconciliacao(self):
+        self.alugar(1)
+        Carro.objects.filter(pk=self.carro.pk).update(status='disponivel', alugueis_ativos=0)
+        outro = Carro.objects.create(modelo='Gol', placa='XYZ-9876', ano=2020, status='alugado')
+
+        self.assertEqual(ocupacao.recalcular(), 2)
+        self.assertOcupacao(1, 'alugado')
+        outro.refresh_from_db()
+        self.assertEqual((outro.alugueis_ativos, outro.status), (0, 'disponivel'))
+        self.assertEqual(ocupacao.recalcular(), 0)
+
+
+class PrecificacaoTest(TestCase):
+    """Diárias parciais, fim de semana/temporada e desconto por duração"""
+
+    def data(self, dia, hora=10, mes=3):
+        # Março de 2026: dia 2 é segunda-feira
+        return timezone.make_aware(datetime(2026, mes, dia, hora))
+
+    def test_diarias_parciais(self):
+        inicio = self.data(2)
+        self.assertEqual(precificacao.cotar(100, inicio, self.data(2, 12)), Decimal('100.00'))
+        self.assertEqual(precificacao.cotar(100, inicio, self.data(3, 11)), Decimal('100.00'))
+        self.assertEqual(precificacao.cotar(100, inicio, self.data(3, 14)), Decimal('150.00'))
+        self.assertEqual(precificacao.cotar(100, inicio, self.data(3, 20)), Decimal('200.00'))
+        with self.assertRaises(ValueError):
+            precificacao.cotar(100, inicio, inicio)
+
+    def test_periodo_maximo(self):
+        inicio = self.data(2)
+        limite = inicio + timedelta(days=precificacao.DIAS_MAXIMOS)
+        self.assertEqual(precificacao.fator_periodo(inicio, limite)['diarias'], precificacao.DIAS_MAXIMOS)
+        with self.assertRaises(ValueError):
+            precificacao.cotar(100, inicio, limite + timedelta(hours=1))
+
+    def test_fim_de_semana_temporada_e_desconto(self):
+        # Sexta a segunda: sexta + sábado e domingo com acréscimo; em julho, mais temporada
+        self.assertEqual(precificacao.cotar(100, self.data(6), self.data(9)), Decimal('340.00'))
+        self.assertEqual(
+            precificacao.cotar(100, self.data(3, mes=7), self.data(6, mes=7)), Decimal('391.00')
+        )
+        # Uma semana (segunda a segunda): 5 dias úteis + fim de semana, 10% de desconto
+        self.assertEqual(precificacao.cotar(100, self.data(2), self.data(9)), Decimal('666.00'))
+
+    def test_lote_igual_ao_individual(self):
+        inicio, fim = self.data(6), self.data(16, 15)
+        valores = precificacao.cotar_periodo([(1, Decimal('89.90')), (2, 150), (3, Decimal('89.90'))], inicio, fim)
+        self.assertEqual(valores, {
+            chave: precificacao.cotar(preco, inicio, fim)
+            for chave, preco in [(1, Decimal('89.90')), (2, 150), (3, Decimal('89.90'))]
+        })
+
+    @override_settings(ALLOWED_HOSTS=['testserver'])
+    def test_estimativa_do_formulario_igual_ao_valor_gravado(self):
+        usuario = Usuario.objects.create(username='cliente', email='cliente@teste.com')
+        sessao = self.client.session
+        sessao['user_id'] = usuario.pk
+        sessao['is_staff'] = False
+        sessao.save()
+        carro = Carro.objects.create(modelo='Onix', placa='ABC-1234', ano=2024, preco_diaria=Decimal('89.90'))
+
+        inicio, fim = self.data(3), self.data(13, 5)
+        resposta = self.client.get('/solicitar-aluguel/cotacao/', {
+            'carro': carro.pk,
+            'data_inicio': timezone.localtime(inicio).strftime('%Y-%m-%dT%H:%M'),
+            'data_fim': timezone.localtime(fim).strftime('%Y-%m-%dT%H:%M'),
+        })
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(Decimal(resposta.json()['valor']), precificacao.cotar(carro.preco_diaria, inicio, fim))
+        self.assertEqual(resposta.json()['diarias'], '10')
+
+        invalida = self.client.get('/solicitar-aluguel/cotacao/', {'carro': 'x', 'data_inicio': 'ontem'})
+        self.assertEqual(invalida.status_code, 400)
+        longa = self.client.get('/solicitar-aluguel/cotacao/', {
+            'carro': carro.pk, 'data_inicio': '2026-03-03T10:00', 'data_fim': '2126-03-03T10:00',
+        })
+        self.assertEqual(longa.status_code, 400)
+
+
+class IndicesCriadosTest(TestCase):
+    """As migrações criam os índices compostos e parciais em qualquer banco"""
+
+    INDICES = {
+        'carro': {'carro_criado_idx', 'carro_status_criado_idx'},
+        'aluguel': {'aluguel_criado_idx', 'aluguel_status_criado_idx', 'aluguel_cliente_criado_idx',
+                    'aluguel_funcionario_criado_idx', 'aluguel_ativo_periodo_idx'},
+        'pagamento': {'pagamento_status_criado_idx', 'pagamento_aprovado_data_idx'},
+        'solicitacao_aluguel': {'solicitacao_status_criado_idx', 'solicitacao_cliente_criado_idx'},
+    }
+
+    def test_indices(self):
+        with connection.cursor() as cursor:
+            for tabela, nomes in self.INDICES.items():
+                with self.subTest(tabela=tabela):
+                    existentes = connection.introspection.get_constraints(cursor, tabela)
+                    self.assertLessEqual(nomes, set(existentes))
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+@skipUnless(connection.vendor == 'sqlite', 'lê o EXPLAIN QUERY PLAN do SQLite')
+class IndicesConsultasTest(TestCase):
+    """As consultas das telas mais acessadas usam índices (EXPLAIN QUERY PLAN do SQLite)"""
+
+    TABELAS = ('carro', 'aluguel', 'solicitacao_aluguel', 'pagamento')
+
+    def setUp(self):
+        cache.clear()
+        self.funcionario = Usuario.objects.create(username='funcionario', is_staff=True)
+        self.cliente = Usuario.objects.create(username='cliente', email='cliente@teste.com')
+        perfil = PerfilCliente.objects.create(
+            usuario=self.cliente, CNH='CNH1', telefone='11999999999', endereco='Rua A'
+        )
+        carro = Carro.objects.create(modelo='Onix', placa='ABC-1234', ano=2024)
+        inicio = timezone.now() + timedelta(days=1)
+        aluguel = Aluguel.objects.create(
+            perfil_cliente=perfil, carro=carro, funcionario=self.funcionario,
+            data_inicio=inicio, data_fim=inicio + timedelta(days=2), valor=300,
+        )
+        Pagamento.objects.create(aluguel=aluguel, valor=300, data_vencimento=inicio)
+        SolicitacaoAluguel.objects.create(
+            perfil_cliente=perfil, carro=carro, data_inicio=inicio,
+            data_fim=inicio + timedelta(days=2), valor_estimado=300,
+        )
+
+    def entrar(self, usuario):
+        sessao = self.client.session
+        sessao['user_id'] = usuario.pk
+        sessao['is_staff'] = usuario.is_staff
+        sessao.save()
+
+    def varreduras(self, url):
+        """Passos do plano que percorrem uma tabela inteira ou ordenam fora de um índice"""
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        problemas = []
+        with connection.cursor() as cursor:
+            for consulta in consultas:
+                sql = consulta['sql']
+                tabela = re.search(r' FROM "(\w+)"', sql)
+                # Só consultas às tabelas grandes com filtro ou ordenação
+                # (contagens totais, mesmo com FILTER, percorrem tudo por natureza)
+                clausulas = re.sub(r'FILTER \(WHERE [^)]*\)', '', sql)
+                if (not sql.startswith('SELECT') or not tabela or tabela[1] not in self.TABELAS
+                        or ('WHERE' not in clausulas and 'ORDER BY' not in clausulas)):
+                    continue
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                for *_, passo in cursor.fetchall():
+                    tabela = passo.split()[1] if passo.startswith('SCAN ') else None
+                    if tabela in self.TABELAS and 'USING' not in passo or 'TEMP B-TREE' in passo:
+                        problemas.append((passo, sql))
+        return problemas
+
+    def test_telas_do_funcionario(self):
+        self.entrar(self.funcionario)
+        for url in ('/alugueis/', '/alugueis/?status=ativo', '/solicitacoes-pendentes/',
+                    '/pagamentos-pendentes/', '/carros/', '/carros/?status=disponivel'):
+            with self.subTest(url=url):
+                self.assertEqual(self.varreduras(url), [])
+
+    def test_telas_do_cliente(self):
+        self.entrar(self.cliente)
+        for url in ('/dashboard/cliente/', '/minhas-solicitacoes/'):
+            with self.subTest(url=url):
+                self.assertEqual(self.varreduras(url), [])
+
+    def test_conflito_de_periodo_usa_indice_parcial(self):
+        inicio = timezone.now()
+        consulta = Aluguel.objects.filter(
+            carro_id=1, status='ativo', data_inicio__lt=inicio + timedelta(days=3), data_fim__gt=inicio
+        )
+        self.assertIn('aluguel_ativo_periodo_idx', consulta.explain())
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class ExportacaoTest(TestCase):
+    """Exportação em streaming, filtrada pelo dia local de início"""
+
+    def setUp(self):
+        self.funcionario = Usuario.objects.create(username='funcionario', is_staff=True)
+        cliente = Usuario.objects.create(username='cliente', email='cliente@teste.com')
+        perfil = PerfilCliente.objects.create(
+            usuario=cliente, CNH='CNH1', telefone='11999999999', endereco='Rua A'
+        )
+        carro = Carro.objects.create(modelo='Onix', placa='ABC-1234', ano=2024)
+        self.ids = {}
+        # 23:30 do dia 10 em São Paulo já é dia 11 em UTC
+        for nome, momento in (('antes', datetime(2025, 3, 9, 12)), ('noite', datetime(2025, 3, 10, 23, 30)),
+                              ('madrugada', datetime(2025, 3, 11, 0, 10))):
+            inicio = timezone.make_aware(momento)
+            self.ids[nome] = Aluguel.objects.create(
+                perfil_cliente=perfil, carro=carro, funcionario=self.funcionario,
+                data_inicio=inicio, data_fim=inicio + timedelta(hours=5), valor=300,
+            ).pk
+
+    def esperados(self, *nomes):
+        return sorted(self.ids[nome] for nome in nomes)
+
+    def test_view_csv_e_ndjson(self):
+        sessao = self.client.session
+        sessao['user_id'] = self.funcionario.pk
+        sessao['is_staff'] = True
+        sessao.save()
+
+        resposta = self.client.get('/alugueis/exportar/', {'data_inicio': '2025-03-10', 'data_fim': '2025-03-10'})
+        self.assertEqual(resposta.status_code, 200)
+        self.assertTrue(resposta.streaming)
+        self.assertIn('alugueis.csv', resposta['Content-Disposition'])
+        linhas = list(csv.DictReader(io.StringIO(b''.join(resposta.streaming_content).decode())))
+        self.assertEqual([int(linha['id_aluguel']) for linha in linhas], self.esperados('noite'))
+
+        resposta = self.client.get('/alugueis/exportar/', {'formato': 'ndjson', 'data_inicio': '2025-03-10'})
+        linhas = [json.loads(linha) for linha in b''.join(resposta.streaming_content).decode().splitlines()]
+        self.assertEqual([linha['id_aluguel'] for linha in linhas], self.esperados('noite', 'madrugada'))
+
+        resposta = self.client.get('/alugueis/exportar/', {'data_inicio': '10/03/2025'})
+        self.assertRedirects(resposta, '/alugueis/', fetch_redirect_response=False)
+
+    def test_comando(self):
+        with tempfile.TemporaryDirectory() as pasta:
+            caminho = os.path.join(pasta, 'alugueis.ndjson')
+            erros = io.StringIO()
+            call_command('export_alugueis', formato='ndjson', fim='2025-03-10', saida=caminho, stderr=erros)
+            with open(caminho, encoding='utf-8') as arquivo:
+                ids = [json.loads(linha)['id_aluguel'] for linha in arquivo]
+        self.assertEqual(ids, self.esperados('antes', 'noite'))
+        self.assertIn('2 aluguel(is)', erros.getvalue())
+
+        with self.assertRaises(CommandError):
+            call_command('export_alugueis', inicio='2025-13-01', stderr=io.StringIO())
+
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'], INSTRUMENTACAO_LIMITE_LENTO_MS=10**6,
+                   INSTRUMENTACAO_LIMITE_CONSULTAS=3)
+class InstrumentacaoTest(TestCase):
+    """Server-Timing e log de requisição lenta, inclusive no corpo em streaming"""
+
+    def setUp(self):
+        cache.clear()
+        funcionario = Usuario.objects.create(username='funcionario', is_staff=True)
+        sessao = self.client.session
+        sessao['user_id'] = funcionario.pk
+        sessao['is_staff'] = True
+        sessao.save()
+
+    def test_server_timing_e_log(self):
+        with self.assertLogs('LouerCar.instrumentacao', 'WARNING') as logs:
+            resposta = self.client.get('/alugueis/')
+        self.assertEqual(resposta.status_code, 200)
+        self.assertRegex(resposta['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ consultas", tpl;dur=[\d.]+, total;dur=')
+        registro = json.loads(logs.records[0].getMessage())
+        self.assertEqual((registro['evento'], registro['caminho']), ('requisicao_lenta', '/alugueis/'))
+        self.assertGreater(registro['consultas'], 3)
+        self.assertGreater(registro['template_ms'], 0)
+
+    def test_consultas_do_corpo_em_streaming(self):
+        # Até os cabeçalhos só há as consultas da sessão e do usuário
+        with self.assertNoLogs('LouerCar.instrumentacao', 'WARNING'):
+            resposta = self.client.get('/alugueis/exportar/')
+        self.assertIn('Server-Timing', resposta)
+
+        with self.assertLogs('LouerCar.instrumentacao', 'WARNING') as logs:
+            b''.join(resposta.streaming_content)
+        registro = json.loads(logs.records[0].getMessage())
+        self.assertEqual(registro['caminho'], '/alugueis/exportar/')
+        self.assertTrue(any('FROM "aluguel"' in consulta['sql'] for consulta in registro['piores_sql']))
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class EstatisticasAlugueisTest(TestCase):
+    """Contagens e totais de aluguéis e solicitações em uma consulta cada, em cache"""
+
+    def setUp(self):
+        cache.clear()
+        self.funcionario = Usuario.objects.create(username='funcionario', is_staff=True)
+        cliente = Usuario.objects.create(username='cliente', email='cliente@teste.com')
+        self.perfil = PerfilCliente.objects.create(
+            usuario=cliente, CNH='CNH1', telefone='11999999999', endereco='Rua A'
+        )
+        self.carro = Carro.objects.create(modelo='Onix', placa='ABC-1234', ano=2024)
+        inicio = timezone.now()
+        self.alugueis = [
+            Aluguel.objects.create(
+                perfil_cliente=self.perfil, carro=self.carro, funcionario=self.funcionario,
+                data_inicio=inicio + timedelta(days=10 * n), data_fim=inicio + timedelta(days=10 * n + 2),
+                valor=valor, status=status,
+            )
+            for n, (valor, status) in enumerate([(300, 'ativo'), (200, 'ativo'), (100, 'finalizado')])
+        ]
+        SolicitacaoAluguel.objects.create(
+            perfil_cliente=self.perfil, carro=self.carro, data_inicio=inicio,
+            data_fim=inicio + timedelta(days=2), valor_estimado=300,
+        )
+
+    def test_cache_e_invalidacao(self):
+        with self.assertNumQueries(1):
+            estatisticas = estatisticas_alugueis()
+        self.assertEqual(
+            (estatisticas['total'], estatisticas['ativos'], estatisticas['finalizados'], estatisticas['cancelados']),
+            (3, 2, 1, 0),
+        )
+        self.assertEqual(estatisticas['valor_total_ativos'], 500)
+        self.assertEqual(estatisticas['valor_recebido'], 0)
+        with self.assertNumQueries(0):
+            estatisticas_alugueis()
+
+        # Pagamento aprovado muda o valor recebido
+        Pagamento.objects.create(aluguel=self.alugueis[2], valor=100, status='aprovado',
+                                 data_vencimento=timezone.now())
+        self.assertEqual(estatisticas_alugueis()['valor_recebido'], 100)
+
+        aluguel = self.alugueis[1]
+        aluguel.status = 'cancelado'
+        aluguel.save()
+        estatisticas = estatisticas_alugueis()
+        self.assertEqual((estatisticas['ativos'], estatisticas['cancelados']), (1, 1))
+        self.assertEqual(estatisticas['valor_total_ativos'], 300)
+
+        self.assertEqual(estatisticas_solicitacoes(), {'pendentes': 1, 'aprovadas': 0, 'rejeitadas': 0})
+        solicitacao = SolicitacaoAluguel.objects.get()
+        solicitacao.status = 'rejeitado'
+        solicitacao.save()
+        self.assertEqual(estatisticas_solicitacoes(), {'pendentes': 0, 'aprovadas': 0, 'rejeitadas': 1})
+
+    def test_dashboard_le_do_cache(self):
+        sessao = self.client.session
+        sessao['user_id'] = self.funcionario.pk
+        sessao['is_staff'] = True
+        sessao.save()
+
+        self.client.get('/dashboard/funcionario/')
+        with CaptureQueriesContext(connection) as consultas:
+            resposta = self.client.get('/dashboard/funcionario/')
+        self.assertEqual(resposta.context['total_carros'], 1)
+        self.assertEqual(resposta.context['alugueis_ativos'], 2)
+        sql = [consulta['sql'] for consulta in consultas.captured_queries]
+        self.assertFalse([consulta for consulta in sql if 'FROM "carro"' in consulta or 'FROM "aluguel"' in consulta])
@@ -7,6 +7,7 @@ urlpatterns = [
     # ============================================
     path('solicitar-aluguel/', views.solicitar_aluguel, name='solicitar_aluguel'),
     path('solicitar-aluguel/<int:carro_id>/', views.solicitar_aluguel, name='solicitar_aluguel_carro'),
+    path('solicitar-aluguel/cotacao/', views.cotar_solicitacao, name='cotar_solicitacao'),
     path('minhas-solicitacoes/', views.minhas_solicitacoes, name='minhas_solicitacoes'),
     path('cancelar-solicitacao/<int:pk>/', views.cancelar_solicitacao, name='cancelar_solicitacao'),
     
@@ -28,6 +29,7 @@ urlpatterns = [
     # URLs ORIGINAIS DE ALUGUEL (Funcionários)
     # ============================================
     path('alugueis/', views.aluguel_list, name='aluguel_list'),
+    path('alugueis/exportar/', views.exportar_alugueis, name='exportar_alugueis'),
     path('alugueis/criar/', views.aluguel_create, name='aluguel_create'),
     path('alugueis/<int:pk>/', views.aluguel_detail, name='aluguel_detail'),
     path('alugueis/<int:pk>/editar/', views.aluguel_update, name='aluguel_update'),
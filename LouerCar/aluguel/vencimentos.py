@@ -0,0 +1,170 @@
+"""
+Varredura de vencimentos: expira pagamentos pendentes vencidos e finaliza
+os aluguéis ativos cujo período já terminou.
+
+Cada passagem só lê as linhas vencidas, pelos índices (status,
+data_vencimento) e (status, data_fim), em lotes de chaves. As transições
+são feitas com update() por lote, a ocupação dos carros afetados é
+recalculada em conjunto (aluguel/ocupacao.py) e os emails vão para a
+caixa de saída (EmailPendente) na mesma transação.
+update() e bulk_create não disparam signals: os caches são invalidados
+aqui, uma vez por passagem.
+"""
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from LouerCar.versoes import incrementar_apos_commit
+from relatorios import resumos
+
+from . import ocupacao
+from .disponibilidade import invalidar_indice
+from .estatisticas import invalidar_estatisticas_alugueis
+from .models import Aluguel, EmailPendente, Pagamento
+
+TAMANHO_LOTE = 500
+
+
+def travar_livres(queryset):
+    """Trava as linhas do lote; outro varredor (ou processar_emails) pula as já travadas"""
+    if connection.features.has_select_for_update_skip_locked:
+        return queryset.select_for_update(skip_locked=True)
+    # SQLite: a transação IMMEDIATE já serializa as escritas
+    return queryset
+
+
+def _emails(linhas, assunto, mensagem):
+    """Monta os EmailPendente de (id_aluguel, email, username, modelo, placa)"""
+    return [
+        EmailPendente(
+            destinatario=email,
+            assunto=assunto.format(id_aluguel=id_aluguel),
+            mensagem=mensagem.format(
+                id_aluguel=id_aluguel, username=username, modelo=modelo, placa=placa,
+                site_url=settings.SITE_URL,
+            ),
+        )
+        for id_aluguel, email, username, modelo, placa in linhas
+        if email
+    ]
+
+
+ASSUNTO_PAGAMENTO_EXPIRADO = '⚠️ Pagamento expirado - Aluguel #{id_aluguel}'
+MENSAGEM_PAGAMENTO_EXPIRADO = """
+        Olá {username}!
+
+        O prazo para pagamento do Aluguel #{id_aluguel} terminou e a reserva foi cancelada.
+
+        - Carro: {modelo} ({placa})
+
+        Se ainda quiser alugar, faça uma nova solicitação:
+        {site_url}/carros/
+
+        Atenciosamente,
+        Equipe LouerCar
+        """
+
+ASSUNTO_ALUGUEL_FINALIZADO = '🏁 Aluguel finalizado - Aluguel #{id_aluguel}'
+MENSAGEM_ALUGUEL_FINALIZADO = """
+        Olá {username}!
+
+        O período do Aluguel #{id_aluguel} terminou e ele foi finalizado.
+
+        - Carro: {modelo} ({placa})
+
+        Obrigado por alugar com a LouerCar!
+
+        Atenciosamente,
+        Equipe LouerCar
+        """
+
+_CAMPOS_EMAIL = (
+    'id_aluguel', 'perfil_cliente__usuario__email', 'perfil_cliente__usuario__username',
+    'carro__modelo', 'carro__placa',
+)
+
+
+def expirar_pagamentos(agora=None, tamanho_lote=TAMANHO_LOTE):
+    """
+    Cancela um lote de pagamentos pendentes vencidos e os aluguéis ativos
+    ligados a eles. Retorna (pagamentos expirados, carros atualizados).
+    """
+    agora = agora or timezone.now()
+    with transaction.atomic():
+        vencidos = travar_livres(
+            Pagamento.objects.filter(status='pendente', data_vencimento__lt=agora)
+            .order_by('data_vencimento')
+        )
+        linhas = list(vencidos.values_list('pk', 'aluguel_id')[:tamanho_lote])
+        if not linhas:
+            return 0, 0
+        pagamento_ids = [pk for pk, _ in linhas]
+        # Hora da gravação (e não a da varredura): o feed de sincronização
+        # não pode receber um atualizado_em mais antigo que o commit
+        gravado_em = timezone.now()
+        aluguel_ids = [aluguel_id for _, aluguel_id in linhas]
+
+        expirados = Pagamento.objects.filter(pk__in=pagamento_ids, status='pendente').update(
+            status='cancelado', atualizado_em=gravado_em
+        )
+        cancelados = Aluguel.objects.filter(pk__in=aluguel_ids, status='ativo')
+        dados = list(cancelados.values_list('carro_id', *_CAMPOS_EMAIL))
+        # Aluguel cancelado sai da receita e da utilização
+        resumos.marcar_alugueis(cancelados)
+        cancelados.update(status='cancelado', atualizado_em=gravado_em)
+
+        atualizados = ocupacao.recalcular({linha[0] for linha in dados})
+        EmailPendente.objects.bulk_create(_emails(
+            [linha[1:] for linha in dados], ASSUNTO_PAGAMENTO_EXPIRADO, MENSAGEM_PAGAMENTO_EXPIRADO
+        ))
+    return expirados, atualizados
+
+
+def finalizar_alugueis(agora=None, tamanho_lote=TAMANHO_LOTE):
+    """
+    Finaliza um lote de aluguéis ativos com data_fim no passado.
+    Retorna (aluguéis finalizados, carros atualizados).
+    """
+    agora = agora or timezone.now()
+    with transaction.atomic():
+        vencidos = travar_livres(
+            Aluguel.objects.filter(status='ativo', data_fim__lt=agora).order_by('data_fim')
+        )
+        aluguel_ids = list(vencidos.values_list('pk', flat=True)[:tamanho_lote])
+        if not aluguel_ids:
+            return 0, 0
+
+        gravado_em = timezone.now()
+        finalizados = Aluguel.objects.filter(pk__in=aluguel_ids, status='ativo')
+        dados = list(finalizados.values_list('carro_id', *_CAMPOS_EMAIL))
+        total = finalizados.update(status='finalizado', atualizado_em=gravado_em)
+
+        atualizados = ocupacao.recalcular({linha[0] for linha in dados})
+        EmailPendente.objects.bulk_create(_emails(
+            [linha[1:] for linha in dados], ASSUNTO_ALUGUEL_FINALIZADO, MENSAGEM_ALUGUEL_FINALIZADO
+        ))
+    return total, atualizados
+
+
+def varrer(agora=None, tamanho_lote=TAMANHO_LOTE):
+    """
+    Uma passagem completa, lote a lote, até não restar nada vencido.
+    Retorna {'pagamentos_expirados': n, 'alugueis_finalizados': n, 'carros_atualizados': n}.
+    """
+    agora = agora or timezone.now()
+    resultado = {'pagamentos_expirados': 0, 'alugueis_finalizados': 0, 'carros_atualizados': 0}
+
+    for chave, etapa in (('pagamentos_expirados', expirar_pagamentos),
+                         ('alugueis_finalizados', finalizar_alugueis)):
+        while True:
+            total, atualizados = etapa(agora, tamanho_lote)
+            resultado[chave] += total
+            resultado['carros_atualizados'] += atualizados
+            if total < tamanho_lote:
+                break
+
+    if resultado['pagamentos_expirados'] or resultado['alugueis_finalizados']:
+        invalidar_estatisticas_alugueis()
+        invalidar_indice()
+        incrementar_apos_commit('aluguel')
+    return resultado
@@ -1,8 +1,16 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
+from django.db import transaction
 from django.db.models import Q, Sum, Count
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.dateparse import parse_date, parse_datetime
 from .models import Aluguel, SolicitacaoAluguel
 from .forms import AluguelForm, SolicitacaoAluguelForm
+from .estatisticas import estatisticas_alugueis, estatisticas_solicitacoes
+from .aprovacao import ConflitoAprovacao, aprovar_solicitacao as aprovar
+from .exportacao import FORMATOS, filtrar_alugueis, gerar
+from .precificacao import aplicar, cotar, fator_periodo
+from busca.indice import buscar_alugueis
 from carro.models import Carro
 from user.models import PerfilCliente, Usuario
 from user.decorators import staff_required, cliente_required
@@ -421,13 +429,9 @@ from user.decorators import staff_required, cliente_required
 @cliente_required
 def solicitar_aluguel(request, carro_id=None):
     """Cliente solicita aluguel - PRECISA TER PERFIL COMPLETO"""
-    user_id = request.session.get('user_id')
-    usuario = get_object_or_404(Usuario, id_usuario=user_id)
-    
     # Verificar se tem perfil completo
-    try:
-        perfil = PerfilCliente.objects.get(usuario=usuario)
-    except PerfilCliente.DoesNotExist:
+    perfil = request.perfil
+    if not perfil:
         messages.warning(
             request, 
             'Você precisa completar seu perfil antes de solicitar um aluguel!'
@@ -438,8 +442,8 @@ def solicitar_aluguel(request, carro_id=None):
     carro = None
     if carro_id:
         carro = get_object_or_404(Carro, id_carro=carro_id)
-        if carro.status != 'disponivel':
-            messages.error(request, f'O carro {carro.modelo} não está disponível!')
+        if carro.status == 'manutencao':
+            messages.error(request, f'O carro {carro.modelo} está em manutenção!')
             return redirect('carro_list')
     
     if request.method == 'POST':
@@ -449,8 +453,9 @@ def solicitar_aluguel(request, carro_id=None):
             solicitacao.perfil_cliente = perfil
             
             # Calcular valor estimado
-            dias = solicitacao.calcular_dias()
-            solicitacao.valor_estimado = solicitacao.carro.preco_diaria * dias
+            solicitacao.valor_estimado = cotar(
+                solicitacao.carro.preco_diaria, solicitacao.data_inicio, solicitacao.data_fim
+            )
             
             solicitacao.save()
             
@@ -475,15 +480,12 @@ def solicitar_aluguel(request, carro_id=None):
 @cliente_required
 def minhas_solicitacoes(request):
     """Cliente vê suas solicitações"""
-    user_id = request.session.get('user_id')
-    usuario = get_object_or_404(Usuario, id_usuario=user_id)
-    
-    try:
-        perfil = PerfilCliente.objects.get(usuario=usuario)
+    perfil = request.perfil
+    if perfil:
         solicitacoes = SolicitacaoAluguel.objects.filter(
             perfil_cliente=perfil
         ).select_related('carro').order_by('-criado_em')
-    except PerfilCliente.DoesNotExist:
+    else:
         solicitacoes = []
     
     context = {
@@ -496,34 +498,30 @@ def minhas_solicitacoes(request):
 @cliente_required
 def cancelar_solicitacao(request, pk):
     """Cliente cancela sua solicitação"""
-    user_id = request.session.get('user_id')
-    usuario = get_object_or_404(Usuario, id_usuario=user_id)
-    
-    try:
-        perfil = PerfilCliente.objects.get(usuario=usuario)
-        solicitacao = get_object_or_404(
-            SolicitacaoAluguel, 
-            pk=pk, 
-            perfil_cliente=perfil
-        )
-        
-        if solicitacao.status == 'pendente':
-            if request.method == 'POST':
-                solicitacao.status = 'cancelado'
-                solicitacao.save()
-                messages.info(request, 'Solicitação cancelada com sucesso!')
-                return redirect('minhas_solicitacoes')
-            
-            return render(request, 'aluguel/cancelar_solicitacao.html', {
-                'solicitacao': solicitacao
-            })
-        else:
-            messages.error(request, 'Não é possível cancelar esta solicitação!')
-            return redirect('minhas_solicitacoes')
-            
-    except PerfilCliente.DoesNotExist:
+    perfil = request.perfil
+    if not perfil:
         messages.error(request, 'Perfil não encontrado!')
         return redirect('dashboard_cliente')
+    
+    solicitacao = get_object_or_404(
+        SolicitacaoAluguel, 
+        pk=pk, 
+        perfil_cliente=perfil
+    )
+    
+    if solicitacao.status == 'pendente':
+        if request.method == 'POST':
+            solicitacao.status = 'cancelado'
+            solicitacao.save()
+            messages.info(request, 'Solicitação cancelada com sucesso!')
+            return redirect('minhas_solicitacoes')
+        
+        return render(request, 'aluguel/cancelar_solicitacao.html', {
+            'solicitacao': solicitacao
+        })
+    else:
+        messages.error(request, 'Não é possível cancelar esta solicitação!')
+        return redirect('minhas_solicitacoes')
 
 
 # ============================================
@@ -537,16 +535,14 @@ def solicitacoes_pendentes(request):
         status='pendente'
     ).select_related('perfil_cliente', 'carro', 'perfil_cliente__usuario').order_by('-criado_em')
     
-    # Estatísticas
-    total_pendentes = solicitacoes.count()
-    total_aprovadas = SolicitacaoAluguel.objects.filter(status='aprovado').count()
-    total_rejeitadas = SolicitacaoAluguel.objects.filter(status='rejeitado').count()
+    # Estatísticas (uma consulta, com cache)
+    estatisticas = estatisticas_solicitacoes()
     
     context = {
         'solicitacoes': solicitacoes,
-        'total_pendentes': total_pendentes,
-        'total_aprovadas': total_aprovadas,
-        'total_rejeitadas': total_rejeitadas,
+        'total_pendentes': estatisticas['pendentes'],
+        'total_aprovadas': estatisticas['aprovadas'],
+        'total_rejeitadas': estatisticas['rejeitadas'],
     }
     
     return render(request, 'aluguel/solicitacoes_pendentes.html', context)
@@ -563,8 +559,7 @@ def aprovar_solicitacao(request, pk):
     
     if request.method == 'POST':
         # Criar o aluguel oficial
-        user_id = request.session.get('user_id')
-        funcionario = get_object_or_404(Usuario, id_usuario=user_id)
+        funcionario = request.user_obj
         
         aluguel = Aluguel.objects.create(
             perfil_cliente=solicitacao.perfil_cliente,
@@ -623,41 +618,38 @@ def rejeitar_solicitacao(request, pk):
 @staff_required
 def aluguel_list(request):
     """Lista todos os aluguéis com filtros"""
-    alugueis = Aluguel.objects.all().select_related('carro', 'perfil_cliente', 'funcionario')
+    alugueis = Aluguel.objects.all().select_related('carro', 'perfil_cliente__usuario', 'funcionario')
     
     # Filtro de busca
     query = request.GET.get('q')
     if query:
-        alugueis = alugueis.filter(
-            Q(carro__modelo__icontains=query) |
-            Q(carro__placa__icontains=query) |
-            Q(perfil_cliente__usuario__username__icontains=query) |
-            Q(perfil_cliente__CNH__icontains=query)
-        )
+        encontrados = buscar_alugueis(alugueis, query)
+        if encontrados is not None:
+            alugueis = encontrados
+        else:
+            alugueis = alugueis.filter(
+                Q(carro__modelo__icontains=query) |
+                Q(carro__placa__icontains=query) |
+                Q(perfil_cliente__usuario__username__icontains=query) |
+                Q(perfil_cliente__CNH__icontains=query)
+            )
     
     # Filtro por status
     status_filter = request.GET.get('status')
     if status_filter:
         alugueis = alugueis.filter(status=status_filter)
     
-    # Estatísticas
-    total_alugueis = Aluguel.objects.count()
-    ativos = Aluguel.objects.filter(status='ativo').count()
-    finalizados = Aluguel.objects.filter(status='finalizado').count()
-    cancelados = Aluguel.objects.filter(status='cancelado').count()
-    
-    # Valor total em aluguéis ativos
-    valor_total_ativos = Aluguel.objects.filter(status='ativo').aggregate(
-        total=Sum('valor')
-    )['total'] or 0
+    # Estatísticas (uma consulta, com cache)
+    estatisticas = estatisticas_alugueis()
     
     context = {
         'alugueis': alugueis,
-        'total_alugueis': total_alugueis,
-        'ativos': ativos,
-        'finalizados': finalizados,
-        'cancelados': cancelados,
-        'valor_total_ativos': valor_total_ativos,
+        'total_alugueis': estatisticas['total'],
+        'ativos': estatisticas['ativos'],
+        'finalizados': estatisticas['finalizados'],
+        'cancelados': estatisticas['cancelados'],
+        'valor_total_ativos': estatisticas['valor_total_ativos'],
+        'valor_recebido': estatisticas['valor_recebido'],
         'query': query,
         'status_filter': status_filter,
     }
@@ -740,19 +732,17 @@ def aluguel_detail(request, pk):
     )
     
     # Verificar se é o cliente dono do aluguel ou funcionário
-    user_id = request.session.get('user_id')
-    usuario = get_object_or_404(Usuario, id_usuario=user_id)
+    usuario = request.user_obj
     
     # Cliente só vê seus próprios aluguéis
     if not usuario.is_staff:
-        try:
-            perfil = PerfilCliente.objects.get(usuario=usuario)
-            if aluguel.perfil_cliente != perfil:
-                messages.error(request, 'Você não tem permissão para ver este aluguel!')
-                return redirect('dashboard_cliente')
-        except PerfilCliente.DoesNotExist:
+        perfil = request.perfil
+        if not perfil:
             messages.error(request, 'Perfil não encontrado!')
             return redirect('dashboard_cliente')
+        if aluguel.perfil_cliente_id != perfil.pk:
+            messages.error(request, 'Você não tem permissão para ver este aluguel!')
+            return redirect('dashboard_cliente')
     
     context = {
         'aluguel': aluguel,
@@ -771,7 +761,7 @@ def aluguel_change_status(request, pk):
         
         if novo_status in ['ativo', 'finalizado', 'cancelado']:
             aluguel.status = novo_status
-            aluguel.save()
+            aluguel.save(update_fields=['status', 'atualizado_em'])
             
             messages.success(request, f'Status do aluguel #{aluguel.id_aluguel} atualizado!')
         
@@ -788,7 +778,7 @@ def aluguel_finalizar(request, pk):
     if request.method == 'POST':
         if aluguel.status == 'ativo':
             aluguel.status = 'finalizado'
-            aluguel.save()
+            aluguel.save(update_fields=['status', 'atualizado_em'])
             messages.success(request, f'Aluguel #{aluguel.id_aluguel} finalizado com sucesso!')
         else:
             messages.warning(request, 'Este aluguel não está ativo!')
@@ -806,7 +796,7 @@ def aluguel_cancelar(request, pk):
     if request.method == 'POST':
         if aluguel.status == 'ativo':
             aluguel.status = 'cancelado'
-            aluguel.save()
+            aluguel.save(update_fields=['status', 'atualizado_em'])
             messages.warning(request, f'Aluguel #{aluguel.id_aluguel} cancelado!')
         else:
             messages.warning(request, 'Este aluguel não está ativo!')
@@ -842,54 +832,27 @@ from user.decorators import staff_required, cliente_required
 @staff_required
 def aprovar_solicitacao(request, pk):
     """Funcionário aprova solicitação e cria aluguel + pagamento"""
-    solicitacao = get_object_or_404(SolicitacaoAluguel, pk=pk)
+    solicitacao = get_object_or_404(
+        SolicitacaoAluguel.objects.select_related('carro', 'perfil_cliente__usuario'),
+        pk=pk
+    )
     
     if solicitacao.status != 'pendente':
         messages.error(request, 'Esta solicitação não está mais pendente!')
         return redirect('solicitacoes_pendentes')
     
     if request.method == 'POST':
-        user_id = request.session.get('user_id')
-        funcionario = get_object_or_404(Usuario, id_usuario=user_id)
-        
-        # Criar o aluguel oficial
-        aluguel = Aluguel.objects.create(
-            perfil_cliente=solicitacao.perfil_cliente,
-            carro=solicitacao.carro,
-            funcionario=funcionario,
-            data_inicio=solicitacao.data_inicio,
-            data_fim=solicitacao.data_fim,
-            valor=solicitacao.valor_estimado,
-            status='ativo'
-        )
-        
-        # Atualizar solicitação
-        solicitacao.status = 'aprovado'
-        solicitacao.aluguel_criado = aluguel
-        solicitacao.save()
+        try:
+            aluguel = aprovar(solicitacao.pk, request.user_obj)
+        except ConflitoAprovacao as erro:
+            messages.error(request, f'❌ {erro}')
+            return redirect('solicitacoes_pendentes')
         
-        # Criar pagamento
-        pagamento = Pagamento.objects.create(
-            aluguel=aluguel,
-            valor=solicitacao.valor_estimado,
-            data_vencimento=timezone.now() + timedelta(days=3),  # 3 dias para pagar
-            chave_pix='louercar@pix.com',  # Configure sua chave PIX
-            qr_code_pix='00020126580014BR.GOV.BCB.PIX...',  # QR Code gerado
+        messages.success(
+            request, 
+            f'✅ Solicitação aprovada! Aluguel #{aluguel.id_aluguel} criado. Email agendado para o cliente.'
         )
         
-        # Enviar email de notificação
-        try:
-            pagamento.enviar_email_pagamento_pendente()
-            messages.success(
-                request, 
-                f'✅ Solicitação aprovada! Aluguel #{aluguel.id_aluguel} criado. Email enviado ao cliente.'
-            )
-        except:
-            messages.success(
-                request, 
-                f'✅ Solicitação aprovada! Aluguel #{aluguel.id_aluguel} criado. (Email não enviado - configure SMTP)'
-            )
-        
         return redirect('solicitacoes_pendentes')
     
     return render(request, 'aluguel/aprovar_solicitacao.html', {
@@ -900,20 +863,17 @@ def aprovar_solicitacao(request, pk):
 @cliente_required
 def meu_pagamento(request, solicitacao_id):
     """Cliente visualiza detalhes do pagamento"""
-    user_id = request.session.get('user_id')
-    usuario = get_object_or_404(Usuario, id_usuario=user_id)
-    
-    try:
-        perfil = PerfilCliente.objects.get(usuario=usuario)
-        solicitacao = get_object_or_404(
-            SolicitacaoAluguel,
-            pk=solicitacao_id,
-            perfil_cliente=perfil
-        )
-    except PerfilCliente.DoesNotExist:
+    perfil = request.perfil
+    if not perfil:
         messages.error(request, 'Perfil não encontrado!')
         return redirect('dashboard_cliente')
     
+    solicitacao = get_object_or_404(
+        SolicitacaoAluguel.objects.select_related('aluguel_criado__pagamento', 'aluguel_criado__carro', 'carro'),
+        pk=solicitacao_id,
+        perfil_cliente=perfil
+    )
+    
     if not solicitacao.aluguel_criado:
         messages.error(request, 'Esta solicitação ainda não foi aprovada!')
         return redirect('minhas_solicitacoes')
@@ -934,19 +894,20 @@ def meu_pagamento(request, solicitacao_id):
 @staff_required
 def confirmar_pagamento(request, pagamento_id):
     """Funcionário confirma recebimento do pagamento"""
-    pagamento = get_object_or_404(Pagamento, pk=pagamento_id)
+    pagamento = get_object_or_404(
+        Pagamento.objects.select_related('aluguel__carro', 'aluguel__perfil_cliente__usuario'),
+        pk=pagamento_id
+    )
     
     if request.method == 'POST':
-        pagamento.status = 'aprovado'
-        pagamento.data_pagamento = timezone.now()
-        pagamento.save()
+        # Confirmar e agendar o email na mesma transação
+        with transaction.atomic():
+            pagamento.status = 'aprovado'
+            pagamento.data_pagamento = timezone.now()
+            pagamento.save()
+            pagamento.enfileirar_email_pagamento_aprovado()
         
-        # Enviar email de confirmação
-        try:
-            pagamento.enviar_email_pagamento_aprovado()
-            messages.success(request, '✅ Pagamento confirmado! Email enviado ao cliente.')
-        except:
-            messages.success(request, '✅ Pagamento confirmado! (Email não enviado - configure SMTP)')
+        messages.success(request, '✅ Pagamento confirmado! Email agendado para o cliente.')
         
         return redirect('aluguel_list')
     
@@ -966,4 +927,56 @@ def pagamentos_pendentes(request):
         'pagamentos': pagamentos,
     }
     
-    return render(request, 'aluguel/pagamentos_pendentes.html', context)
\ No newline at end of file
+    return render(request, 'aluguel/pagamentos_pendentes.html', context)
+
+
+@staff_required
+def exportar_alugueis(request):
+    """Exporta aluguéis + pagamentos em CSV ou NDJSON (resposta em streaming)"""
+    formato = request.GET.get('formato', 'csv')
+    inicio = request.GET.get('data_inicio') or None
+    fim = request.GET.get('data_fim') or None
+    status = request.GET.getlist('status')
+    
+    try:
+        datas = [parse_date(data) if data else None for data in (inicio, fim)]
+    except ValueError:
+        datas = [None, None]
+    if formato not in FORMATOS or (inicio and not datas[0]) or (fim and not datas[1]):
+        messages.error(request, '❌ Parâmetros de exportação inválidos!')
+        return redirect('aluguel_list')
+    
+    alugueis = filtrar_alugueis(datas[0], datas[1], status)
+    response = StreamingHttpResponse(gerar(alugueis, formato), content_type=FORMATOS[formato])
+    response['Content-Disposition'] = f'attachment; filename="alugueis.{formato}"'
+    return response
+
+
+@cliente_required
+def cotar_solicitacao(request):
+    """Valor estimado do formulário de solicitação, pelas mesmas regras do valor gravado"""
+    carro_id = request.GET.get('carro', '')
+    carro = None
+    if carro_id.isdigit():
+        carro = Carro.objects.exclude(status='manutencao').filter(pk=carro_id).first()
+    try:
+        data_inicio = parse_datetime(request.GET.get('data_inicio') or '')
+        data_fim = parse_datetime(request.GET.get('data_fim') or '')
+    except ValueError:
+        data_inicio = data_fim = None
+    if carro is None or not data_inicio or not data_fim or data_fim <= data_inicio:
+        return JsonResponse({'error': 'Informe o carro e um período válido'}, status=400)
+    if timezone.is_naive(data_inicio):
+        data_inicio = timezone.make_aware(data_inicio)
+    if timezone.is_naive(data_fim):
+        data_fim = timezone.make_aware(data_fim)
+
+    try:
+        periodo = fator_periodo(data_inicio, data_fim)
+    except ValueError as erro:
+        return JsonResponse({'error': str(erro)}, status=400)
+    return JsonResponse({
+        'valor': str(aplicar(carro.preco_diaria, periodo['fator'])),
+        'diarias': f"{periodo['diarias'].normalize():f}",
+        'desconto': str(periodo['desconto']),
+    })
@@ -0,0 +1,145 @@
+"""
+Paginação por cursor (keyset) para a API.
+
+A ordenação é sempre (campo de data DESC, pk DESC) e o cursor guarda os
+valores do último/primeiro item da página, então cada página é uma busca
+por índice (WHERE (data, pk) < (x, y) ... LIMIT n), sem OFFSET e sem COUNT.
+A comparação é feita por valor de linha, que o PostgreSQL (e o SQLite
+3.15+) resolvem com uma só faixa num índice que comece pela data; o
+equivalente com OR (data < x OR (data = x AND pk < y)) não vira uma faixa.
+"""
+import base64
+import binascii
+import json
+
+from django.db import models
+from django.db.models import F, Func, Value
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+def codificar_cursor(valor, pk, reverso=False):
+    """Gera um cursor opaco a partir de (valor, pk)"""
+    dados = {'v': valor.isoformat(), 'p': pk}
+    if reverso:
+        dados['r'] = 1
+    texto = json.dumps(dados, separators=(',', ':'))
+    return base64.urlsafe_b64encode(texto.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    """Lê um cursor opaco; levanta ValueError se for inválido"""
+    try:
+        texto = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        dados = json.loads(texto)
+        valor = parse_datetime(dados['v'])
+        pk = int(dados['p'])
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError, KeyError):
+        raise ValueError('Cursor inválido')
+    if valor is None:
+        raise ValueError('Cursor inválido')
+    return valor, pk, bool(dados.get('r'))
+
+
+class Linha(Func):
+    """Valor de linha SQL: (a, b), comparável com outro valor de linha"""
+    template = '(%(expressions)s)'
+    arg_joiner = ', '
+    output_field = models.Field()
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginação keyset sobre (criado_em, pk).
+    A view pode trocar o campo de data com o atributo `cursor_field`.
+    """
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE or 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    cursor_field = 'criado_em'
+    invalid_cursor_message = 'Cursor inválido'
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                tamanho = int(request.query_params[self.page_size_query_param])
+                if tamanho > 0:
+                    return min(tamanho, self.max_page_size)
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size_atual = self.get_page_size(request)
+        self.campo = getattr(view, 'cursor_field', self.cursor_field)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        reverso = False
+        if cursor:
+            try:
+                valor, pk, reverso = decodificar_cursor(cursor)
+            except ValueError:
+                raise NotFound(self.invalid_cursor_message)
+            campo = queryset.model._meta.get_field(self.campo)
+            limite = Linha(Value(valor, output_field=campo), Value(pk))
+            # Página anterior: itens "depois" do cursor na ordem DESC
+            comparacao = 'gt' if reverso else 'lt'
+            queryset = queryset.alias(_chave_cursor=Linha(F(self.campo), F('pk'))).filter(
+                **{f'_chave_cursor__{comparacao}': limite}
+            )
+
+        if reverso:
+            queryset = queryset.order_by(self.campo, 'pk')
+        else:
+            queryset = queryset.order_by(f'-{self.campo}', '-pk')
+
+        itens = list(queryset[:self.page_size_atual + 1])
+        tem_mais = len(itens) > self.page_size_atual
+        itens = itens[:self.page_size_atual]
+        if reverso:
+            itens.reverse()
+
+        self.page = itens
+        # Na ida, "tem_mais" diz se existe próxima página; na volta, anterior.
+        self.tem_proxima = tem_mais if not reverso else True
+        self.tem_anterior = bool(cursor) if not reverso else tem_mais
+        return itens
+
+    def _link(self, item, reverso):
+        url = self.request.build_absolute_uri()
+        cursor = codificar_cursor(getattr(item, self.campo), item.pk, reverso)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_next_link(self):
+        if not self.page or not self.tem_proxima:
+            return None
+        return self._link(self.page[-1], reverso=False)
+
+    def get_previous_link(self):
+        if not self.page or not self.tem_anterior:
+            return None
+        return self._link(self.page[0], reverso=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -4,31 +4,89 @@ from carro.models import Carro
 from aluguel.models import Aluguel, SolicitacaoAluguel, Pagamento
 
 
-class TagSerializer(serializers.ModelSerializer):
+class RelacionadosMixin:
+    """
+    Cada serializer declara no Meta os relacionamentos que usa diretamente:
+    `select_related` (FK/OneToOne) e `prefetch_related` (ManyToMany/reversos).
+    Os serializers aninhados são percorridos e os caminhos são combinados,
+    gerando um queryset com número constante de consultas.
+    """
+
+    @classmethod
+    def relacionados(cls, prefixo=''):
+        """Retorna (select_related, prefetch_related) para este serializer"""
+        meta = getattr(cls, 'Meta', None)
+        select = []
+        prefetch = []
+        aninhados = {}
+        for nome, campo in cls._declared_fields.items():
+            filho = getattr(campo, 'child', campo)
+            if isinstance(filho, RelacionadosMixin):
+                aninhados[campo.source or nome] = type(filho)
+
+        for relacao in getattr(meta, 'select_related', []):
+            select.append(prefixo + relacao)
+            if relacao in aninhados:
+                sub_select, sub_prefetch = aninhados[relacao].relacionados(f'{prefixo}{relacao}__')
+                select += sub_select
+                prefetch += sub_prefetch
+
+        for relacao in getattr(meta, 'prefetch_related', []):
+            prefetch.append(prefixo + relacao)
+            if relacao in aninhados:
+                # Tudo abaixo de um prefetch também precisa ser prefetch
+                sub_select, sub_prefetch = aninhados[relacao].relacionados(f'{prefixo}{relacao}__')
+                prefetch += sub_select + sub_prefetch
+
+        return select, prefetch
+
+    @classmethod
+    def otimizar_queryset(cls, queryset):
+        """Aplica select_related/prefetch_related declarados ao queryset"""
+        select, prefetch = cls.relacionados()
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
+
+
+class TagSerializer(RelacionadosMixin, serializers.ModelSerializer):
     class Meta:
         model = Tag
         fields = ['id_tag', 'nome', 'cor', 'icone', 'descricao']
 
 
-class UsuarioSerializer(serializers.ModelSerializer):
+class TagEstatisticasSerializer(TagSerializer):
+    """Tag com as contagens de uso (preenchidas pela view a partir do cache)"""
+    total_usuarios = serializers.IntegerField(read_only=True)
+    total_grupos = serializers.IntegerField(read_only=True)
+
+    class Meta(TagSerializer.Meta):
+        fields = TagSerializer.Meta.fields + ['total_usuarios', 'total_grupos']
+
+
+class UsuarioSerializer(RelacionadosMixin, serializers.ModelSerializer):
     tags = TagSerializer(many=True, read_only=True)
     
     class Meta:
         model = Usuario
         fields = ['id_usuario', 'username', 'email', 'is_active', 'is_staff', 
                   'is_superuser', 'foto_perfil', 'data_cadastro', 'tags']
+        prefetch_related = ['tags']
 
 
-class PerfilClienteSerializer(serializers.ModelSerializer):
+class PerfilClienteSerializer(RelacionadosMixin, serializers.ModelSerializer):
     usuario = UsuarioSerializer(read_only=True)
     
     class Meta:
         model = PerfilCliente
         fields = ['id_perfil_cliente', 'usuario', 'CNH', 'telefone', 
                   'endereco', 'criado_em', 'atualizado_em']
+        select_related = ['usuario']
 
 
-class CarroSerializer(serializers.ModelSerializer):
+class CarroSerializer(RelacionadosMixin, serializers.ModelSerializer):
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     
     class Meta:
@@ -37,7 +95,7 @@ class CarroSerializer(serializers.ModelSerializer):
                   'preco_diaria', 'foto_url', 'descricao', 'criado_em']
 
 
-class AluguelSerializer(serializers.ModelSerializer):
+class AluguelSerializer(RelacionadosMixin, serializers.ModelSerializer):
     carro = CarroSerializer(read_only=True)
     perfil_cliente = PerfilClienteSerializer(read_only=True)
     funcionario = UsuarioSerializer(read_only=True)
@@ -47,9 +105,10 @@ class AluguelSerializer(serializers.ModelSerializer):
         model = Aluguel
         fields = ['id_aluguel', 'carro', 'perfil_cliente', 'funcionario',
                   'data_inicio', 'data_fim', 'valor', 'status', 'status_display']
+        select_related = ['carro', 'perfil_cliente', 'funcionario']
 
 
-class SolicitacaoAluguelSerializer(serializers.ModelSerializer):
+class SolicitacaoAluguelSerializer(RelacionadosMixin, serializers.ModelSerializer):
     carro = CarroSerializer(read_only=True)
     perfil_cliente = PerfilClienteSerializer(read_only=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
@@ -59,9 +118,10 @@ class SolicitacaoAluguelSerializer(serializers.ModelSerializer):
         fields = ['id_solicitacao', 'carro', 'perfil_cliente', 
                   'data_inicio', 'data_fim', 'valor_estimado', 
                   'status', 'status_display', 'observacoes', 'criado_em']
+        select_related = ['carro', 'perfil_cliente']
 
 
-class PagamentoSerializer(serializers.ModelSerializer):
+class PagamentoSerializer(RelacionadosMixin, serializers.ModelSerializer):
     aluguel = AluguelSerializer(read_only=True)
     metodo_display = serializers.CharField(source='get_metodo_pagamento_display', read_only=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
@@ -70,11 +130,13 @@ class PagamentoSerializer(serializers.ModelSerializer):
         model = Pagamento
         fields = ['id_pagamento', 'aluguel', 'metodo_pagamento', 'metodo_display',
                   'valor', 'status', 'status_display', 'data_vencimento', 'data_pagamento']
+        select_related = ['aluguel']
 
 
-class GrupoSerializer(serializers.ModelSerializer):
+class GrupoSerializer(RelacionadosMixin, serializers.ModelSerializer):
     tag = TagSerializer(read_only=True)
     
     class Meta:
         model = Grupo
-        fields = ['id_grupo', 'nome', 'descricao', 'tag', 'link_whatsapp']
\ No newline at end of file
+        fields = ['id_grupo', 'nome', 'descricao', 'tag', 'link_whatsapp']
+        select_related = ['tag']
\ No newline at end of file
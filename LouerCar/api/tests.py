@@ -0,0 +1,303 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from aluguel.models import Aluguel, Pagamento, SolicitacaoAluguel
+from carro.models import Carro
+from sincronizacao.feed import codificar_token
+from .pagination import KeysetPagination
+from user.models import PerfilCliente, Tag, Usuario, UsuarioTag
+
+
+class ConsultasConstantesTest(TestCase):
+    """As listagens da API não podem fazer consultas por linha (N+1)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tag = Tag.objects.create(nome='Cliente Novo')
+        cls.funcionario = Usuario.objects.create(
+            username='funcionario', email='func@louercar.com', is_staff=True
+        )
+        UsuarioTag.objects.create(usuario=cls.funcionario, tag=cls.tag)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(
+            User.objects.create(username='admin', is_staff=True)
+        )
+
+    def criar_alugueis(self, quantidade):
+        agora = timezone.now()
+        inicio = Carro.objects.count() + 1
+        for n in range(inicio, inicio + quantidade):
+            cliente = Usuario.objects.create(username=f'cliente{n}', email=f'cliente{n}@teste.com')
+            UsuarioTag.objects.create(usuario=cliente, tag=self.tag)
+            perfil = PerfilCliente.objects.create(
+                usuario=cliente, CNH=f'CNH{n}', telefone='11999999999', endereco='Rua A'
+            )
+            carro = Carro.objects.create(modelo=f'Modelo {n}', placa=f'ABC{n:04d}', ano=2024)
+            aluguel = Aluguel.objects.create(
+                perfil_cliente=perfil, carro=carro, funcionario=self.funcionario,
+                data_inicio=agora, data_fim=agora + timedelta(days=2), valor=300,
+            )
+            SolicitacaoAluguel.objects.create(
+                perfil_cliente=perfil, carro=carro, data_inicio=agora,
+                data_fim=agora + timedelta(days=2), valor_estimado=300,
+                status='aprovado', aluguel_criado=aluguel,
+            )
+            Pagamento.objects.create(
+                aluguel=aluguel, valor=300, data_vencimento=agora + timedelta(days=3)
+            )
+
+    def contar_consultas(self, url):
+        with CaptureQueriesContext(connection) as consultas:
+            resposta = self.client.get(url)
+        self.assertEqual(resposta.status_code, 200)
+        return len(consultas), len(resposta.json()['results'])
+
+    def test_numero_de_consultas_nao_cresce_com_as_linhas(self):
+        urls = [
+            '/api/pagamentos/',
+            '/api/alugueis/',
+            '/api/solicitacoes/',
+            '/api/carros/',
+            '/api/usuarios/',
+            '/api/grupos/',
+        ]
+        self.criar_alugueis(2)
+        poucas = {url: self.contar_consultas(url) for url in urls}
+
+        self.criar_alugueis(8)
+        for url in urls:
+            with self.subTest(url=url):
+                consultas, linhas = self.contar_consultas(url)
+                self.assertEqual(consultas, poucas[url][0])
+                if url != '/api/grupos/':
+                    self.assertGreater(linhas, poucas[url][1])
+
+    def test_pagamentos_com_relacionamentos_aninhados(self):
+        self.criar_alugueis(5)
+        # 1 consulta principal (com joins) + 2 prefetches de tags
+        with self.assertNumQueries(3):
+            resposta = self.client.get('/api/pagamentos/')
+        pagamento = resposta.json()['results'][0]
+        self.assertEqual(pagamento['aluguel']['perfil_cliente']['usuario']['tags'][0]['nome'], 'Cliente Novo')
+        self.assertEqual(pagamento['aluguel']['funcionario']['username'], 'funcionario')
+
+
+class PaginacaoKeysetTest(TestCase):
+    """Cursor sobre (criado_em, pk): ida e volta sem repetir nem pular itens"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username='admin', is_staff=True))
+        carros = [
+            Carro.objects.create(modelo=f'Modelo {n}', placa=f'PAG{n:04d}', ano=2024) for n in range(7)
+        ]
+        # Empates no timestamp: a ordem é decidida pela pk
+        instante = timezone.now() - timedelta(days=1)
+        Carro.objects.filter(pk__in=[c.pk for c in carros[:4]]).update(criado_em=instante)
+        self.esperado = list(
+            Carro.objects.order_by('-criado_em', '-pk').values_list('pk', flat=True)
+        )
+
+    def ids(self, resposta):
+        return [carro['id_carro'] for carro in resposta.json()['results']]
+
+    def test_ida_e_volta(self):
+        vistos = []
+        paginas = []
+        url = '/api/carros/?page_size=3'
+        with CaptureQueriesContext(connection) as consultas:
+            while url:
+                resposta = self.client.get(url)
+                self.assertEqual(resposta.status_code, 200)
+                paginas.append(resposta.json())
+                vistos += self.ids(resposta)
+                url = resposta.json()['next']
+        self.assertEqual(vistos, self.esperado)
+        self.assertEqual(len(paginas), 3)
+        self.assertIsNone(paginas[0]['previous'])
+        # Comparação por valor de linha, sem OFFSET
+        sql = ' '.join(consulta['sql'] for consulta in consultas.captured_queries)
+        self.assertRegex(sql, r'\("carro"\."criado_em", "carro"\."id_carro"\) < \(')
+        self.assertNotIn('OFFSET', sql)
+
+        # Volta a partir da última página
+        resposta = self.client.get(paginas[-1]['previous'])
+        self.assertEqual(self.ids(resposta), self.esperado[3:6])
+        resposta = self.client.get(resposta.json()['previous'])
+        self.assertEqual(self.ids(resposta), self.esperado[:3])
+        self.assertIsNone(resposta.json()['previous'])
+
+    def test_cursor_invalido(self):
+        for cursor in ('nao-e-um-cursor', 'e30', '!!!'):
+            with self.subTest(cursor=cursor):
+                resposta = self.client.get('/api/carros/', {'cursor': cursor})
+                self.assertEqual(resposta.status_code, 404)
+
+    def test_page_size_limitado(self):
+        with mock.patch.object(KeysetPagination, 'max_page_size', 4):
+            resposta = self.client.get('/api/carros/?page_size=1000')
+        self.assertEqual(self.ids(resposta), self.esperado[:4])
+        resposta = self.client.get('/api/carros/?page_size=abc')
+        self.assertEqual(len(self.ids(resposta)), 7)
+
+
+class RespostaCondicionalTest(TestCase):
+    """GET condicional: 304 sem consultar o banco enquanto nada mudar"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username='admin', is_staff=True))
+        self.carro = Carro.objects.create(modelo='Onix', placa='ABC-1234', ano=2024)
+
+    def test_etag_e_304(self):
+        for url in ('/api/carros/', '/api/carros/disponiveis/', '/api/solicitacoes/pendentes/'):
+            resposta = self.client.get(url)
+            self.assertEqual(resposta.status_code, 200)
+            etag = resposta['ETag']
+
+            # Só a sessão/autenticação; nada da consulta principal nem do serializer
+            with CaptureQueriesContext(connection) as consultas:
+                resposta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(resposta.status_code, 304, url)
+            self.assertEqual(resposta.content, b'')
+            self.assertFalse(
+                any('"carro"' in consulta['sql'] or 'solicitacao' in consulta['sql']
+                    for consulta in consultas.captured_queries),
+                url,
+            )
+
+    def test_escrita_muda_etag(self):
+        etag = self.client.get('/api/carros/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.carro.preco_diaria = 99
+            self.carro.save()
+
+        resposta = self.client.get('/api/carros/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertNotEqual(resposta['ETag'], etag)
+
+    @override_settings(ALLOWED_HOSTS=['testserver'])
+    def test_html(self):
+        usuario = Usuario.objects.create(username='cliente', email='cliente@teste.com')
+        sessao = self.client.session
+        sessao['user_id'] = usuario.pk
+        sessao.save()
+
+        url = f'/carros/{self.carro.pk}/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+
+@mock.patch('sincronizacao.feed.MARGEM', timedelta(0))
+class SincronizacaoTest(TestCase):
+    """Feed ?since=: só o que mudou depois do token, com lápides das remoções"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username='admin', is_staff=True))
+        self.carros = [
+            Carro.objects.create(modelo=f'Carro {n}', placa=f'ABC-{n:04d}', ano=2024) for n in range(3)
+        ]
+
+    def sincronizar(self, since=None):
+        parametros = {'since': since} if since else {}
+        resposta = self.client.get('/api/carros/sync/', parametros)
+        self.assertEqual(resposta.status_code, 200)
+        return resposta.json()
+
+    def test_feed_incremental(self):
+        inicial = self.sincronizar()
+        self.assertEqual(len(inicial['alteracoes']), 3)
+        self.assertEqual(inicial['removidos'], [])
+
+        vazio = self.sincronizar(inicial['since'])
+        self.assertEqual((vazio['alteracoes'], vazio['removidos']), ([], []))
+
+        alterado, removido = self.carros[0], self.carros[1]
+        alterado.status = 'manutencao'
+        alterado.save()
+        removido_pk = removido.pk
+        removido.delete()
+
+        delta = self.sincronizar(vazio['since'])
+        self.assertEqual([carro['id_carro'] for carro in delta['alteracoes']], [alterado.pk])
+        self.assertEqual(delta['alteracoes'][0]['status'], 'manutencao')
+        self.assertEqual(delta['removidos'], [removido_pk])
+        self.assertFalse(delta['mais'])
+
+    def test_token_invalido(self):
+        self.assertEqual(self.client.get('/api/carros/sync/', {'since': 'xyz'}).status_code, 400)
+        # Bem formado, mas com datas sem fuso
+        sem_fuso = codificar_token((datetime(2026, 1, 1), 1), (datetime(2026, 1, 1), 1))
+        self.assertEqual(self.client.get('/api/carros/sync/', {'since': sem_fuso}).status_code, 400)
+
+    def test_apenas_equipe(self):
+        self.client.force_authenticate(User.objects.create(username='cliente'))
+        self.assertEqual(self.client.get('/api/carros/sync/').status_code, 403)
+
+
+class CotacaoTest(TestCase):
+    """Cotação de todos os carros livres no período em uma chamada"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username='cliente'))
+        self.livre = Carro.objects.create(modelo='Onix', placa='ABC-0001', ano=2024, preco_diaria=100)
+        Carro.objects.create(modelo='Gol', placa='ABC-0002', ano=2020, status='manutencao')
+
+    def test_cotacao(self):
+        resposta = self.client.get('/api/carros/cotacao/', {
+            'data_inicio': '2026-03-02T10:00:00', 'data_fim': '2026-03-04T10:00:00',
+        })
+        self.assertEqual(resposta.status_code, 200)
+        dados = resposta.json()
+        self.assertEqual([carro['id_carro'] for carro in dados['carros']], [self.livre.pk])
+        self.assertEqual(Decimal(dados['carros'][0]['valor_total']), Decimal('200.00'))
+
+        invalida = self.client.get('/api/carros/cotacao/', {'data_inicio': 'ontem'})
+        self.assertEqual(invalida.status_code, 400)
+        longa = self.client.get('/api/carros/cotacao/', {
+            'data_inicio': '2026-03-02T10:00:00', 'data_fim': '2126-03-02T10:00:00',
+        })
+        self.assertEqual(longa.status_code, 400)
+
+    def test_carro_alugado_agora_livre_depois(self):
+        cliente = Usuario.objects.create(username='cliente1', email='cliente1@teste.com')
+        perfil = PerfilCliente.objects.create(
+            usuario=cliente, CNH='CNH1', telefone='11999999999', endereco='Rua A'
+        )
+        funcionario = Usuario.objects.create(username='funcionario', is_staff=True)
+        agora = timezone.now()
+        Aluguel.objects.create(
+            perfil_cliente=perfil, carro=self.livre, funcionario=funcionario,
+            data_inicio=agora - timedelta(days=1), data_fim=agora + timedelta(days=2), valor=300,
+        )
+        self.livre.refresh_from_db()
+        self.assertEqual(self.livre.status, 'alugado')
+
+        def cotados(inicio, fim):
+            resposta = self.client.get('/api/carros/cotacao/', {
+                'data_inicio': inicio.isoformat(), 'data_fim': fim.isoformat(),
+            })
+            self.assertEqual(resposta.status_code, 200)
+            return [carro['id_carro'] for carro in resposta.json()['carros']]
+
+        # Ocupado durante o aluguel, cotado numa janela posterior
+        self.assertEqual(cotados(agora, agora + timedelta(days=1)), [])
+        depois = agora + timedelta(days=5)
+        self.assertEqual(cotados(depois, depois + timedelta(days=2)), [self.livre.pk])
@@ -1,36 +1,187 @@
+from django.http import HttpResponseNotModified
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_datetime
 from rest_framework import viewsets, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
+from .serializers import RelacionadosMixin
+
 from user.models import Usuario, PerfilCliente, Tag, Grupo
+from user.estatisticas import aplicar_contagens
 from carro.models import Carro
+from aluguel import precificacao
+from aluguel.disponibilidade import carros_livres
 from aluguel.models import Aluguel, SolicitacaoAluguel, Pagamento
+from LouerCar import versoes
+from sincronizacao import feed
 
 from .serializers import (
-    UsuarioSerializer, PerfilClienteSerializer, TagSerializer, 
+    UsuarioSerializer, PerfilClienteSerializer, TagEstatisticasSerializer, 
     GrupoSerializer, CarroSerializer, AluguelSerializer,
     SolicitacaoAluguelSerializer, PagamentoSerializer
 )
 
 
-class CarroViewSet(viewsets.ModelViewSet):
+class QuerysetOtimizadoMixin:
+    """
+    Aplica ao queryset os relacionamentos declarados pelo serializer
+    (ver RelacionadosMixin), evitando N+1 nas listagens e no detalhe.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        serializer_class = self.get_serializer_class()
+        if issubclass(serializer_class, RelacionadosMixin):
+            queryset = serializer_class.otimizar_queryset(queryset)
+        return queryset
+
+
+class NaoModificado(Exception):
+    """O cliente já tem a versão atual do recurso"""
+
+
+class RespostaCondicionalMixin:
+    """
+    GET condicional: a ETag vem das versões das tabelas lidas pelo endpoint
+    (`tabelas_etag`, ver LouerCar/versoes.py). Depois da autenticação e das
+    permissões, se o If-None-Match bate, responde 304 sem consultar o banco
+    nem serializar.
+    """
+    tabelas_etag = ()
+    acoes_sem_etag = ()
+
+    def get_tabelas_etag(self):
+        return self.tabelas_etag
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.etag = None
+        tabelas = self.get_tabelas_etag()
+        if request.method in ('GET', 'HEAD') and tabelas and self.action not in self.acoes_sem_etag:
+            self.etag = versoes.etag(
+                tabelas, request.get_full_path(),
+                request.user.pk, request.user.is_staff, request.accepted_renderer.format,
+            )
+            if get_conditional_response(request, etag=self.etag) is not None:
+                raise NaoModificado
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NaoModificado):
+            return versoes.marcar_resposta(HttpResponseNotModified(), self.etag)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if getattr(self, 'etag', None) and response.status_code == 200:
+            versoes.marcar_resposta(response, self.etag)
+        return response
+
+
+class SincronizacaoMixin:
+    """
+    GET <recurso>/sync/?since=<token>: só o que foi criado, alterado ou
+    removido desde o token (ver sincronizacao/feed.py), para os clientes
+    offline da equipe. Sem `since`, entrega tudo em lotes; `mais` indica
+    que há outro lote e `since` é o token para pedi-lo.
+    """
+    tabela_sync = None
+    # O feed depende da hora (margem de commit), não só das versões das tabelas
+    acoes_sem_etag = ('sincronizar',)
+
+    @action(detail=False, methods=['get'], url_path='sync', permission_classes=[permissions.IsAdminUser])
+    def sincronizar(self, request):
+        """Feed de alterações desde o token `since`"""
+        try:
+            resultado = feed.alteracoes(
+                self.filter_queryset(self.get_queryset()), self.tabela_sync,
+                request.query_params.get('since'),
+            )
+        except feed.TokenInvalido as erro:
+            return Response({'error': str(erro)}, status=400)
+        except feed.TokenExpirado:
+            return Response(
+                {'error': 'Token expirado: sincronize de novo do zero (sem since)'}, status=410
+            )
+
+        return Response({
+            'alteracoes': self.get_serializer(resultado['alterados'], many=True).data,
+            'removidos': resultado['removidos'],
+            'since': resultado['since'],
+            'mais': resultado['mais'],
+        })
+
+
+class CarroViewSet(SincronizacaoMixin, RespostaCondicionalMixin, QuerysetOtimizadoMixin, viewsets.ModelViewSet):
     """API para Carros"""
     queryset = Carro.objects.all()
     serializer_class = CarroSerializer
     permission_classes = [permissions.IsAuthenticated]
+    tabelas_etag = ('carro',)
+    tabela_sync = 'carro'
+
+    def get_tabelas_etag(self):
+        # A cotação também depende dos aluguéis (carros livres no período)
+        if self.action == 'cotacao':
+            return ('carro', 'aluguel')
+        return super().get_tabelas_etag()
     
     @action(detail=False, methods=['get'])
     def disponiveis(self, request):
         """Lista apenas carros disponíveis"""
-        carros = Carro.objects.filter(status='disponivel')
-        serializer = self.get_serializer(carros, many=True)
-        return Response(serializer.data)
+        carros = self.filter_queryset(Carro.objects.filter(status='disponivel'))
+        page = self.paginate_queryset(carros)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
+    @action(detail=False, methods=['get'])
+    def cotacao(self, request):
+        """
+        Cota todos os carros livres no período (?data_inicio=...&data_fim=...,
+        ISO 8601) em uma chamada, sem paginação.
+        """
+        datas = []
+        for parametro in ('data_inicio', 'data_fim'):
+            try:
+                data = parse_datetime(request.query_params.get(parametro) or '')
+            except ValueError:
+                data = None
+            if data is None:
+                return Response({'error': f'Informe {parametro} no formato ISO 8601'}, status=400)
+            datas.append(timezone.make_aware(data) if timezone.is_naive(data) else data)
+        inicio, fim = datas
+        try:
+            periodo = precificacao.fator_periodo(inicio, fim)
+        except ValueError as erro:
+            return Response({'error': str(erro)}, status=400)
+        carros = list(
+            carros_livres(Carro.objects.all(), inicio, fim)
+            .order_by('preco_diaria', 'pk')
+            .values('id_carro', 'modelo', 'placa', 'ano', 'preco_diaria')
+        )
+        # Um valor por preço de diária distinto, não um cálculo por carro
+        valores = precificacao.cotar_periodo(
+            ((carro['id_carro'], carro['preco_diaria']) for carro in carros), inicio, fim
+        )
+        for carro in carros:
+            carro['valor_total'] = valores[carro['id_carro']]
+
+        return Response({
+            'data_inicio': inicio,
+            'data_fim': fim,
+            'diarias': periodo['diarias'],
+            'desconto': periodo['desconto'],
+            'carros': carros,
+        })
 
-class AluguelViewSet(viewsets.ModelViewSet):
+
+class AluguelViewSet(SincronizacaoMixin, RespostaCondicionalMixin, QuerysetOtimizadoMixin, viewsets.ModelViewSet):
     """API para Aluguéis"""
     serializer_class = AluguelSerializer
     permission_classes = [permissions.IsAuthenticated]
+    tabelas_etag = ('aluguel', 'carro', 'usuario')
+    tabela_sync = 'aluguel'
     
     def get_queryset(self):
         """Clientes veem apenas seus aluguéis"""
@@ -45,10 +196,12 @@ class AluguelViewSet(viewsets.ModelViewSet):
                 return Aluguel.objects.none()
 
 
-class SolicitacaoAluguelViewSet(viewsets.ModelViewSet):
+class SolicitacaoAluguelViewSet(SincronizacaoMixin, RespostaCondicionalMixin, QuerysetOtimizadoMixin, viewsets.ModelViewSet):
     """API para Solicitações"""
     serializer_class = SolicitacaoAluguelSerializer
     permission_classes = [permissions.IsAuthenticated]
+    tabelas_etag = ('solicitacao', 'carro', 'usuario')
+    tabela_sync = 'solicitacao'
     
     def get_queryset(self):
         """Clientes veem apenas suas solicitações"""
@@ -68,15 +221,17 @@ class SolicitacaoAluguelViewSet(viewsets.ModelViewSet):
         if not request.user.is_staff:
             return Response({'error': 'Apenas funcionários'}, status=403)
         
-        solicitacoes = SolicitacaoAluguel.objects.filter(status='pendente')
-        serializer = self.get_serializer(solicitacoes, many=True)
-        return Response(serializer.data)
+        solicitacoes = self.filter_queryset(SolicitacaoAluguel.objects.filter(status='pendente'))
+        page = self.paginate_queryset(solicitacoes)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
 
-class PagamentoViewSet(viewsets.ReadOnlyModelViewSet):
+class PagamentoViewSet(RespostaCondicionalMixin, QuerysetOtimizadoMixin, viewsets.ReadOnlyModelViewSet):
     """API para Pagamentos (apenas leitura)"""
     serializer_class = PagamentoSerializer
     permission_classes = [permissions.IsAuthenticated]
+    tabelas_etag = ('aluguel', 'carro', 'usuario')
     
     def get_queryset(self):
         """Clientes veem apenas seus pagamentos"""
@@ -91,11 +246,12 @@ class PagamentoViewSet(viewsets.ReadOnlyModelViewSet):
                 return Pagamento.objects.none()
 
 
-class UsuarioViewSet(viewsets.ReadOnlyModelViewSet):
+class UsuarioViewSet(QuerysetOtimizadoMixin, viewsets.ReadOnlyModelViewSet):
     """API para Usuários (apenas admin)"""
     queryset = Usuario.objects.all()
     serializer_class = UsuarioSerializer
     permission_classes = [permissions.IsAdminUser]
+    cursor_field = 'data_cadastro'  # Usuario não tem criado_em
     
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
     def me(self, request):
@@ -104,14 +260,20 @@ class UsuarioViewSet(viewsets.ReadOnlyModelViewSet):
         return Response(serializer.data)
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(QuerysetOtimizadoMixin, viewsets.ReadOnlyModelViewSet):
     """API para Tags"""
     queryset = Tag.objects.all()
-    serializer_class = TagSerializer
+    serializer_class = TagEstatisticasSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    def get_serializer(self, *args, **kwargs):
+        # Contagens de uso vindas do cache compartilhado com tag_list e o admin
+        if args:
+            aplicar_contagens(args[0] if kwargs.get('many') else [args[0]])
+        return super().get_serializer(*args, **kwargs)
+
 
-class GrupoViewSet(viewsets.ReadOnlyModelViewSet):
+class GrupoViewSet(QuerysetOtimizadoMixin, viewsets.ReadOnlyModelViewSet):
     """API para Grupos"""
     queryset = Grupo.objects.all()
     serializer_class = GrupoSerializer
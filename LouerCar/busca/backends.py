@@ -0,0 +1,151 @@
+"""
+Backends do índice de busca textual.
+
+- SQLite: tabelas virtuais FTS5 (tokenizador unicode61 sem acentos,
+  índices de prefixo e ordenação por bm25).
+- PostgreSQL: tabelas com coluna tsvector e índice GIN (ordenação por ts_rank).
+
+Cada índice é uma tabela `busca_<nome>` com um documento de texto por id.
+As buscas são subconsultas SQL (ids que casam e relevância de um id), para
+o filtro ser combinado com os demais filtros da listagem no próprio banco.
+"""
+import re
+import unicodedata
+
+from django.db import connection
+
+INDICES = ['carro', 'aluguel']
+
+
+def normalizar(texto):
+    """Remove acentos e coloca em minúsculas"""
+    texto = unicodedata.normalize('NFKD', texto or '')
+    return ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+
+
+def termos(busca):
+    """Quebra o texto buscado em termos (palavras e números)"""
+    return re.findall(r'\w+', normalizar(busca))
+
+
+class BackendSQLite:
+    """Índice FTS5 do SQLite"""
+
+    def criar_tabelas(self, cursor):
+        for nome in INDICES:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS busca_{nome} USING fts5("
+                f"texto, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+            )
+
+    def remover_tabelas(self, cursor):
+        for nome in INDICES:
+            cursor.execute(f'DROP TABLE IF EXISTS busca_{nome}')
+
+    def remover(self, nome, ids):
+        if not ids:
+            return
+        with connection.cursor() as cursor:
+            marcadores = ', '.join(['%s'] * len(ids))
+            cursor.execute(f'DELETE FROM busca_{nome} WHERE rowid IN ({marcadores})', list(ids))
+
+    def gravar(self, nome, documentos):
+        """documentos: lista de (id, texto)"""
+        if not documentos:
+            return
+        self.remover(nome, [pk for pk, _ in documentos])
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO busca_{nome} (rowid, texto) VALUES (%s, %s)',
+                documentos,
+            )
+
+    def limpar(self, nome):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM busca_{nome}')
+
+    def consulta(self, palavras):
+        # Cada termo vira uma busca por prefixo; todos precisam casar (AND)
+        return ' '.join(f'"{palavra}"*' for palavra in palavras)
+
+    def ids(self, nome, consulta):
+        return f'SELECT rowid FROM busca_{nome} WHERE busca_{nome} MATCH %s', [consulta]
+
+    def relevancia(self, nome, consulta, coluna):
+        # bm25: menor é mais relevante
+        return (
+            f'(SELECT rank FROM busca_{nome} WHERE busca_{nome} MATCH %s AND rowid = {coluna})',
+            [consulta],
+        )
+
+
+class BackendPostgres:
+    """Índice tsvector + GIN do PostgreSQL (configuração 'portuguese')"""
+
+    configuracao = 'portuguese'
+
+    def criar_tabelas(self, cursor):
+        for nome in INDICES:
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS busca_{nome} ('
+                f'id integer PRIMARY KEY, documento tsvector NOT NULL)'
+            )
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS busca_{nome}_documento_idx '
+                f'ON busca_{nome} USING GIN (documento)'
+            )
+
+    def remover_tabelas(self, cursor):
+        for nome in INDICES:
+            cursor.execute(f'DROP TABLE IF EXISTS busca_{nome}')
+
+    def remover(self, nome, ids):
+        if not ids:
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM busca_{nome} WHERE id = ANY(%s)', [list(ids)])
+
+    def gravar(self, nome, documentos):
+        if not documentos:
+            return
+        # Os acentos são removidos aqui para não depender da extensão unaccent
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO busca_{nome} (id, documento) '
+                f"VALUES (%s, to_tsvector('{self.configuracao}', %s)) "
+                f'ON CONFLICT (id) DO UPDATE SET documento = EXCLUDED.documento',
+                [(pk, normalizar(texto)) for pk, texto in documentos],
+            )
+
+    def limpar(self, nome):
+        with connection.cursor() as cursor:
+            cursor.execute(f'TRUNCATE busca_{nome}')
+
+    def consulta(self, palavras):
+        return ' & '.join(f'{palavra}:*' for palavra in palavras)
+
+    def ids(self, nome, consulta):
+        return (
+            f"SELECT id FROM busca_{nome} WHERE documento @@ to_tsquery('{self.configuracao}', %s)",
+            [consulta],
+        )
+
+    def relevancia(self, nome, consulta, coluna):
+        # Negativo para valer a mesma ordem do SQLite (menor é mais relevante)
+        return (
+            f"(SELECT -ts_rank(documento, to_tsquery('{self.configuracao}', %s)) "
+            f'FROM busca_{nome} WHERE id = {coluna})',
+            [consulta],
+        )
+
+
+BACKENDS = {
+    'sqlite': BackendSQLite,
+    'postgresql': BackendPostgres,
+}
+
+
+def obter_backend(conexao=None):
+    """Retorna o backend do banco em uso, ou None se não houver suporte"""
+    classe = BACKENDS.get((conexao or connection).vendor)
+    return classe() if classe else None
@@ -0,0 +1,125 @@
+"""
+API do índice de busca: monta os documentos de Carro e Aluguel, grava no
+backend do banco em uso e faz as buscas ordenadas por relevância.
+
+A busca não tem limite de resultados: ela vira uma subconsulta no próprio
+queryset, então os outros filtros da listagem (status, período) valem sobre
+todos os registros que casam, não só sobre os mais relevantes.
+
+Quando o banco não tem backend de busca, as funções de busca retornam None
+e as views usam o filtro icontains de antes.
+"""
+from django.db.models import F, FloatField, Func
+from django.db.models.expressions import RawSQL
+
+from aluguel.models import Aluguel
+from carro.models import Carro
+
+from .backends import obter_backend, termos
+
+TAMANHO_LOTE = 2000
+
+
+def _placa(placa):
+    """A placa é indexada com e sem hífen (ABC-1234 e ABC1234)"""
+    placa = placa or ''
+    return f"{placa} {placa.replace('-', '')}"
+
+
+def _documentos_carros(queryset):
+    campos = queryset.values_list('pk', 'modelo', 'placa', 'descricao')
+    for pk, modelo, placa, descricao in campos.iterator(chunk_size=TAMANHO_LOTE):
+        yield pk, f'{modelo} {_placa(placa)} {descricao or ""}'
+
+
+def _documentos_alugueis(queryset):
+    campos = queryset.values_list(
+        'pk', 'carro__modelo', 'carro__placa',
+        'perfil_cliente__usuario__username', 'perfil_cliente__CNH',
+        'funcionario__username',
+    )
+    for pk, modelo, placa, username, cnh, funcionario in campos.iterator(chunk_size=TAMANHO_LOTE):
+        yield pk, f'{modelo} {_placa(placa)} {username} {cnh} {funcionario or ""}'
+
+
+def _gravar(nome, documentos):
+    backend = obter_backend()
+    if backend is None:
+        return
+    lote = []
+    for documento in documentos:
+        lote.append(documento)
+        if len(lote) >= TAMANHO_LOTE:
+            backend.gravar(nome, lote)
+            lote = []
+    backend.gravar(nome, lote)
+
+
+def indexar_carros(queryset):
+    """(Re)indexa os carros do queryset"""
+    _gravar('carro', _documentos_carros(queryset))
+
+
+def indexar_alugueis(queryset):
+    """(Re)indexa os aluguéis do queryset"""
+    _gravar('aluguel', _documentos_alugueis(queryset))
+
+
+def remover(nome, ids):
+    """Remove documentos do índice ('carro' ou 'aluguel')"""
+    backend = obter_backend()
+    if backend is not None:
+        backend.remover(nome, list(ids))
+
+
+def reindexar_tudo():
+    """Reconstrói os índices a partir das tabelas"""
+    backend = obter_backend()
+    if backend is None:
+        return False
+    backend.limpar('carro')
+    backend.limpar('aluguel')
+    indexar_carros(Carro.objects.order_by('pk'))
+    indexar_alugueis(Aluguel.objects.order_by('pk'))
+    return True
+
+
+class Relevancia(Func):
+    """Relevância do registro na busca (menor é mais relevante)"""
+
+    output_field = FloatField()
+
+    def __init__(self, backend, nome, consulta):
+        super().__init__(F('pk'))
+        self.backend, self.nome, self.consulta = backend, nome, consulta
+
+    def as_sql(self, compiler, connection, **extra_context):
+        coluna, parametros_coluna = compiler.compile(self.source_expressions[0])
+        sql, parametros = self.backend.relevancia(self.nome, self.consulta, coluna)
+        return sql, (*parametros, *parametros_coluna)
+
+
+def _buscar(queryset, nome, busca):
+    backend = obter_backend()
+    if backend is None:
+        return None
+    palavras = termos(busca)
+    if not palavras:
+        return queryset.none()
+    consulta = backend.consulta(palavras)
+    sql, parametros = backend.ids(nome, consulta)
+    return (
+        queryset.filter(pk__in=RawSQL(sql, parametros))
+        .annotate(relevancia=Relevancia(backend, nome, consulta))
+        .order_by('relevancia', '-pk')
+    )
+
+
+def buscar_carros(queryset, busca):
+    """Carros do queryset que casam com a busca, do mais relevante ao menos"""
+    return _buscar(queryset, 'carro', busca)
+
+
+def buscar_alugueis(queryset, busca):
+    """Aluguéis do queryset que casam com a busca, do mais relevante ao menos"""
+    return _buscar(queryset, 'aluguel', busca)
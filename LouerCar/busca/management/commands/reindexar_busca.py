@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from busca.indice import reindexar_tudo
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói o índice de busca textual de carros e aluguéis'
+
+    def handle(self, *args, **options):
+        if not reindexar_tudo():
+            self.stdout.write(self.style.WARNING('⚠️ Banco sem suporte a busca textual; nada a fazer.'))
+            return
+        self.stdout.write(self.style.SUCCESS('✅ Índice de busca reconstruído.'))
@@ -0,0 +1,44 @@
+from django.db import migrations
+
+from busca.backends import obter_backend
+
+
+def criar_tabelas(apps, schema_editor):
+    backend = obter_backend(schema_editor.connection)
+    if backend is not None:
+        with schema_editor.connection.cursor() as cursor:
+            backend.criar_tabelas(cursor)
+
+
+def remover_tabelas(apps, schema_editor):
+    backend = obter_backend(schema_editor.connection)
+    if backend is not None:
+        with schema_editor.connection.cursor() as cursor:
+            backend.remover_tabelas(cursor)
+
+
+def indexar_existentes(apps, schema_editor):
+    # Usa os models históricos: o índice nasce com os dados já cadastrados
+    backend = obter_backend(schema_editor.connection)
+    if backend is None:
+        return
+    Carro = apps.get_model('carro', 'Carro')
+    Aluguel = apps.get_model('aluguel', 'Aluguel')
+    from busca.indice import _documentos_alugueis, _documentos_carros
+    backend.gravar('carro', list(_documentos_carros(Carro.objects.all())))
+    backend.gravar('aluguel', list(_documentos_alugueis(Aluguel.objects.all())))
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('carro', '0004_alter_carro_preco_diaria'),
+        ('aluguel', '0005_emailpendente'),
+    ]
+
+    operations = [
+        migrations.RunPython(criar_tabelas, remover_tabelas),
+        migrations.RunPython(indexar_existentes, migrations.RunPython.noop),
+    ]
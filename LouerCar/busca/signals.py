@@ -0,0 +1,53 @@
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from aluguel.models import Aluguel
+from carro.models import Carro
+from user.models import PerfilCliente, Usuario
+
+from .indice import indexar_alugueis, indexar_carros, remover
+
+
+def _alterou(update_fields, campos):
+    """Sem update_fields o save gravou tudo; senão, só os campos listados"""
+    return update_fields is None or bool(set(update_fields) & campos)
+
+
+@receiver(post_save, sender=Carro)
+def carro_salvo(sender, instance, created, update_fields=None, **kwargs):
+    if not _alterou(update_fields, {'modelo', 'placa', 'descricao'}):
+        return
+    indexar_carros(Carro.objects.filter(pk=instance.pk))
+    if not created:
+        indexar_alugueis(Aluguel.objects.filter(carro_id=instance.pk))
+
+
+@receiver(post_delete, sender=Carro)
+def carro_removido(sender, instance, **kwargs):
+    remover('carro', [instance.pk])
+
+
+@receiver(post_save, sender=Aluguel)
+def aluguel_salvo(sender, instance, created, update_fields=None, **kwargs):
+    if _alterou(update_fields, {'carro', 'perfil_cliente', 'funcionario'}):
+        indexar_alugueis(Aluguel.objects.filter(pk=instance.pk))
+
+
+@receiver(post_delete, sender=Aluguel)
+def aluguel_removido(sender, instance, **kwargs):
+    remover('aluguel', [instance.pk])
+
+
+@receiver(post_save, sender=Usuario)
+def usuario_salvo(sender, instance, created, update_fields=None, **kwargs):
+    if not created and _alterou(update_fields, {'username'}):
+        indexar_alugueis(Aluguel.objects.filter(
+            Q(perfil_cliente__usuario_id=instance.pk) | Q(funcionario_id=instance.pk)
+        ))
+
+
+@receiver(post_save, sender=PerfilCliente)
+def perfil_salvo(sender, instance, created, update_fields=None, **kwargs):
+    if not created and _alterou(update_fields, {'CNH'}):
+        indexar_alugueis(Aluguel.objects.filter(perfil_cliente_id=instance.pk))
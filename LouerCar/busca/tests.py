@@ -0,0 +1,42 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from carro.models import Carro
+from user.models import Usuario
+
+from .indice import buscar_carros, reindexar_tudo
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class BuscaCarrosTest(TestCase):
+    """A busca é uma subconsulta: sem limite de resultados e combinável com outros filtros"""
+
+    @classmethod
+    def setUpTestData(cls):
+        Carro.objects.bulk_create(
+            Carro(modelo='Onix', placa=f'ONX-{n:04d}', ano=2024,
+                  status='manutencao' if n < 50 else 'disponivel')
+            for n in range(600)
+        )
+        Carro.objects.create(modelo='Onix Onix Plus', placa='PLS-0001', ano=2024)
+        Carro.objects.create(modelo='Gol', placa='GOL-0001', ano=2020)
+        reindexar_tudo()  # bulk_create não dispara os signals
+
+    def test_todos_os_resultados_com_filtro_de_status(self):
+        usuario = Usuario.objects.create(username='cliente', email='cliente@teste.com')
+        sessao = self.client.session
+        sessao['user_id'] = usuario.pk
+        sessao['is_staff'] = False
+        sessao.save()
+
+        resposta = self.client.get(reverse('carro_list'), {'q': 'Onix', 'status': 'manutencao'})
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(len(resposta.context['carros']), 50)
+
+    def test_ordem_de_relevancia(self):
+        carros = buscar_carros(Carro.objects.all(), 'onix')
+        self.assertEqual(carros.count(), 601)
+        self.assertEqual(carros[0].placa, 'PLS-0001')
+        self.assertEqual(list(buscar_carros(Carro.objects.all(), 'civic')), [])
+        self.assertEqual(buscar_carros(Carro.objects.all(), 'GOL0001').get().modelo, 'Gol')
+        self.assertFalse(buscar_carros(Carro.objects.all(), '  ').exists())
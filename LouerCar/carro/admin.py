@@ -1,5 +1,15 @@
-from django.contrib import admin
+import io
+
+from django.contrib import admin, messages
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+
+from .importacao import descrever_erro, formato_do_nome, importar, ler
 from .models import Carro
+from busca.indice import buscar_carros
+
+LIMITE_ERROS_EXIBIDOS = 200
 
 @admin.register(Carro)
 class CarroAdmin(admin.ModelAdmin):
@@ -26,4 +36,42 @@ class CarroAdmin(admin.ModelAdmin):
         """Torna a placa readonly após criação"""
         if obj:  # Editando
             return self.readonly_fields + ('placa',)
-        return self.readonly_fields
\ No newline at end of file
+        return self.readonly_fields
+
+    def get_search_results(self, request, queryset, search_term):
+        """Busca pelo índice textual quando disponível"""
+        encontrados = buscar_carros(queryset, search_term) if search_term else None
+        if encontrados is None:
+            return super().get_search_results(request, queryset, search_term)
+        return encontrados, False
+
+    def get_urls(self):
+        urls = [
+            path('importar/', self.admin_site.admin_view(self.importar_view), name='carro_carro_importar'),
+        ]
+        return urls + super().get_urls()
+
+    def importar_view(self, request):
+        """Importação de frota em lote (CSV ou JSON Lines)"""
+        if not self.has_add_permission(request):
+            return redirect('admin:carro_carro_changelist')
+
+        contexto = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Importar frota',
+        }
+        arquivo = request.FILES.get('arquivo')
+        if request.method == 'POST' and arquivo:
+            texto = io.TextIOWrapper(arquivo.file, encoding='utf-8-sig', newline='')
+            resultado = importar(
+                ler(texto, formato_do_nome(arquivo.name)),
+                simular=bool(request.POST.get('simular')),
+            )
+            contexto['resultado'] = resultado
+            contexto['erros'] = [descrever_erro(erro) for erro in resultado['erros'][:LIMITE_ERROS_EXIBIDOS]]
+            contexto['erros_ocultos'] = max(0, len(resultado['erros']) - LIMITE_ERROS_EXIBIDOS)
+            if resultado['importados'] and not request.POST.get('simular'):
+                messages.success(request, f"✅ {resultado['importados']} carro(s) importado(s)!")
+        return TemplateResponse(request, 'admin/carro/carro/importar.html', contexto)
+
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class CarroConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'carro'
+
+    def ready(self):
+        from . import signals  # noqa: F401
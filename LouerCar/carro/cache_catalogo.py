@@ -0,0 +1,166 @@
+"""
+Cache do catálogo: fragmentos por carro, a grade de carros disponíveis e a
+página inicial anônima inteira.
+
+- Fragmentos por carro ({% fragmento_carro %}) levam na chave o
+  atualizado_em do carro: qualquer gravação do carro (inclusive os update()
+  de aluguel/ocupacao.py, que também atualizam atualizado_em) muda a chave,
+  e a entrada antiga expira sozinha.
+- A grade de disponíveis ({% fragmento_catalogo %}) e a página inicial
+  (@cache_pagina_anonima) dependem do conjunto de carros: a chave leva a
+  versão do catálogo, incrementada pelos signals do Carro e por quem grava
+  carros sem signals (update(), bulk_create).
+- Acertos e falhas são contados no processo e somados no cache a cada
+  LIMITE_METRICAS eventos (ou INTERVALO_METRICAS segundos), para não custar
+  uma escrita no cache a cada fragmento com backends de arquivo ou banco.
+"""
+import threading
+import time
+from collections import Counter
+from functools import wraps
+
+from django.core.cache import cache
+from django.http import HttpResponse
+
+CACHE_TIMEOUT = 300  # segundos
+CACHE_KEY_VERSAO = 'catalogo:versao'
+PREFIXO_METRICAS = 'catalogo:metricas'
+LIMITE_METRICAS = 100
+INTERVALO_METRICAS = 30  # segundos
+
+# Nomes aceitos pelas template tags e pelo decorator (usados nas métricas)
+FRAGMENTOS = ('home', 'disponiveis', 'carro_home', 'carro_card', 'carro_linha', 'carro_detalhe')
+
+
+def versao_catalogo():
+    versao = cache.get(CACHE_KEY_VERSAO)
+    if versao is None:
+        versao = 1
+        cache.add(CACHE_KEY_VERSAO, versao, None)
+    return versao
+
+
+def invalidar_catalogo():
+    """Desatualiza a grade de disponíveis e a página inicial em todos os processos"""
+    try:
+        cache.incr(CACHE_KEY_VERSAO)
+    except ValueError:
+        cache.set(CACHE_KEY_VERSAO, 2, None)
+
+
+def chave(nome, *partes):
+    return ':'.join(['catalogo', nome, *(str(parte) for parte in partes)])
+
+
+def chave_carro(nome, carro, *partes):
+    """Chave de um fragmento do carro; muda a cada gravação do carro"""
+    return chave(nome, carro.pk, carro.atualizado_em.timestamp(), *partes)
+
+
+def chave_versionada(nome, *partes):
+    """Chave de um fragmento que depende do conjunto de carros"""
+    return chave(nome, f'v{versao_catalogo()}', *partes)
+
+
+# --- Métricas ---------------------------------------------------------------
+
+_lock = threading.Lock()
+_pendentes = Counter()
+_ultimo_envio = time.monotonic()
+
+
+def registrar(nome, acerto):
+    """Conta um acerto ou uma falha do fragmento `nome`"""
+    with _lock:
+        _pendentes[(nome, 'acertos' if acerto else 'falhas')] += 1
+        enviar = (
+            sum(_pendentes.values()) >= LIMITE_METRICAS
+            or time.monotonic() - _ultimo_envio >= INTERVALO_METRICAS
+        )
+    if enviar:
+        enviar_metricas()
+
+
+def enviar_metricas():
+    """Soma no cache as contagens acumuladas neste processo"""
+    global _ultimo_envio
+    with _lock:
+        pendentes = dict(_pendentes)
+        _pendentes.clear()
+        _ultimo_envio = time.monotonic()
+    for (nome, tipo), quantidade in pendentes.items():
+        chave_metrica = f'{PREFIXO_METRICAS}:{nome}:{tipo}'
+        cache.add(chave_metrica, 0, None)
+        try:
+            cache.incr(chave_metrica, quantidade)
+        except ValueError:
+            cache.set(chave_metrica, quantidade, None)
+
+
+def _chaves_metricas():
+    return {
+        (nome, tipo): f'{PREFIXO_METRICAS}:{nome}:{tipo}'
+        for nome in FRAGMENTOS
+        for tipo in ('acertos', 'falhas')
+    }
+
+
+def metricas():
+    """{nome: {'acertos', 'falhas', 'taxa'}} somando todos os processos"""
+    enviar_metricas()
+    chaves = _chaves_metricas()
+    valores = cache.get_many(chaves.values())
+    resultado = {}
+    for nome in FRAGMENTOS:
+        acertos = valores.get(chaves[(nome, 'acertos')], 0)
+        falhas = valores.get(chaves[(nome, 'falhas')], 0)
+        total = acertos + falhas
+        resultado[nome] = {
+            'acertos': acertos,
+            'falhas': falhas,
+            'taxa': acertos / total if total else None,
+        }
+    return resultado
+
+
+def zerar_metricas():
+    with _lock:
+        _pendentes.clear()
+    cache.delete_many(list(_chaves_metricas().values()))
+
+
+# --- Leitura ----------------------------------------------------------------
+
+def obter(nome, chave_cache, gerar):
+    """Texto do cache; na falha, gerar() monta o texto e ele é guardado"""
+    texto = cache.get(chave_cache)
+    registrar(nome, texto is not None)
+    if texto is None:
+        texto = gerar()
+        cache.set(chave_cache, texto, CACHE_TIMEOUT)
+    return texto
+
+
+def cache_pagina_anonima(nome):
+    """
+    Guarda a resposta inteira da view para visitantes sem login (GET sem
+    querystring), até a próxima mudança no catálogo.
+    """
+    def decorator(view):
+        @wraps(view)
+        def _view(request, *args, **kwargs):
+            if request.method != 'GET' or request.GET or request.session.get('user_id'):
+                return view(request, *args, **kwargs)
+
+            chave_cache = chave_versionada(nome)
+            conteudo = cache.get(chave_cache)
+            registrar(nome, conteudo is not None)
+            if conteudo is not None:
+                return HttpResponse(conteudo)
+
+            resposta = view(request, *args, **kwargs)
+            if resposta.status_code == 200 and not resposta.streaming:
+                cache.set(chave_cache, resposta.content, CACHE_TIMEOUT)
+            return resposta
+        return _view
+    return decorator
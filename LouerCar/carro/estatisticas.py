@@ -0,0 +1,31 @@
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from .models import Carro
+
+CACHE_KEY = 'estatisticas:frota'
+CACHE_TIMEOUT = 300  # segundos
+
+
+def calcular_estatisticas_frota():
+    """Conta os carros por status em uma única consulta (agregação condicional)"""
+    return Carro.objects.aggregate(
+        total=Count('pk'),
+        disponiveis=Count('pk', filter=Q(status='disponivel')),
+        alugados=Count('pk', filter=Q(status='alugado')),
+        manutencao=Count('pk', filter=Q(status='manutencao')),
+    )
+
+
+def estatisticas_frota():
+    """Retorna as estatísticas da frota usando o cache"""
+    estatisticas = cache.get(CACHE_KEY)
+    if estatisticas is None:
+        estatisticas = calcular_estatisticas_frota()
+        cache.set(CACHE_KEY, estatisticas, CACHE_TIMEOUT)
+    return estatisticas
+
+
+def invalidar_estatisticas_frota():
+    """Remove as estatísticas da frota do cache"""
+    cache.delete(CACHE_KEY)
@@ -1,5 +1,6 @@
 from django import forms
 from .models import Carro
+from .validacao import normalizar_placa, validar_ano, validar_preco_diaria
 from datetime import datetime
 
 class CarroForm(forms.ModelForm):
@@ -60,35 +61,12 @@ class CarroForm(forms.ModelForm):
     
     def clean_placa(self):
         """Converte a placa para maiúsculas e valida o formato"""
-        placa = self.cleaned_data.get('placa', '').upper().strip()
-        
-        # Remove espaços extras
-        placa = placa.replace(' ', '')
-        
-        # Valida tamanho
-        if len(placa) < 7 or len(placa) > 8:
-            raise forms.ValidationError('Placa deve ter 7 ou 8 caracteres')
-        
-        return placa
+        return normalizar_placa(self.cleaned_data.get('placa', ''))
     
     def clean_ano(self):
         """Valida o ano do carro"""
-        ano = self.cleaned_data.get('ano')
-        ano_atual = datetime.now().year
-        
-        if ano < 1900:
-            raise forms.ValidationError('Ano não pode ser anterior a 1900')
-        
-        if ano > ano_atual + 1:
-            raise forms.ValidationError(f'Ano não pode ser superior a {ano_atual + 1}')
-        
-        return ano
+        return validar_ano(self.cleaned_data.get('ano'))
     
     def clean_preco_diaria(self):
         """Valida o preço"""
-        preco = self.cleaned_data.get('preco_diaria')
-        
-        if preco is not None and preco <= 0:
-            raise forms.ValidationError('O preço deve ser maior que zero!')
-        
-        return preco
\ No newline at end of file
+        return validar_preco_diaria(self.cleaned_data.get('preco_diaria'))
\ No newline at end of file
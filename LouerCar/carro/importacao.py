@@ -0,0 +1,208 @@
+"""
+Importação de frota em lote a partir de CSV ou JSON Lines.
+
+O arquivo é lido em streaming e processado em lotes: cada lote passa pelas
+mesmas regras do CarroForm (carro/validacao.py), tem a unicidade das
+placas conferida com uma única consulta placa__in e é gravado com
+bulk_create dentro de uma transação própria. Linhas inválidas não
+interrompem a importação: vão para o relatório de erros com o número da
+linha no arquivo.
+
+Preço e URL da foto passam também pelo clean() do campo do model (casas
+decimais, dígitos, valores não finitos, tamanho), para nenhuma linha aceita
+aqui falhar depois no bulk_create, com lotes anteriores já gravados.
+O status 'alugado' não é aceito: ele vem dos aluguéis ativos do carro
+(aluguel/ocupacao.py) e seria desfeito pelo reconciliar_frota.
+"""
+import csv
+import json
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from busca.indice import indexar_carros
+from LouerCar.versoes import incrementar_apos_commit
+from relatorios.resumos import marcar_frota
+
+from .cache_catalogo import invalidar_catalogo
+from .estatisticas import invalidar_estatisticas_frota
+from .models import Carro
+from .validacao import normalizar_placa, validar_ano, validar_preco_diaria
+
+TAMANHO_LOTE = 1000
+STATUS_IMPORTAVEIS = {valor for valor, _ in Carro.STATUS_CHOICES} - {'alugado'}
+FORMATOS = ['csv', 'jsonl']
+
+
+def ler_csv(arquivo):
+    """(número da linha, registro) de um CSV com cabeçalho"""
+    leitor = csv.DictReader(arquivo)
+    for registro in leitor:
+        yield leitor.line_num, registro
+
+
+def ler_jsonl(arquivo):
+    """(número da linha, registro) de um arquivo JSON Lines"""
+    for numero, linha in enumerate(arquivo, start=1):
+        linha = linha.strip()
+        if not linha:
+            continue
+        try:
+            registro = json.loads(linha)
+        except ValueError:
+            registro = None
+        if not isinstance(registro, dict):
+            registro = {'__erro__': 'Linha não é um objeto JSON válido'}
+        yield numero, registro
+
+
+def ler(arquivo, formato):
+    return ler_csv(arquivo) if formato == 'csv' else ler_jsonl(arquivo)
+
+
+def formato_do_nome(nome):
+    """Deduz o formato pela extensão do arquivo"""
+    return 'jsonl' if nome.lower().endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+
+
+def _texto(valor):
+    return '' if valor is None else str(valor).strip()
+
+
+def _limpar_campo(nome, valor):
+    """Converte e valida o valor com as regras do campo do model"""
+    return Carro._meta.get_field(nome).clean(valor, None)
+
+
+def validar_registro(registro):
+    """Valida e converte um registro; retorna (Carro, erros por campo)"""
+    if '__erro__' in registro:
+        return None, {'linha': [registro['__erro__']]}
+
+    erros = {}
+    dados = {}
+
+    modelo = _texto(registro.get('modelo'))
+    if not modelo:
+        erros['modelo'] = ['Este campo é obrigatório.']
+    elif len(modelo) > 100:
+        erros['modelo'] = ['Máximo de 100 caracteres.']
+    dados['modelo'] = modelo
+
+    try:
+        dados['placa'] = normalizar_placa(_texto(registro.get('placa')))
+    except ValidationError as erro:
+        erros['placa'] = erro.messages
+
+    try:
+        dados['ano'] = validar_ano(int(_texto(registro.get('ano'))))
+    except ValueError:
+        erros['ano'] = ['Informe um número inteiro.']
+    except ValidationError as erro:
+        erros['ano'] = erro.messages
+
+    status = _texto(registro.get('status')) or 'disponivel'
+    if status == 'alugado':
+        erros['status'] = ['O status alugado vem dos aluguéis; importe como disponivel.']
+    elif status not in STATUS_IMPORTAVEIS:
+        erros['status'] = [f'Status inválido: {status}']
+    dados['status'] = status
+
+    preco = _texto(registro.get('preco_diaria'))
+    if preco:
+        try:
+            dados['preco_diaria'] = validar_preco_diaria(
+                _limpar_campo('preco_diaria', preco.replace(',', '.'))
+            )
+        except ValidationError as erro:
+            erros['preco_diaria'] = erro.messages
+
+    foto_url = _texto(registro.get('foto_url'))
+    if foto_url:
+        try:
+            dados['foto_url'] = _limpar_campo('foto_url', foto_url)
+        except ValidationError as erro:
+            erros['foto_url'] = erro.messages
+
+    dados['descricao'] = _texto(registro.get('descricao')) or None
+
+    if erros:
+        return None, erros
+    return Carro(**dados), {}
+
+
+def importar_lote(linhas, placas_vistas, simular=False):
+    """
+    Valida e grava um lote de (número da linha, registro).
+    Retorna (quantidade importada, lista de erros).
+    """
+    validos = []
+    erros = []
+    for numero, registro in linhas:
+        carro, erros_registro = validar_registro(registro)
+        if carro is None:
+            erros.append({'linha': numero, 'placa': _texto(registro.get('placa')), 'erros': erros_registro})
+        elif carro.placa in placas_vistas:
+            erros.append({'linha': numero, 'placa': carro.placa,
+                          'erros': {'placa': ['Placa repetida no arquivo.']}})
+        else:
+            placas_vistas.add(carro.placa)
+            validos.append((numero, carro))
+
+    # Unicidade no banco: uma consulta para o lote inteiro
+    existentes = set(
+        Carro.objects.filter(placa__in=[carro.placa for _, carro in validos])
+        .values_list('placa', flat=True)
+    )
+    novos = []
+    for numero, carro in validos:
+        if carro.placa in existentes:
+            erros.append({'linha': numero, 'placa': carro.placa,
+                          'erros': {'placa': ['Já existe um carro com esta placa.']}})
+        else:
+            novos.append(carro)
+
+    if novos and not simular:
+        with transaction.atomic():
+            criados = Carro.objects.bulk_create(novos)
+            # bulk_create não dispara signals: indexa para a busca aqui
+            indexar_carros(Carro.objects.filter(pk__in=[carro.pk for carro in criados]))
+            marcar_frota(timezone.localdate())
+
+    erros.sort(key=lambda erro: erro['linha'])
+    return len(novos), erros
+
+
+def importar(registros, tamanho_lote=TAMANHO_LOTE, simular=False):
+    """
+    Importa os registros (iterável de (número da linha, dict)) em lotes.
+    Retorna {'importados': n, 'erros': [{'linha', 'placa', 'erros'}]}.
+    """
+    resultado = {'importados': 0, 'erros': []}
+    placas_vistas = set()
+    lote = []
+    for item in registros:
+        lote.append(item)
+        if len(lote) >= tamanho_lote:
+            importados, erros = importar_lote(lote, placas_vistas, simular)
+            resultado['importados'] += importados
+            resultado['erros'] += erros
+            lote = []
+    if lote:
+        importados, erros = importar_lote(lote, placas_vistas, simular)
+        resultado['importados'] += importados
+        resultado['erros'] += erros
+
+    if resultado['importados'] and not simular:
+        invalidar_estatisticas_frota()
+        invalidar_catalogo()
+        incrementar_apos_commit('carro')
+    return resultado
+
+
+def descrever_erro(erro):
+    """Texto de uma linha do relatório de erros"""
+    mensagens = '; '.join(
+        f'{campo}: {" ".join(lista)}' for campo, lista in erro['erros'].items()
+    )
+    return f"Linha {erro['linha']} ({erro['placa'] or 'sem placa'}): {mensagens}"
@@ -0,0 +1,40 @@
+import csv
+
+from django.core.management.base import BaseCommand
+
+from carro.importacao import FORMATOS, TAMANHO_LOTE, descrever_erro, formato_do_nome, importar, ler
+
+
+class Command(BaseCommand):
+    help = 'Importa carros em lote de um arquivo CSV ou JSON Lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo', help='Arquivo CSV (com cabeçalho) ou JSON Lines')
+        parser.add_argument('--formato', choices=FORMATOS,
+                            help='Formato do arquivo (padrão: pela extensão)')
+        parser.add_argument('--lote', type=int, default=TAMANHO_LOTE, help='Linhas por transação')
+        parser.add_argument('--simular', action='store_true', help='Só valida, não grava nada')
+        parser.add_argument('--relatorio', help='Grava os erros neste arquivo CSV')
+
+    def handle(self, *args, **options):
+        formato = options['formato'] or formato_do_nome(options['arquivo'])
+        with open(options['arquivo'], encoding='utf-8-sig', newline='') as arquivo:
+            resultado = importar(ler(arquivo, formato), options['lote'], options['simular'])
+
+        erros = resultado['erros']
+        if options['relatorio']:
+            with open(options['relatorio'], 'w', encoding='utf-8', newline='') as saida:
+                escritor = csv.writer(saida)
+                escritor.writerow(['linha', 'placa', 'campo', 'erro'])
+                for erro in erros:
+                    for campo, mensagens in erro['erros'].items():
+                        for mensagem in mensagens:
+                            escritor.writerow([erro['linha'], erro['placa'], campo, mensagem])
+        else:
+            for erro in erros:
+                self.stderr.write(descrever_erro(erro))
+
+        acao = 'validado(s)' if options['simular'] else 'importado(s)'
+        self.stdout.write(self.style.SUCCESS(f"✅ {resultado['importados']} carro(s) {acao}"))
+        if erros:
+            self.stdout.write(self.style.WARNING(f'⚠️  {len(erros)} linha(s) com erro'))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from carro.cache_catalogo import metricas, zerar_metricas
+
+
+class Command(BaseCommand):
+    help = 'Mostra acertos e falhas do cache do catálogo (fragmentos e página inicial)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--zerar', action='store_true', help='Zera as contagens depois de mostrar')
+
+    def handle(self, *args, **options):
+        for nome, valores in metricas().items():
+            taxa = '-' if valores['taxa'] is None else f"{valores['taxa']:.1%}"
+            self.stdout.write(
+                f"{nome:<15} acertos={valores['acertos']:<8} falhas={valores['falhas']:<8} taxa={taxa}"
+            )
+        if options['zerar']:
+            zerar_metricas()
+            self.stdout.write(self.style.SUCCESS('✅ Contagens zeradas'))
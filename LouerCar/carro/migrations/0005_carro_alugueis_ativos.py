@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:02
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def contar_alugueis_ativos(apps, schema_editor):
+    Carro = apps.get_model('carro', 'Carro')
+    Aluguel = apps.get_model('aluguel', 'Aluguel')
+    ativos = (
+        Aluguel.objects.filter(carro=OuterRef('pk'), status='ativo')
+        .order_by().values('carro').annotate(total=Count('pk')).values('total')
+    )
+    Carro.objects.update(
+        alugueis_ativos=Coalesce(Subquery(ativos, output_field=IntegerField()), 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('carro', '0004_alter_carro_preco_diaria'),
+        ('aluguel', '0006_indices_vencimento'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='carro',
+            name='alugueis_ativos',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(contar_alugueis_ativos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('carro', '0005_carro_alugueis_ativos'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='carro',
+            index=models.Index(fields=['atualizado_em', 'id_carro'], name='carro_atualizado_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('carro', '0006_indice_atualizado'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='carro',
+            index=models.Index(fields=['-criado_em'], name='carro_criado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='carro',
+            index=models.Index(fields=['status', '-criado_em'], name='carro_status_criado_idx'),
+        ),
+    ]
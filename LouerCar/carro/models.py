@@ -12,6 +12,8 @@ class Carro(models.Model):
     placa = models.CharField(max_length=10, unique=True)
     ano = models.IntegerField()
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='disponivel')
+    # Mantido por aluguel/ocupacao.py; conferido pelo comando reconciliar_frota
+    alugueis_ativos = models.PositiveIntegerField(default=0, editable=False)
     
     # ⭐ CAMPOS OBRIGATÓRIOS ⭐
     preco_diaria = models.DecimalField(
@@ -40,6 +42,13 @@ class Carro(models.Model):
         verbose_name = 'Carro'
         verbose_name_plural = 'Carros'
         ordering = ['-criado_em']
+        indexes = [
+            # Feed da sincronização incremental (sincronizacao/feed.py)
+            models.Index(fields=['atualizado_em', 'id_carro'], name='carro_atualizado_idx'),
+            # Listagens: ordenação padrão, com ou sem filtro de status
+            models.Index(fields=['-criado_em'], name='carro_criado_idx'),
+            models.Index(fields=['status', '-criado_em'], name='carro_status_criado_idx'),
+        ]
     
     def __str__(self):
         return f"{self.modelo} - {self.placa}"
@@ -0,0 +1,16 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from LouerCar.versoes import incrementar_apos_commit
+
+from .cache_catalogo import invalidar_catalogo
+from .estatisticas import invalidar_estatisticas_frota
+from .models import Carro
+
+
+@receiver([post_save, post_delete], sender=Carro)
+def carro_alterado(sender, instance, **kwargs):
+    """Invalida as estatísticas da frota e o cache do catálogo quando um carro muda"""
+    invalidar_estatisticas_frota()
+    invalidar_catalogo()
+    incrementar_apos_commit('carro')
@@ -0,0 +1,64 @@
+"""
+Template tags de cache do catálogo (ver carro/cache_catalogo.py).
+
+    {% load catalogo %}
+    {% fragmento_carro 'carro_linha' carro request.session.is_staff %} ... {% endfragmento_carro %}
+    {% fragmento_catalogo 'disponiveis' %} ... {% endfragmento_catalogo %}
+"""
+from django import template
+
+from carro import cache_catalogo
+
+register = template.Library()
+
+
+class FragmentoNode(template.Node):
+    def __init__(self, nodelist, nome, carro, partes):
+        self.nodelist = nodelist
+        self.nome = nome
+        self.carro = carro
+        self.partes = partes
+
+    def render(self, context):
+        partes = [parte.resolve(context) for parte in self.partes]
+        if self.carro is None:
+            chave = cache_catalogo.chave_versionada(self.nome, *partes)
+        else:
+            chave = cache_catalogo.chave_carro(self.nome, self.carro.resolve(context), *partes)
+        return cache_catalogo.obter(self.nome, chave, lambda: self.nodelist.render(context))
+
+
+def _nome(bits):
+    nome = bits[1].strip('\'"')
+    if nome not in cache_catalogo.FRAGMENTOS:
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}': fragmento desconhecido '{nome}' (veja cache_catalogo.FRAGMENTOS)"
+        )
+    return nome
+
+
+@register.tag
+def fragmento_carro(parser, token):
+    """Fragmento de um carro; a chave muda a cada gravação do carro"""
+    bits = token.split_contents()
+    if len(bits) < 3:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' precisa do nome do fragmento e do carro")
+    nodelist = parser.parse(('endfragmento_carro',))
+    parser.delete_first_token()
+    return FragmentoNode(
+        nodelist, _nome(bits), parser.compile_filter(bits[2]),
+        [parser.compile_filter(bit) for bit in bits[3:]],
+    )
+
+
+@register.tag
+def fragmento_catalogo(parser, token):
+    """Fragmento que depende do conjunto de carros; muda com a versão do catálogo"""
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' precisa do nome do fragmento")
+    nodelist = parser.parse(('endfragmento_catalogo',))
+    parser.delete_first_token()
+    return FragmentoNode(
+        nodelist, _nome(bits), None, [parser.compile_filter(bit) for bit in bits[2:]],
+    )
@@ -1,3 +1,161 @@
-from django.test import TestCase
+import csv
+import io
+import os
+import tempfile
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from user.models import Usuario
+
+from . import cache_catalogo, importacao
+from .estatisticas import estatisticas_frota
+from .models import Carro
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class CacheCatalogoTest(TestCase):
+    """Fragmentos e página inicial em cache, invalidados quando os carros mudam"""
+
+    def setUp(self):
+        cache.clear()
+        cache_catalogo.zerar_metricas()
+        self.carro = Carro.objects.create(modelo='Onix', placa='ABC-1234', ano=2024)
+
+    def entrar(self, **campos):
+        usuario = Usuario.objects.create(username='cliente', email='cliente@teste.com', **campos)
+        sessao = self.client.session
+        sessao['user_id'] = usuario.pk
+        sessao['is_staff'] = usuario.is_staff
+        sessao.save()
+
+    def test_home_anonima_em_cache(self):
+        self.client.get(reverse('home'))
+        with self.assertNumQueries(0):
+            resposta = self.client.get(reverse('home'))
+        self.assertContains(resposta, 'Onix')
+
+        self.carro.modelo = 'Onix Plus'
+        self.carro.save()
+        self.assertContains(self.client.get(reverse('home')), 'Onix Plus')
+
+        home = cache_catalogo.metricas()['home']
+        self.assertEqual((home['acertos'], home['falhas']), (1, 2))
+
+    def test_fragmento_segue_atualizado_em(self):
+        self.entrar()
+        self.client.get(reverse('carro_detail', args=[self.carro.pk]))
+        self.client.get(reverse('carro_detail', args=[self.carro.pk]))
+
+        # update() também muda atualizado_em (como em aluguel/ocupacao.py)
+        Carro.objects.filter(pk=self.carro.pk).update(preco_diaria=99, atualizado_em=self.carro.criado_em)
+        self.assertContains(self.client.get(reverse('carro_detail', args=[self.carro.pk])), 'R$ 99')
+
+        detalhe = cache_catalogo.metricas()['carro_detalhe']
+        self.assertEqual((detalhe['acertos'], detalhe['falhas']), (1, 2))
+
+    def test_grade_de_disponiveis(self):
+        self.entrar()
+        self.client.get(reverse('dashboard_cliente'))
+        self.assertContains(self.client.get(reverse('dashboard_cliente')), 'Onix')
+
+        self.carro.status = 'manutencao'
+        self.carro.save()
+        self.assertNotContains(self.client.get(reverse('dashboard_cliente')), 'ABC-1234')
+
+
+class EstatisticasFrotaTest(TestCase):
+    """Contagens da frota em uma consulta, em cache até um carro mudar"""
+
+    def setUp(self):
+        cache.clear()
+        for n, status in enumerate(['disponivel', 'disponivel', 'alugado', 'manutencao']):
+            Carro.objects.create(modelo='Onix', placa=f'EST{n:04d}', ano=2024, status=status)
+
+    def test_cache_e_invalidacao(self):
+        with self.assertNumQueries(1):
+            estatisticas = estatisticas_frota()
+        self.assertEqual(estatisticas, {'total': 4, 'disponiveis': 2, 'alugados': 1, 'manutencao': 1})
+        with self.assertNumQueries(0):
+            self.assertEqual(estatisticas_frota(), estatisticas)
+
+        carro = Carro.objects.get(placa='EST0003')
+        carro.status = 'disponivel'
+        carro.save()
+        self.assertEqual(estatisticas_frota()['disponiveis'], 3)
+        carro.delete()
+        self.assertEqual(estatisticas_frota()['total'], 3)
+
+
+class ImportacaoFrotaTest(TestCase):
+    """Importação em lote: linhas inválidas vão para o relatório sem derrubar o arquivo"""
+
+    CSV = (
+        'modelo,placa,ano,status,preco_diaria,foto_url\n'
+        'Onix,AAA-0001,2024,,89.90,\n'                      # 2: ok
+        'Gol,AAA-0002,2020,manutencao,"120,50",\n'          # 3: ok (vírgula decimal)
+        'HB20,AAA-0003,2022,,Infinity,\n'                   # 4: não finito
+        'Argo,AAA-0004,2022,,1e12,\n'                       # 5: mais de 10 dígitos
+        'Mobi,AAA-0005,2022,,12.345,\n'                     # 6: 3 casas decimais
+        'Kwid,AAA-0006,2022,alugado,100,\n'                 # 7: alugado vem dos aluguéis
+        'Up,AAA-0007,2022,,100,nao-e-url\n'                 # 8: URL inválida
+        'Onix,AAA-0001,2024,,89.90,\n'                      # 9: placa repetida no arquivo
+        'Polo,ABC-1234,2023,,100,\n'                        # 10: placa já cadastrada
+        'Cronos,AAA-0010,2023,,100,https://exemplo.com/cronos.jpg\n'  # 11: ok
+    )
+
+    def setUp(self):
+        cache.clear()
+        Carro.objects.create(modelo='Onix', placa='ABC-1234', ano=2024)
+
+    def test_erros_por_linha_em_varios_lotes(self):
+        resultado = importacao.importar(importacao.ler(io.StringIO(self.CSV), 'csv'), tamanho_lote=3)
+
+        self.assertEqual(resultado['importados'], 3)
+        erros = {erro['linha']: set(erro['erros']) for erro in resultado['erros']}
+        self.assertEqual(erros, {
+            4: {'preco_diaria'}, 5: {'preco_diaria'}, 6: {'preco_diaria'}, 7: {'status'},
+            8: {'foto_url'}, 9: {'placa'}, 10: {'placa'},
+        })
+        self.assertEqual(Carro.objects.get(placa='AAA-0002').preco_diaria, Decimal('120.50'))
+        self.assertEqual(Carro.objects.get(placa='AAA-0002').status, 'manutencao')
+        self.assertFalse(Carro.objects.filter(status='alugado').exists())
+
+    def test_simular_nao_grava(self):
+        resultado = importacao.importar(importacao.ler(io.StringIO(self.CSV), 'csv'), simular=True)
+        self.assertEqual(resultado['importados'], 3)
+        self.assertEqual(Carro.objects.count(), 1)
+
+    def test_comando_com_relatorio(self):
+        with tempfile.TemporaryDirectory() as pasta:
+            entrada = os.path.join(pasta, 'frota.jsonl')
+            relatorio = os.path.join(pasta, 'erros.csv')
+            with open(entrada, 'w', encoding='utf-8') as arquivo:
+                arquivo.write('{"modelo": "Onix", "placa": "JSN-0001", "ano": 2024}\n')
+                arquivo.write('não é json\n')
+                arquivo.write('{"modelo": "Gol", "placa": "JSN-0002", "ano": 2020, "preco_diaria": "Infinity"}\n')
+            saida = io.StringIO()
+            call_command('importar_frota', entrada, relatorio=relatorio, stdout=saida)
+            with open(relatorio, encoding='utf-8') as arquivo:
+                linhas = list(csv.DictReader(arquivo))
+
+        self.assertIn('1 carro(s) importado(s)', saida.getvalue())
+        self.assertEqual([(linha['linha'], linha['campo']) for linha in linhas],
+                         [('2', 'linha'), ('3', 'preco_diaria')])
+        self.assertTrue(Carro.objects.filter(placa='JSN-0001').exists())
+
+    @override_settings(ALLOWED_HOSTS=['testserver'])
+    def test_admin(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@teste.com', 'senha'))
+        arquivo = SimpleUploadedFile('frota.csv', self.CSV.encode('utf-8'), content_type='text/csv')
+        resposta = self.client.post(reverse('admin:carro_carro_importar'), {'arquivo': arquivo})
+
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta.context['resultado']['importados'], 3)
+        self.assertEqual(len(resposta.context['erros']), 7)
+        self.assertEqual(Carro.objects.count(), 4)
@@ -0,0 +1,34 @@
+"""
+Regras de validação dos campos do Carro, usadas pelo CarroForm e pela
+importação em lote (carro/importacao.py).
+"""
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+
+ANO_MINIMO = 1900
+
+
+def normalizar_placa(placa):
+    """Converte a placa para maiúsculas, remove espaços e valida o tamanho"""
+    placa = (placa or '').upper().strip().replace(' ', '')
+    if len(placa) < 7 or len(placa) > 8:
+        raise ValidationError('Placa deve ter 7 ou 8 caracteres')
+    return placa
+
+
+def validar_ano(ano):
+    """O ano deve estar entre 1900 e o ano que vem"""
+    ano_atual = datetime.now().year
+    if ano < ANO_MINIMO:
+        raise ValidationError('Ano não pode ser anterior a 1900')
+    if ano > ano_atual + 1:
+        raise ValidationError(f'Ano não pode ser superior a {ano_atual + 1}')
+    return ano
+
+
+def validar_preco_diaria(preco):
+    """O preço, se informado, deve ser positivo"""
+    if preco is not None and preco <= 0:
+        raise ValidationError('O preço deve ser maior que zero!')
+    return preco
@@ -1,11 +1,35 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from .models import Carro
 from .forms import CarroForm
+from .estatisticas import estatisticas_frota
 from user.decorators import staff_required, cliente_required
+from aluguel.disponibilidade import carros_livres
+from busca.indice import buscar_carros
+from LouerCar.versoes import resposta_condicional
+
+
+def _parse_periodo(request):
+    """Lê o período (data_inicio/data_fim) da querystring, se válido"""
+    try:
+        data_inicio = parse_datetime(request.GET.get('data_inicio') or '')
+        data_fim = parse_datetime(request.GET.get('data_fim') or '')
+    except ValueError:  # bem formada, mas impossível (ex.: mês 13)
+        return None, None
+    if not data_inicio or not data_fim or data_fim <= data_inicio:
+        return None, None
+    if timezone.is_naive(data_inicio):
+        data_inicio = timezone.make_aware(data_inicio)
+    if timezone.is_naive(data_fim):
+        data_fim = timezone.make_aware(data_fim)
+    return data_inicio, data_fim
+
 
 @cliente_required  # Qualquer usuário pode VER carros
+@resposta_condicional('carro', 'aluguel')  # 304 se nada mudou (o filtro por período lê aluguéis)
 def carro_list(request):
     """Lista todos os carros com filtros de busca"""
     carros = Carro.objects.all()
@@ -13,30 +37,38 @@ def carro_list(request):
     # Filtro de busca
     query = request.GET.get('q')
     if query:
-        carros = carros.filter(
-            Q(modelo__icontains=query) |
-            Q(placa__icontains=query)
-        )
+        encontrados = buscar_carros(carros, query)
+        if encontrados is not None:
+            carros = encontrados
+        else:
+            carros = carros.filter(
+                Q(modelo__icontains=query) |
+                Q(placa__icontains=query)
+            )
     
     # Filtro por status
     status_filter = request.GET.get('status')
     if status_filter:
         carros = carros.filter(status=status_filter)
     
-    # Estatísticas
-    total_carros = Carro.objects.count()
-    disponiveis = Carro.objects.filter(status='disponivel').count()
-    alugados = Carro.objects.filter(status='alugado').count()
-    manutencao = Carro.objects.filter(status='manutencao').count()
+    # Filtro por período (apenas carros livres nas datas pedidas)
+    data_inicio, data_fim = _parse_periodo(request)
+    if data_inicio:
+        carros = carros_livres(carros, data_inicio, data_fim)
+    
+    # Estatísticas (uma consulta, com cache)
+    estatisticas = estatisticas_frota()
     
     context = {
         'carros': carros,
-        'total_carros': total_carros,
-        'disponiveis': disponiveis,
-        'alugados': alugados,
-        'manutencao': manutencao,
+        'total_carros': estatisticas['total'],
+        'disponiveis': estatisticas['disponiveis'],
+        'alugados': estatisticas['alugados'],
+        'manutencao': estatisticas['manutencao'],
         'query': query,
         'status_filter': status_filter,
+        'data_inicio': request.GET.get('data_inicio', ''),
+        'data_fim': request.GET.get('data_fim', ''),
     }
     
     return render(request, 'carro/carro_list.html', context)
@@ -97,6 +129,7 @@ def carro_delete(request, pk):
 
 
 @cliente_required  # Qualquer usuário pode VER detalhes
+@resposta_condicional('carro')
 def carro_detail(request, pk):
     """Exibe detalhes de um carro"""
     carro = get_object_or_404(Carro, pk=pk)
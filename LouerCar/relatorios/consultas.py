@@ -0,0 +1,75 @@
+"""
+Leituras dos relatórios, só sobre as tabelas de resumo (relatorios/resumos.py):
+nenhuma consulta percorre aluguéis ou pagamentos.
+"""
+from django.db.models import Sum
+
+from .models import ResumoCarroDiario, ResumoDiario, ResumoFuncionarioDiario, latencia_media, utilizacao
+from .resumos import dias_entre
+
+
+def serie_diaria(inicio, fim):
+    """Um ResumoDiario por dia do intervalo (dias sem resumo vêm zerados), para gráficos"""
+    resumos = {resumo.dia: resumo for resumo in ResumoDiario.objects.filter(dia__range=(inicio, fim))}
+    return [resumos.get(dia) or ResumoDiario(dia=dia) for dia in dias_entre(inicio, fim)]
+
+
+def totais(inicio, fim):
+    """Somas do intervalo, com utilização (%) e latências médias"""
+    soma = ResumoDiario.objects.filter(dia__range=(inicio, fim)).aggregate(
+        receita=Sum('receita'),
+        dias_alugados=Sum('dias_alugados'),
+        carro_dias=Sum('frota'),
+        alugueis=Sum('alugueis'),
+        aprovacoes=Sum('aprovacoes'),
+        latencia_aprovacao=Sum('latencia_aprovacao'),
+        pagamentos=Sum('pagamentos'),
+        valor_recebido=Sum('valor_recebido'),
+        latencia_pagamento=Sum('latencia_pagamento'),
+    )
+    soma = {campo: valor or 0 for campo, valor in soma.items()}
+    soma['utilizacao'] = utilizacao(soma['dias_alugados'], soma['carro_dias'])
+    soma['latencia_media_aprovacao'] = latencia_media(soma['latencia_aprovacao'], soma['aprovacoes'])
+    soma['latencia_media_pagamento'] = latencia_media(soma['latencia_pagamento'], soma['pagamentos'])
+    return soma
+
+
+def por_carro(inicio, fim, limite=20):
+    """Carros com maior receita no intervalo, com utilização (%)"""
+    dias = (fim - inicio).days + 1
+    carros = list(
+        ResumoCarroDiario.objects.filter(dia__range=(inicio, fim))
+        .values('carro_id', 'carro__modelo', 'carro__placa')
+        .annotate(receita=Sum('receita'), dias_alugados=Sum('dias_alugados'))
+        .order_by('-receita', 'carro_id')[:limite]
+    )
+    for carro in carros:
+        carro['utilizacao'] = utilizacao(carro['dias_alugados'], dias)
+    return carros
+
+
+def por_funcionario(inicio, fim):
+    """Aluguéis, receita contratada e latência média de aprovação por funcionário"""
+    funcionarios = list(
+        ResumoFuncionarioDiario.objects.filter(dia__range=(inicio, fim))
+        .values('funcionario_id', 'funcionario__username')
+        .annotate(
+            alugueis=Sum('alugueis'), receita=Sum('receita'),
+            aprovacoes=Sum('aprovacoes'), latencia_aprovacao=Sum('latencia_aprovacao'),
+        )
+        .order_by('-alugueis', 'funcionario_id')
+    )
+    for funcionario in funcionarios:
+        funcionario['latencia_media_aprovacao'] = latencia_media(
+            funcionario['latencia_aprovacao'], funcionario['aprovacoes']
+        )
+    return funcionarios
+
+
+def grafico(serie):
+    """Dados da série diária no formato do gráfico (json_script)"""
+    return {
+        'dias': [resumo.dia.strftime('%d/%m') for resumo in serie],
+        'receita': [float(resumo.receita) for resumo in serie],
+        'utilizacao': [float(resumo.utilizacao) for resumo in serie],
+    }
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from relatorios.resumos import TAMANHO_LOTE, reconstruir
+
+
+def _data(valor):
+    if not valor:
+        return None
+    try:
+        data = parse_date(valor)
+    except ValueError:
+        data = None
+    if data is None:
+        raise CommandError(f'Data inválida: {valor} (use AAAA-MM-DD)')
+    return data
+
+
+class Command(BaseCommand):
+    help = 'Recalcula do zero os resumos diários de receita, utilização e latências'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--inicio', help='Primeiro dia (AAAA-MM-DD); padrão: início do histórico')
+        parser.add_argument('--fim', help='Último dia (AAAA-MM-DD); padrão: fim do histórico')
+        parser.add_argument('--lote', type=int, default=TAMANHO_LOTE, help='Carros por consulta')
+
+    def handle(self, *args, **options):
+        dias = reconstruir(_data(options['inicio']), _data(options['fim']), tamanho_lote=options['lote'])
+        self.stdout.write(self.style.SUCCESS(f'✅ {dias} dia(s) recalculado(s)'))
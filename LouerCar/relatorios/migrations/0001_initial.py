@@ -0,0 +1,73 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('carro', '0006_indice_atualizado'),
+        ('user', '0003_tag_grupo_atualizado_em_grupo_criado_em_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumoDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.DateField(unique=True)),
+                ('receita', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('dias_alugados', models.DecimalField(decimal_places=4, default=0, max_digits=12)),
+                ('frota', models.PositiveIntegerField(default=0)),
+                ('alugueis', models.PositiveIntegerField(default=0)),
+                ('aprovacoes', models.PositiveIntegerField(default=0)),
+                ('latencia_aprovacao', models.BigIntegerField(default=0)),
+                ('pagamentos', models.PositiveIntegerField(default=0)),
+                ('valor_recebido', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('latencia_pagamento', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Resumo Diário',
+                'verbose_name_plural': 'Resumos Diários',
+                'db_table': 'resumo_diario',
+                'ordering': ['dia'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumoCarroDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.DateField()),
+                ('receita', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('dias_alugados', models.DecimalField(decimal_places=4, default=0, max_digits=7)),
+                ('carro', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumos_diarios', to='carro.carro')),
+            ],
+            options={
+                'verbose_name': 'Resumo Diário do Carro',
+                'verbose_name_plural': 'Resumos Diários dos Carros',
+                'db_table': 'resumo_carro_diario',
+                'constraints': [models.UniqueConstraint(fields=('dia', 'carro'), name='resumo_carro_dia_unico')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumoFuncionarioDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.DateField()),
+                ('alugueis', models.PositiveIntegerField(default=0)),
+                ('receita', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('aprovacoes', models.PositiveIntegerField(default=0)),
+                ('latencia_aprovacao', models.BigIntegerField(default=0)),
+                ('funcionario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumos_diarios', to='user.usuario')),
+            ],
+            options={
+                'verbose_name': 'Resumo Diário do Funcionário',
+                'verbose_name_plural': 'Resumos Diários dos Funcionários',
+                'db_table': 'resumo_funcionario_diario',
+                'constraints': [models.UniqueConstraint(fields=('dia', 'funcionario'), name='resumo_funcionario_dia_unico')],
+            },
+        ),
+    ]
@@ -0,0 +1,101 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import models
+
+from carro.models import Carro
+from user.models import Usuario
+
+
+def utilizacao(dias_alugados, carro_dias):
+    """Percentual dos carro-dias disponíveis que ficaram alugados"""
+    if not carro_dias:
+        return Decimal(0)
+    return (Decimal(dias_alugados) * 100 / Decimal(carro_dias)).quantize(Decimal('0.1'))
+
+
+def latencia_media(soma_segundos, quantidade):
+    if not quantidade:
+        return None
+    return timedelta(seconds=round(soma_segundos / quantidade))
+
+
+class ResumoDiario(models.Model):
+    """
+    Totais de um dia (fuso local), mantidos por relatorios/resumos.py.
+    Latências são somas em segundos; a média é soma / quantidade.
+    """
+    dia = models.DateField(unique=True)
+    # Valor dos aluguéis ativos/finalizados rateado pelas horas de cada dia
+    receita = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    dias_alugados = models.DecimalField(max_digits=12, decimal_places=4, default=0)
+    frota = models.PositiveIntegerField(default=0)
+    # Aluguéis criados no dia e, destes, os que vieram de uma solicitação
+    alugueis = models.PositiveIntegerField(default=0)
+    aprovacoes = models.PositiveIntegerField(default=0)
+    latencia_aprovacao = models.BigIntegerField(default=0)
+    # Pagamentos confirmados no dia
+    pagamentos = models.PositiveIntegerField(default=0)
+    valor_recebido = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    latencia_pagamento = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'resumo_diario'
+        verbose_name = 'Resumo Diário'
+        verbose_name_plural = 'Resumos Diários'
+        ordering = ['dia']
+
+    def __str__(self):
+        return f"Resumo de {self.dia:%d/%m/%Y}"
+
+    @property
+    def utilizacao(self):
+        return utilizacao(self.dias_alugados, self.frota)
+
+    @property
+    def latencia_media_aprovacao(self):
+        return latencia_media(self.latencia_aprovacao, self.aprovacoes)
+
+    @property
+    def latencia_media_pagamento(self):
+        return latencia_media(self.latencia_pagamento, self.pagamentos)
+
+
+class ResumoCarroDiario(models.Model):
+    """Receita e ocupação de um carro em um dia"""
+    dia = models.DateField()
+    carro = models.ForeignKey(Carro, on_delete=models.CASCADE, related_name='resumos_diarios')
+    receita = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    dias_alugados = models.DecimalField(max_digits=7, decimal_places=4, default=0)
+
+    class Meta:
+        db_table = 'resumo_carro_diario'
+        verbose_name = 'Resumo Diário do Carro'
+        verbose_name_plural = 'Resumos Diários dos Carros'
+        constraints = [
+            models.UniqueConstraint(fields=['dia', 'carro'], name='resumo_carro_dia_unico'),
+        ]
+
+    def __str__(self):
+        return f"Carro #{self.carro_id} em {self.dia:%d/%m/%Y}"
+
+
+class ResumoFuncionarioDiario(models.Model):
+    """Aluguéis registrados e aprovações de um funcionário em um dia"""
+    dia = models.DateField()
+    funcionario = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name='resumos_diarios')
+    alugueis = models.PositiveIntegerField(default=0)
+    receita = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    aprovacoes = models.PositiveIntegerField(default=0)
+    latencia_aprovacao = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'resumo_funcionario_diario'
+        verbose_name = 'Resumo Diário do Funcionário'
+        verbose_name_plural = 'Resumos Diários dos Funcionários'
+        constraints = [
+            models.UniqueConstraint(fields=['dia', 'funcionario'], name='resumo_funcionario_dia_unico'),
+        ]
+
+    def __str__(self):
+        return f"Funcionário #{self.funcionario_id} em {self.dia:%d/%m/%Y}"
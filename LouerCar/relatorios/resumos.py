@@ -0,0 +1,387 @@
+"""
+Resumos diários (rollups) de receita, utilização da frota e latências.
+
+Três tabelas, por dia local: ResumoCarroDiario (dia, carro),
+ResumoFuncionarioDiario (dia, funcionário) e ResumoDiario (dia), este
+somado das outras duas e dos pagamentos do dia. Os relatórios só leem os
+resumos: o custo depende do número de dias (e de carros/funcionários),
+não do número de aluguéis e pagamentos.
+
+Atualização incremental: os signals (e quem grava com update()) marcam as
+chaves afetadas por uma escrita com marcar_aluguel()/marcar_dias(). Depois
+do commit, atualizar_pendentes() recalcula só essas chaves a partir dos
+aluguéis e pagamentos, por consultas indexadas (carro + período,
+funcionário, pagamento aprovado + data). Recalcular em vez de somar
+diferenças deixa cada linha sempre igual ao que reconstruir() gravaria,
+sem acumular erro de arredondamento.
+
+reconstruir() (comando recalcular_resumos) refaz um intervalo inteiro, em
+lotes de carros; serve de carga inicial e de conferência.
+
+Regras:
+- Receita do dia: o valor de cada aluguel ativo ou finalizado é rateado
+  pelos segundos do período que caem no dia.
+- dias_alugados: fração do dia em que o carro esteve alugado (no máximo 1).
+- frota: carros cadastrados até o fim do dia (carros removidos saem de
+  todo o histórico, junto com seus aluguéis).
+- Aprovação: de SolicitacaoAluguel.criado_em à criação do aluguel, no dia
+  e para o funcionário do aluguel.
+- Pagamento: de Pagamento.criado_em a data_pagamento, no dia do pagamento.
+"""
+import threading
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Max, Min, Q, Sum
+from django.utils import timezone
+
+from aluguel.models import Aluguel, Pagamento
+from carro.models import Carro
+from user.models import Usuario
+
+from .models import ResumoCarroDiario, ResumoDiario, ResumoFuncionarioDiario
+
+STATUS_RECEITA = ('ativo', 'finalizado')
+CENTAVO = Decimal('0.01')
+QUATRO_CASAS = Decimal('0.0001')
+TAMANHO_LOTE = 200
+DIAS_POR_CONSULTA = 366
+
+
+# --- Datas ------------------------------------------------------------------
+
+def dia_local(momento):
+    return timezone.localdate(momento)
+
+
+def limites(dia):
+    """Início e fim (aware) do dia local"""
+    inicio = timezone.make_aware(datetime.combine(dia, time.min))
+    fim = timezone.make_aware(datetime.combine(dia + timedelta(days=1), time.min))
+    return inicio, fim
+
+
+def dias_entre(primeiro, ultimo):
+    """Datas de primeiro a ultimo, inclusive"""
+    dia = primeiro
+    while dia <= ultimo:
+        yield dia
+        dia += timedelta(days=1)
+
+
+def dias_do_periodo(inicio, fim):
+    """Dias locais tocados pelo período [inicio, fim)"""
+    if fim <= inicio:
+        return []
+    return list(dias_entre(dia_local(inicio), dia_local(fim - timedelta(microseconds=1))))
+
+
+def _sequencias(dias):
+    """Divide os dias em trechos contínuos de até DIAS_POR_CONSULTA dias"""
+    trecho = []
+    for dia in sorted(dias):
+        if trecho and (dia - trecho[-1] > timedelta(days=1) or len(trecho) >= DIAS_POR_CONSULTA):
+            yield trecho
+            trecho = []
+        trecho.append(dia)
+    if trecho:
+        yield trecho
+
+
+def _sobrepoe(inicio, fim):
+    return Q(data_inicio__lt=fim, data_fim__gt=inicio)
+
+
+# --- Cálculo ----------------------------------------------------------------
+
+def _rateio(alugueis, dias):
+    """
+    {dia: (receita, dias_alugados)} dos (data_inicio, data_fim, valor),
+    só para os dias pedidos que algum aluguel toca.
+    """
+    receita = defaultdict(Decimal)
+    ocupado = defaultdict(float)
+    duracoes = {}
+    for data_inicio, data_fim, valor in alugueis:
+        total = (data_fim - data_inicio).total_seconds()
+        if total <= 0:
+            continue
+        for dia in dias_do_periodo(data_inicio, data_fim):
+            if dia not in dias:
+                continue
+            inicio_dia, fim_dia = limites(dia)
+            duracoes[dia] = (fim_dia - inicio_dia).total_seconds()
+            segundos = (min(fim_dia, data_fim) - max(inicio_dia, data_inicio)).total_seconds()
+            receita[dia] += valor * Decimal(segundos) / Decimal(total)
+            ocupado[dia] += segundos
+    return {
+        dia: (
+            receita[dia].quantize(CENTAVO),
+            Decimal(min(ocupado[dia], duracoes[dia]) / duracoes[dia]).quantize(QUATRO_CASAS),
+        )
+        for dia in duracoes
+    }
+
+
+def _somar_funcionarios(linhas, dias):
+    """
+    Soma (funcionario_id, criado_em, status, valor, criado_em da solicitação)
+    por (funcionário, dia). Retorna {(funcionario_id, dia): {...}}.
+    """
+    somas = defaultdict(lambda: {'alugueis': 0, 'receita': Decimal(0), 'aprovacoes': 0, 'latencia_aprovacao': 0})
+    for funcionario_id, criado_em, status, valor, solicitado_em in linhas:
+        dia = dia_local(criado_em)
+        if dia not in dias:
+            continue
+        soma = somas[(funcionario_id, dia)]
+        soma['alugueis'] += 1
+        if status in STATUS_RECEITA:
+            soma['receita'] += valor
+        if solicitado_em is not None:
+            soma['aprovacoes'] += 1
+            soma['latencia_aprovacao'] += max(0, int((criado_em - solicitado_em).total_seconds()))
+    return somas
+
+
+_CAMPOS_FUNCIONARIO = ('funcionario_id', 'criado_em', 'status', 'valor', 'solicitacao_origem__criado_em')
+
+
+def _gravar(modelo, linhas, chaves, campos):
+    """Insere ou atualiza as linhas pela chave única"""
+    modelo.objects.bulk_create(
+        linhas, batch_size=500,
+        update_conflicts=True, unique_fields=chaves, update_fields=campos,
+    )
+
+
+def recalcular_carros(pendentes):
+    """Recalcula ResumoCarroDiario de {carro_id: dias}"""
+    existentes = set(Carro.objects.filter(pk__in=list(pendentes)).values_list('pk', flat=True))
+    linhas = []
+    for carro_id in existentes:
+        dias = set(pendentes[carro_id])
+        if not dias:
+            continue
+        inicio, fim = limites(min(dias))[0], limites(max(dias))[1]
+        alugueis = Aluguel.objects.filter(
+            _sobrepoe(inicio, fim), carro_id=carro_id, status__in=STATUS_RECEITA
+        ).values_list('data_inicio', 'data_fim', 'valor')
+        valores = _rateio(alugueis, dias)
+        for dia in dias:
+            receita, dias_alugados = valores.get(dia, (0, 0))
+            linhas.append(ResumoCarroDiario(
+                dia=dia, carro_id=carro_id, receita=receita, dias_alugados=dias_alugados,
+            ))
+    _gravar(ResumoCarroDiario, linhas, ['dia', 'carro'], ['receita', 'dias_alugados'])
+
+
+def recalcular_funcionarios(pendentes):
+    """Recalcula ResumoFuncionarioDiario de {funcionario_id: dias}"""
+    existentes = set(Usuario.objects.filter(pk__in=list(pendentes)).values_list('pk', flat=True))
+    linhas = []
+    for funcionario_id in existentes:
+        dias = set(pendentes[funcionario_id])
+        if not dias:
+            continue
+        inicio, fim = limites(min(dias))[0], limites(max(dias))[1]
+        somas = _somar_funcionarios(
+            Aluguel.objects.filter(funcionario_id=funcionario_id, criado_em__gte=inicio, criado_em__lt=fim)
+            .values_list(*_CAMPOS_FUNCIONARIO),
+            dias,
+        )
+        for dia in dias:
+            linhas.append(ResumoFuncionarioDiario(dia=dia, funcionario_id=funcionario_id, **somas[(funcionario_id, dia)]))
+    _gravar(
+        ResumoFuncionarioDiario, linhas, ['dia', 'funcionario'],
+        ['alugueis', 'receita', 'aprovacoes', 'latencia_aprovacao'],
+    )
+
+
+def recalcular_dias(dias):
+    """Recalcula ResumoDiario dos dias, a partir dos outros resumos e dos pagamentos"""
+    for trecho in _sequencias(dias):
+        inicio, fim = limites(trecho[0])[0], limites(trecho[-1])[1]
+        carros = {
+            linha['dia']: linha for linha in
+            ResumoCarroDiario.objects.filter(dia__in=trecho).values('dia')
+            .annotate(receita=Sum('receita'), dias_alugados=Sum('dias_alugados')).order_by()
+        }
+        funcionarios = {
+            linha['dia']: linha for linha in
+            ResumoFuncionarioDiario.objects.filter(dia__in=trecho).values('dia')
+            .annotate(alugueis=Sum('alugueis'), aprovacoes=Sum('aprovacoes'),
+                      latencia_aprovacao=Sum('latencia_aprovacao')).order_by()
+        }
+
+        pagamentos = defaultdict(lambda: [0, Decimal(0), 0])
+        for pago_em, criado_em, valor in (
+            Pagamento.objects.filter(status='aprovado', data_pagamento__gte=inicio, data_pagamento__lt=fim)
+            .values_list('data_pagamento', 'criado_em', 'valor').iterator()
+        ):
+            soma = pagamentos[dia_local(pago_em)]
+            soma[0] += 1
+            soma[1] += valor
+            soma[2] += max(0, int((pago_em - criado_em).total_seconds()))
+
+        # Frota acumulada: carros anteriores ao trecho + os cadastrados em cada dia
+        frota = Carro.objects.filter(criado_em__lt=inicio).count()
+        cadastros = defaultdict(int)
+        for criado_em in Carro.objects.filter(criado_em__gte=inicio, criado_em__lt=fim).values_list('criado_em', flat=True):
+            cadastros[dia_local(criado_em)] += 1
+
+        linhas = []
+        for dia in trecho:
+            frota += cadastros[dia]
+            carro = carros.get(dia, {})
+            funcionario = funcionarios.get(dia, {})
+            quantidade, valor, latencia = pagamentos[dia]
+            linhas.append(ResumoDiario(
+                dia=dia,
+                receita=carro.get('receita') or 0,
+                dias_alugados=carro.get('dias_alugados') or 0,
+                frota=frota,
+                alugueis=funcionario.get('alugueis') or 0,
+                aprovacoes=funcionario.get('aprovacoes') or 0,
+                latencia_aprovacao=funcionario.get('latencia_aprovacao') or 0,
+                pagamentos=quantidade,
+                valor_recebido=valor,
+                latencia_pagamento=latencia,
+            ))
+        _gravar(ResumoDiario, linhas, ['dia'], [
+            'receita', 'dias_alugados', 'frota', 'alugueis', 'aprovacoes',
+            'latencia_aprovacao', 'pagamentos', 'valor_recebido', 'latencia_pagamento',
+        ])
+
+
+# --- Atualização incremental ------------------------------------------------
+
+_local = threading.local()
+
+
+def _pendentes():
+    pendentes = getattr(_local, 'pendentes', None)
+    if pendentes is None:
+        pendentes = _local.pendentes = {
+            'carros': defaultdict(set), 'funcionarios': defaultdict(set), 'dias': set(),
+        }
+    return pendentes
+
+
+def _agendar():
+    # Uma chamada por marcação; a primeira após o commit recalcula tudo o
+    # que estiver pendente e as outras não encontram nada. Se a transação
+    # for desfeita, as marcações ficam para o próximo commit (recalcular
+    # de novo não muda o resultado).
+    transaction.on_commit(atualizar_pendentes)
+
+
+def marcar_aluguel(carro_id, funcionario_id, data_inicio, data_fim, criado_em):
+    """Marca os resumos que dependem de um aluguel (estado antes ou depois da escrita)"""
+    pendentes = _pendentes()
+    dias = dias_do_periodo(data_inicio, data_fim)
+    pendentes['carros'][carro_id].update(dias)
+    pendentes['dias'].update(dias)
+    if criado_em is not None:
+        dia_criacao = dia_local(criado_em)
+        pendentes['funcionarios'][funcionario_id].add(dia_criacao)
+        pendentes['dias'].add(dia_criacao)
+    _agendar()
+
+
+def marcar_alugueis(queryset):
+    """marcar_aluguel() para cada aluguel do queryset (antes de um update())"""
+    for linha in queryset.values_list('carro_id', 'funcionario_id', 'data_inicio', 'data_fim', 'criado_em'):
+        marcar_aluguel(*linha)
+
+
+def marcar_dias(*dias):
+    """Marca os totais dos dias (pagamentos, frota)"""
+    _pendentes()['dias'].update(dias)
+    _agendar()
+
+
+def marcar_frota(desde):
+    """
+    Um carro cadastrado ou removido em `desde` muda a frota de todos os
+    dias a partir dele: marca hoje e os dias seguintes que já têm resumo
+    (aluguéis futuros também geram linhas).
+    """
+    dias = set(ResumoDiario.objects.filter(dia__gte=desde).values_list('dia', flat=True))
+    marcar_dias(timezone.localdate(), *dias)
+
+
+def atualizar_pendentes():
+    """Recalcula as chaves marcadas"""
+    pendentes = _local.__dict__.pop('pendentes', None)
+    if not pendentes:
+        return
+    with transaction.atomic():
+        recalcular_carros(pendentes['carros'])
+        recalcular_funcionarios(pendentes['funcionarios'])
+        recalcular_dias(pendentes['dias'])
+
+
+# --- Reconstrução -----------------------------------------------------------
+
+def _historico():
+    """Primeiro e último dia com algum dado, ou None"""
+    datas = [
+        *Aluguel.objects.aggregate(Min('data_inicio'), Max('data_fim'), Min('criado_em'), Max('criado_em')).values(),
+        *Pagamento.objects.aggregate(Min('data_pagamento'), Max('data_pagamento')).values(),
+    ]
+    datas = [data for data in datas if data is not None]
+    if not datas:
+        return None
+    return dia_local(min(datas)), dia_local(max(datas) - timedelta(microseconds=1))
+
+
+def reconstruir(primeiro=None, ultimo=None, tamanho_lote=TAMANHO_LOTE):
+    """
+    Refaz do zero os resumos de primeiro a ultimo (datas locais; padrão:
+    todo o histórico). Retorna o número de dias recalculados.
+    """
+    if primeiro is None or ultimo is None:
+        historico = _historico()
+        if historico is None:
+            return 0
+        primeiro = primeiro or historico[0]
+        ultimo = ultimo or historico[1]
+    if ultimo < primeiro:
+        return 0
+    dias = set(dias_entre(primeiro, ultimo))
+    inicio, fim = limites(primeiro)[0], limites(ultimo)[1]
+
+    with transaction.atomic():
+        for modelo in (ResumoCarroDiario, ResumoFuncionarioDiario, ResumoDiario):
+            modelo.objects.filter(dia__gte=primeiro, dia__lte=ultimo).delete()
+
+        # Carros, em lotes: uma consulta e um bulk_create por lote
+        alugueis = Aluguel.objects.filter(_sobrepoe(inicio, fim), status__in=STATUS_RECEITA)
+        carro_ids = sorted(set(alugueis.values_list('carro_id', flat=True)))
+        for posicao in range(0, len(carro_ids), tamanho_lote):
+            por_carro = defaultdict(list)
+            for carro_id, *aluguel in (
+                alugueis.filter(carro_id__in=carro_ids[posicao:posicao + tamanho_lote])
+                .values_list('carro_id', 'data_inicio', 'data_fim', 'valor').iterator()
+            ):
+                por_carro[carro_id].append(aluguel)
+            ResumoCarroDiario.objects.bulk_create([
+                ResumoCarroDiario(dia=dia, carro_id=carro_id, receita=receita, dias_alugados=dias_alugados)
+                for carro_id, lista in por_carro.items()
+                for dia, (receita, dias_alugados) in _rateio(lista, dias).items()
+            ], batch_size=500)
+
+        somas = _somar_funcionarios(
+            Aluguel.objects.filter(criado_em__gte=inicio, criado_em__lt=fim)
+            .values_list(*_CAMPOS_FUNCIONARIO).iterator(),
+            dias,
+        )
+        ResumoFuncionarioDiario.objects.bulk_create([
+            ResumoFuncionarioDiario(dia=dia, funcionario_id=funcionario_id, **soma)
+            for (funcionario_id, dia), soma in somas.items()
+        ], batch_size=500)
+
+        recalcular_dias(dias)
+    return len(dias)
@@ -0,0 +1,40 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from aluguel.models import Aluguel, Pagamento, SolicitacaoAluguel
+from carro.models import Carro
+
+from . import resumos
+
+
+@receiver([post_save, post_delete], sender=Aluguel)
+def aluguel_alterado(sender, instance, **kwargs):
+    """Marca os resumos do período novo e do período gravado antes"""
+    resumos.marcar_aluguel(
+        instance.carro_id, instance.funcionario_id,
+        instance.data_inicio, instance.data_fim, instance.criado_em,
+    )
+    anterior = getattr(instance, '_periodo_banco', None)
+    if anterior and None not in anterior:
+        resumos.marcar_aluguel(*anterior)
+
+
+@receiver([post_save, post_delete], sender=Pagamento)
+def pagamento_alterado(sender, instance, **kwargs):
+    if instance.data_pagamento:
+        resumos.marcar_dias(resumos.dia_local(instance.data_pagamento))
+
+
+@receiver(post_delete, sender=SolicitacaoAluguel)
+def solicitacao_removida(sender, instance, **kwargs):
+    """Sem a solicitação, o aluguel criado por ela deixa de contar como aprovação"""
+    if instance.aluguel_criado_id:
+        resumos.marcar_alugueis(Aluguel.objects.filter(pk=instance.aluguel_criado_id))
+
+
+@receiver(post_save, sender=Carro)
+@receiver(post_delete, sender=Carro)
+def frota_alterada(sender, instance, created=True, **kwargs):
+    """Carro cadastrado ou removido muda a frota desde o dia do cadastro"""
+    if created:
+        resumos.marcar_frota(resumos.dia_local(instance.criado_em))
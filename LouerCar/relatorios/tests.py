@@ -0,0 +1,121 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from aluguel.models import Aluguel, Pagamento, SolicitacaoAluguel
+from carro.models import Carro
+from user.models import PerfilCliente, Usuario
+
+from . import consultas, resumos
+from .models import ResumoCarroDiario, ResumoDiario, ResumoFuncionarioDiario
+
+
+class ResumosDiariosTest(TestCase):
+    """Os resumos mantidos a cada escrita batem com a reconstrução do zero"""
+
+    def setUp(self):
+        cache.clear()
+        self.funcionario = Usuario.objects.create(username='funcionario', is_staff=True)
+        cliente = Usuario.objects.create(username='cliente', email='cliente@teste.com')
+        self.perfil = PerfilCliente.objects.create(
+            usuario=cliente, CNH='CNH1', telefone='11999999999', endereco='Rua A'
+        )
+        self.carro = Carro.objects.create(modelo='Onix', placa='ABC-1234', ano=2024)
+        Carro.objects.create(modelo='Gol', placa='XYZ-9876', ano=2020)
+        self.dia = timezone.localdate() + timedelta(days=5)
+
+    def momento(self, dias, hora):
+        return timezone.make_aware(datetime.combine(self.dia + timedelta(days=dias), datetime.min.time())) + timedelta(hours=hora)
+
+    def alugar(self, **campos):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Aluguel.objects.create(
+                perfil_cliente=self.perfil, carro=self.carro, funcionario=self.funcionario, **campos
+            )
+
+    def linhas(self):
+        return (
+            list(ResumoCarroDiario.objects.exclude(receita=0).order_by('dia', 'carro').values_list('dia', 'carro', 'receita', 'dias_alugados')),
+            list(ResumoFuncionarioDiario.objects.exclude(alugueis=0).order_by('dia').values_list('dia', 'alugueis', 'receita', 'aprovacoes', 'latencia_aprovacao')),
+            list(ResumoDiario.objects.exclude(receita=0, alugueis=0, pagamentos=0).order_by('dia').values_list(
+                'dia', 'receita', 'dias_alugados', 'frota', 'alugueis', 'aprovacoes', 'pagamentos', 'valor_recebido')),
+        )
+
+    def test_incremental_igual_a_reconstrucao(self):
+        # Das 12h do dia 0 às 12h do dia 2: metade da receita no dia 1
+        aluguel = self.alugar(data_inicio=self.momento(0, 12), data_fim=self.momento(2, 12), valor=Decimal('300.00'))
+        resumo = ResumoDiario.objects.get(dia=self.dia + timedelta(days=1))
+        self.assertEqual((resumo.receita, resumo.dias_alugados, resumo.frota), (Decimal('150.00'), 1, 2))
+        self.assertEqual(resumo.utilizacao, Decimal('50.0'))
+
+        # Aprovação de uma solicitação feita 2 h antes
+        solicitacao = SolicitacaoAluguel.objects.create(
+            perfil_cliente=self.perfil, carro=self.carro, data_inicio=self.momento(10, 0),
+            data_fim=self.momento(11, 0), valor_estimado=100, status='aprovado',
+        )
+        SolicitacaoAluguel.objects.filter(pk=solicitacao.pk).update(criado_em=timezone.now() - timedelta(hours=2))
+        with self.captureOnCommitCallbacks(execute=True):
+            aprovado = Aluguel.objects.create(
+                perfil_cliente=self.perfil, carro=self.carro, funcionario=self.funcionario,
+                data_inicio=self.momento(10, 0), data_fim=self.momento(11, 0), valor=100,
+            )
+            solicitacao.aluguel_criado = aprovado
+            solicitacao.save(update_fields=['aluguel_criado'])
+            pagamento = Pagamento.objects.create(
+                aluguel=aprovado, valor=100, data_vencimento=timezone.now() + timedelta(days=3),
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            pagamento.status = 'aprovado'
+            pagamento.data_pagamento = timezone.now()
+            pagamento.save()
+
+        # Mudança de período e cancelamento refazem os dias antigos e os novos
+        with self.captureOnCommitCallbacks(execute=True):
+            aluguel = Aluguel.objects.get(pk=aluguel.pk)
+            aluguel.data_fim = self.momento(3, 12)
+            aluguel.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            aprovado.status = 'cancelado'
+            aprovado.save()
+
+        hoje = ResumoDiario.objects.get(dia=timezone.localdate())
+        self.assertEqual((hoje.alugueis, hoje.aprovacoes, hoje.pagamentos), (2, 1, 1))
+        self.assertAlmostEqual(hoje.latencia_media_aprovacao.total_seconds(), 7200, delta=60)
+        self.assertEqual(hoje.valor_recebido, 100)
+        self.assertFalse(ResumoCarroDiario.objects.filter(dia=self.dia + timedelta(days=10)).exclude(receita=0).exists())
+
+        incremental = self.linhas()
+        resumos.reconstruir()
+        self.assertEqual(self.linhas(), incremental)
+
+    def test_relatorio_le_so_os_resumos(self):
+        self.alugar(data_inicio=self.momento(0, 0), data_fim=self.momento(2, 0), valor=Decimal('200.00'))
+        inicio, fim = self.dia, self.dia + timedelta(days=1)
+        with self.assertNumQueries(1):
+            totais = consultas.totais(inicio, fim)
+        self.assertEqual((totais['receita'], totais['utilizacao']), (Decimal('200.00'), Decimal('50.0')))
+        self.assertEqual(len(consultas.serie_diaria(inicio, fim)), 2)
+        self.assertEqual(consultas.por_carro(inicio, fim)[0]['utilizacao'], Decimal('100.0'))
+
+    def test_remover_carro_refaz_a_frota_desde_o_cadastro(self):
+        self.alugar(data_inicio=self.momento(0, 0), data_fim=self.momento(1, 0), valor=Decimal('100.00'))
+        hoje = timezone.localdate()
+        Carro.objects.filter(placa='XYZ-9876').update(criado_em=timezone.now() - timedelta(days=10))
+        gol = Carro.objects.get(placa='XYZ-9876')
+        resumos.reconstruir(hoje - timedelta(days=10), self.dia + timedelta(days=1))
+        self.assertEqual(ResumoDiario.objects.get(dia=hoje - timedelta(days=5)).frota, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            gol.delete()
+
+        def frotas():
+            return list(ResumoDiario.objects.order_by('dia').values_list('dia', 'frota'))
+
+        incremental = frotas()
+        self.assertEqual(dict(incremental)[hoje - timedelta(days=5)], 0)
+        self.assertEqual(dict(incremental)[self.dia], 1)
+        resumos.reconstruir(hoje - timedelta(days=10), self.dia + timedelta(days=1))
+        self.assertEqual(frotas(), incremental)
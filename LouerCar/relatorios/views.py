@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from django.contrib import messages
+from django.shortcuts import render
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from user.decorators import staff_required
+
+from . import consultas
+
+DIAS_PADRAO = 30
+DIAS_MAXIMOS = 366
+
+
+@staff_required
+def relatorio(request):
+    """Receita, utilização da frota e latências no período, lidos dos resumos diários"""
+    fim = timezone.localdate()
+    inicio = fim - timedelta(days=DIAS_PADRAO - 1)
+    try:
+        inicio = parse_date(request.GET.get('inicio') or '') or inicio
+        fim = parse_date(request.GET.get('fim') or '') or fim
+    except ValueError:
+        messages.error(request, '❌ Datas inválidas!')
+    if inicio > fim:
+        inicio, fim = fim, inicio
+    if (fim - inicio).days >= DIAS_MAXIMOS:
+        inicio = fim - timedelta(days=DIAS_MAXIMOS - 1)
+        messages.warning(request, f'⚠️ Período limitado aos últimos {DIAS_MAXIMOS} dias.')
+
+    serie = consultas.serie_diaria(inicio, fim)
+    context = {
+        'inicio': inicio,
+        'fim': fim,
+        'totais': consultas.totais(inicio, fim),
+        'carros': consultas.por_carro(inicio, fim),
+        'funcionarios': consultas.por_funcionario(inicio, fim),
+        'grafico': consultas.grafico(serie),
+    }
+    return render(request, 'relatorios/relatorio.html', context)
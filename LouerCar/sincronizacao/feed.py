@@ -0,0 +1,114 @@
+"""
+Feed de alterações para a sincronização incremental (?since=<token>).
+
+O token guarda duas posições keyset: (atualizado_em, pk) do último registro
+alterado entregue e (removido_em, id) da última lápide entregue. Cada
+chamada é uma busca por índice a partir dessas posições (ORDER BY ...
+LIMIT n), então o custo acompanha o número de alterações, não o tamanho da
+tabela. Criações, edições e cancelamentos aparecem como alterações (todos
+mudam atualizado_em); remoções, como lápides (sincronizacao.Remocao).
+
+Só entram registros com mais de MARGEM de idade: uma transação que gravou
+atualizado_em antes do commit não pode ficar para trás de um token já
+entregue.
+"""
+import base64
+import binascii
+import json
+from datetime import timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Remocao
+
+MARGEM = timedelta(seconds=2)
+RETENCAO = timedelta(days=30)  # lápides mais antigas são apagadas por limpar_remocoes
+LIMITE = 500
+
+
+class TokenInvalido(ValueError):
+    pass
+
+
+class TokenExpirado(Exception):
+    """As lápides desde o token já foram apagadas: o cliente precisa baixar tudo de novo"""
+
+
+def codificar_token(alterados, removidos):
+    dados = {'a': [alterados[0].isoformat(), alterados[1]], 'r': [removidos[0].isoformat(), removidos[1]]}
+    texto = json.dumps(dados, separators=(',', ':'))
+    return base64.urlsafe_b64encode(texto.encode()).decode().rstrip('=')
+
+
+def decodificar_token(token):
+    """Retorna ((data, pk) dos alterados, (data, id) das lápides); levanta TokenInvalido"""
+    try:
+        texto = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+        dados = json.loads(texto)
+        posicoes = []
+        for chave in ('a', 'r'):
+            data, pk = parse_datetime(dados[chave][0]), int(dados[chave][1])
+            # Os tokens gerados aqui sempre têm fuso; sem ele a comparação com agora falharia
+            if data is None or timezone.is_naive(data):
+                raise ValueError
+            posicoes.append((data, pk))
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError, KeyError, IndexError):
+        raise TokenInvalido('Token de sincronização inválido')
+    return posicoes[0], posicoes[1]
+
+
+def _depois_de(campo_data, campo_pk, posicao):
+    data, pk = posicao
+    return Q(**{f'{campo_data}__gt': data}) | Q(**{campo_data: data, f'{campo_pk}__gt': pk})
+
+
+def alteracoes(queryset, tabela, token=None, limite=LIMITE):
+    """
+    Registros do queryset alterados e ids removidos desde o token.
+    Retorna {'alterados': [...], 'removidos': [ids], 'since': token novo, 'mais': bool}.
+    """
+    agora = timezone.now()
+    teto = agora - MARGEM
+
+    if token:
+        pos_alterados, pos_removidos = decodificar_token(token)
+        if pos_removidos[0] < agora - RETENCAO:
+            raise TokenExpirado
+        alterados = queryset.filter(_depois_de('atualizado_em', 'pk', pos_alterados))
+    else:
+        # Primeira carga: tudo o que existe; lápides só a partir de agora
+        pos_alterados, pos_removidos = None, (teto, 0)
+        alterados = queryset
+
+    alterados = list(
+        alterados.filter(atualizado_em__lte=teto).order_by('atualizado_em', 'pk')[:limite + 1]
+    )
+    removidos = list(
+        Remocao.objects.filter(tabela=tabela, removido_em__lte=teto)
+        .filter(_depois_de('removido_em', 'id', pos_removidos))
+        .order_by('removido_em', 'id')
+        .values_list('removido_em', 'id', 'objeto_id')[:limite + 1]
+    )
+    mais_removidos = len(removidos) > limite
+    mais = len(alterados) > limite or mais_removidos
+    alterados, removidos = alterados[:limite], removidos[:limite]
+
+    if alterados:
+        pos_alterados = (alterados[-1].atualizado_em, alterados[-1].pk)
+    elif pos_alterados is None:
+        pos_alterados = (teto, 0)
+    if removidos:
+        pos_removidos = removidos[-1][:2]
+    if not mais_removidos and pos_removidos[0] < teto:
+        # Todas as lápides até o teto foram entregues: avança até ele, para
+        # o token não expirar (RETENCAO) só por não haver remoções
+        pos_removidos = (teto, 0)
+
+    return {
+        'alterados': alterados,
+        'removidos': [objeto_id for _, _, objeto_id in removidos],
+        'since': codificar_token(pos_alterados, pos_removidos),
+        'mais': mais,
+    }
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from sincronizacao.feed import RETENCAO
+from sincronizacao.models import Remocao
+
+
+class Command(BaseCommand):
+    help = 'Apaga as lápides de remoção mais antigas que o prazo de retenção da sincronização'
+
+    def handle(self, *args, **options):
+        limite = timezone.now() - RETENCAO
+        apagadas, _ = Remocao.objects.filter(removido_em__lt=limite).delete()
+        self.stdout.write(self.style.SUCCESS(f'✅ {apagadas} lápide(s) apagada(s)'))
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:08
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Remocao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tabela', models.CharField(max_length=30)),
+                ('objeto_id', models.BigIntegerField()),
+                ('removido_em', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Remoção',
+                'verbose_name_plural': 'Remoções',
+                'db_table': 'remocao',
+                'indexes': [models.Index(fields=['tabela', 'removido_em', 'id'], name='remocao_tabela_data_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Remocao(models.Model):
+    """
+    Lápide (tombstone) de um registro removido, para os clientes da
+    sincronização incremental saberem o que apagar.
+    """
+    tabela = models.CharField(max_length=30)
+    objeto_id = models.BigIntegerField()
+    removido_em = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'remocao'
+        verbose_name = 'Remoção'
+        verbose_name_plural = 'Remoções'
+        indexes = [
+            models.Index(fields=['tabela', 'removido_em', 'id'], name='remocao_tabela_data_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.tabela} #{self.objeto_id} removido em {self.removido_em:%d/%m/%Y %H:%M}"
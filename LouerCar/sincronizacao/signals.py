@@ -0,0 +1,21 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from aluguel.models import Aluguel, SolicitacaoAluguel
+from carro.models import Carro
+
+from .models import Remocao
+
+TABELAS = {
+    Carro: 'carro',
+    Aluguel: 'aluguel',
+    SolicitacaoAluguel: 'solicitacao',
+}
+
+
+@receiver(post_delete, sender=Carro)
+@receiver(post_delete, sender=Aluguel)
+@receiver(post_delete, sender=SolicitacaoAluguel)
+def registro_removido(sender, instance, **kwargs):
+    """Grava a lápide na mesma transação da remoção"""
+    Remocao.objects.create(tabela=TABELAS[sender], objeto_id=instance.pk)
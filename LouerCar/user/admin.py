@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Usuario, PerfilCliente, Grupo, UsuarioGrupo
+from .models import Usuario, PerfilCliente, Grupo, UsuarioGrupo, Tag
+from .estatisticas import aplicar_contagens
 
 @admin.register(Usuario)
 class UsuarioAdmin(admin.ModelAdmin):
@@ -17,6 +18,26 @@ class PerfilClienteAdmin(admin.ModelAdmin):
     readonly_fields = ('criado_em', 'atualizado_em')
     ordering = ('-criado_em',)
 
+@admin.register(Tag)
+class TagAdmin(admin.ModelAdmin):
+    list_display = ('id_tag', 'nome', 'cor', 'total_usuarios', 'total_grupos')
+    search_fields = ('nome',)
+    ordering = ('nome',)
+
+    def get_changelist_instance(self, request):
+        # Contagens da página inteira em uma leitura do cache
+        changelist = super().get_changelist_instance(request)
+        aplicar_contagens(changelist.result_list)
+        return changelist
+
+    @admin.display(description='Usuários')
+    def total_usuarios(self, obj):
+        return obj.total_usuarios
+
+    @admin.display(description='Grupos')
+    def total_grupos(self, obj):
+        return obj.total_grupos
+
 @admin.register(Grupo)
 class GrupoAdmin(admin.ModelAdmin):
     list_display = ('id_grupo', 'nome')
@@ -1,9 +1,13 @@
 # user/auth_views.py - SUBSTITUA O ARQUIVO COMPLETO
 
+from datetime import timedelta
+
 from django.shortcuts import render, redirect
 from django.contrib import messages
+from django.utils import timezone
 from .models import Usuario, PerfilCliente
-from .utils import atribuir_tags_automaticas, adicionar_usuario_em_grupo_automatico
+from .utils import atribuir_tags_e_grupos
+from carro.cache_catalogo import cache_pagina_anonima
 
 def register(request):
     """Página de cadastro de novo usuário (Cliente)"""
@@ -18,15 +22,12 @@ def register(request):
             usuario.is_active = True
             usuario.save()
             
-            # ⭐ ATRIBUIR TAGS AUTOMÁTICAS ⭐
-            tags = atribuir_tags_automaticas(usuario)
-            
-            # ⭐ ADICIONAR EM GRUPOS AUTOMÁTICOS ⭐
-            grupos = adicionar_usuario_em_grupo_automatico(usuario)
+            # ⭐ ATRIBUIR TAGS E GRUPOS AUTOMÁTICOS (número fixo de consultas) ⭐
+            resultado = atribuir_tags_e_grupos(Usuario.objects.filter(pk=usuario.pk))
             
             messages.success(
                 request, 
-                f'✅ Cadastro realizado! Você recebeu {len(tags)} tag(s) e foi adicionado em {len(grupos)} grupo(s). Faça login para continuar.'
+                f'✅ Cadastro realizado! Você recebeu {len(resultado["tags"])} tag(s) e foi adicionado em {len(resultado["grupos"])} grupo(s). Faça login para continuar.'
             )
             return redirect('login')
     else:
@@ -92,11 +93,8 @@ def dashboard_cliente(request):
     from carro.models import Carro
     from aluguel.models import Aluguel
     
-    user_id = request.session.get('user_id')
-    
-    try:
-        usuario = Usuario.objects.get(id_usuario=user_id)
-    except Usuario.DoesNotExist:
+    usuario = request.user_obj
+    if not usuario:
         request.session.flush()
         messages.error(request, '❌ Sessão inválida. Faça login novamente.')
         return redirect('login')
@@ -105,11 +103,10 @@ def dashboard_cliente(request):
     carros_disponiveis = Carro.objects.filter(status='disponivel')
     
     # Aluguéis do cliente
-    try:
-        perfil = PerfilCliente.objects.get(usuario=usuario)
+    perfil = request.perfil or None
+    if perfil:
         meus_alugueis = Aluguel.objects.filter(perfil_cliente=perfil).order_by('-criado_em')[:5]
-    except PerfilCliente.DoesNotExist:
-        perfil = None
+    else:
         meus_alugueis = []
     
     context = {
@@ -131,41 +128,42 @@ def dashboard_funcionario(request):
         messages.error(request, '❌ Acesso negado! Você não é funcionário.')
         return redirect('dashboard_cliente')
     
-    from carro.models import Carro
-    from aluguel.models import Aluguel
-    
-    user_id = request.session.get('user_id')
+    from carro.estatisticas import estatisticas_frota
+    from aluguel.estatisticas import estatisticas_alugueis
+    from relatorios import consultas
     
-    try:
-        usuario = Usuario.objects.get(id_usuario=user_id)
-    except Usuario.DoesNotExist:
+    usuario = request.user_obj
+    if not usuario:
         request.session.flush()
         messages.error(request, '❌ Sessão inválida. Faça login novamente.')
         return redirect('login')
     
-    # Estatísticas
-    total_carros = Carro.objects.count()
-    carros_disponiveis = Carro.objects.filter(status='disponivel').count()
-    carros_alugados = Carro.objects.filter(status='alugado').count()
-    
-    total_alugueis = Aluguel.objects.count()
-    alugueis_ativos = Aluguel.objects.filter(status='ativo').count()
+    # Estatísticas (uma consulta por modelo, com cache)
+    frota = estatisticas_frota()
+    alugueis = estatisticas_alugueis()
     
     total_clientes = Usuario.objects.filter(is_staff=False).count()
     
+    # Últimos 30 dias, lidos dos resumos diários
+    hoje = timezone.localdate()
+    inicio = hoje - timedelta(days=29)
+    
     context = {
         'usuario': usuario,
-        'total_carros': total_carros,
-        'carros_disponiveis': carros_disponiveis,
-        'carros_alugados': carros_alugados,
-        'total_alugueis': total_alugueis,
-        'alugueis_ativos': alugueis_ativos,
+        'total_carros': frota['total'],
+        'carros_disponiveis': frota['disponiveis'],
+        'carros_alugados': frota['alugados'],
+        'total_alugueis': alugueis['total'],
+        'alugueis_ativos': alugueis['ativos'],
         'total_clientes': total_clientes,
+        'totais_30_dias': consultas.totais(inicio, hoje),
+        'grafico': consultas.grafico(consultas.serie_diaria(inicio, hoje)),
     }
     
     return render(request, 'auth/dashboard_funcionario.html', context)
 
 
+@cache_pagina_anonima('home')
 def home(request):
     """Página inicial pública - Landing page"""
     from carro.models import Carro
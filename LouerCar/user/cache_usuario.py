@@ -0,0 +1,64 @@
+"""
+Cache do usuário logado.
+
+O usuário é carregado com o perfil (select_related) e as tags (prefetch) e
+guardado no cache sob uma chave versionada. Qualquer gravação em Usuario,
+PerfilCliente ou UsuarioTag incrementa a versão daquele usuário (e gravações
+em Tag incrementam a versão global das tags), de modo que a próxima
+requisição recarrega os dados do banco.
+
+As versões usam os contadores de LouerCar/versoes.py (recomeçam do relógio
+se a chave sumir) e são incrementadas após o commit, como na visibilidade.
+"""
+from django.core.cache import cache
+
+from LouerCar.versoes import incrementar_apos_commit, versoes
+
+from .models import PerfilCliente, Usuario
+
+CACHE_TIMEOUT = 600  # segundos
+TABELA_VERSAO_TAGS = 'usuario_tags'
+
+
+def _tabela_versao(user_id):
+    return f'usuario:{user_id}'
+
+
+def carregar_usuario(user_id):
+    """Retorna o Usuario (com perfil e tags) do cache ou do banco; None se não existir"""
+    versao, versao_tags = versoes(_tabela_versao(user_id), TABELA_VERSAO_TAGS)
+    chave = f'usuario:{user_id}:v{versao}:t{versao_tags}'
+
+    usuario = cache.get(chave)
+    if usuario is None:
+        usuario = (
+            Usuario.objects
+            .select_related('perfilcliente')
+            .prefetch_related('tags')
+            .filter(id_usuario=user_id)
+            .first()
+        )
+        if usuario is None:
+            return None
+        cache.set(chave, usuario, CACHE_TIMEOUT)
+    return usuario
+
+
+def perfil_do_usuario(usuario):
+    """Retorna o PerfilCliente já carregado junto com o usuário (ou None)"""
+    if not usuario:
+        return None
+    try:
+        return usuario.perfilcliente
+    except PerfilCliente.DoesNotExist:
+        return None
+
+
+def invalidar_usuario(user_id):
+    """Descarta os dados em cache de um usuário"""
+    incrementar_apos_commit(_tabela_versao(user_id))
+
+
+def invalidar_tags():
+    """Descarta os dados em cache de todos os usuários (tags alteradas)"""
+    incrementar_apos_commit(TABELA_VERSAO_TAGS)
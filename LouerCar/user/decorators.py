@@ -2,6 +2,19 @@ from django.shortcuts import redirect
 from django.contrib import messages
 from functools import wraps
 
+
+def _sessao_invalida(request):
+    """
+    Verifica se a sessão aponta para um usuário que não existe mais
+    (request.user_obj é carregado pelo AuthMiddleware). Se sim, limpa a sessão.
+    """
+    if getattr(request, 'user_obj', None):
+        return False
+    request.session.flush()
+    messages.error(request, 'Sessão inválida. Faça login novamente.')
+    return True
+
+
 def admin_required(view_func):
     """
     Decorator para restringir acesso APENAS a ADMINISTRADORES (is_staff=True)
@@ -14,6 +27,9 @@ def admin_required(view_func):
             messages.error(request, 'Você precisa estar logado para acessar esta página.')
             return redirect('login')
         
+        if _sessao_invalida(request):
+            return redirect('login')
+        
         # Verifica se é staff (admin/funcionário)
         if not request.session.get('is_staff'):
             messages.error(request, 'Acesso negado! Apenas administradores podem acessar esta página.')
@@ -36,6 +52,9 @@ def staff_required(view_func):
             messages.error(request, 'Você precisa estar logado para acessar esta página.')
             return redirect('login')
         
+        if _sessao_invalida(request):
+            return redirect('login')
+        
         # Verifica se é staff
         if not request.session.get('is_staff'):
             messages.error(request, 'Acesso negado! Apenas funcionários podem acessar esta página.')
@@ -58,6 +77,9 @@ def cliente_required(view_func):
             messages.error(request, 'Você precisa estar logado para acessar esta página.')
             return redirect('login')
         
+        if _sessao_invalida(request):
+            return redirect('login')
+        
         return view_func(request, *args, **kwargs)
     
     return wrapper
\ No newline at end of file
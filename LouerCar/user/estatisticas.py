@@ -0,0 +1,62 @@
+from django.core.cache import cache
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Grupo, Tag, UsuarioTag
+
+CACHE_KEY_TAGS = 'estatisticas:tags'
+CACHE_TIMEOUT = 300  # segundos
+
+
+def _contagem(queryset):
+    """Subquery com a contagem das linhas do queryset para a tag externa"""
+    contagem = (
+        queryset.filter(tag=OuterRef('pk'))
+        .order_by()
+        .values('tag')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(contagem, output_field=IntegerField()), 0)
+
+
+def anotar_contagens(queryset):
+    """
+    Anota total_usuarios e total_grupos nas tags em uma única consulta.
+    São subqueries (e não dois Count com join) para um total não multiplicar o outro.
+    """
+    return queryset.annotate(
+        total_usuarios=_contagem(UsuarioTag.objects.all()),
+        total_grupos=_contagem(Grupo.objects.all()),
+    )
+
+
+def calcular_contagens_tags():
+    """{id_tag: (total_usuarios, total_grupos)} para todas as tags"""
+    return {
+        pk: (usuarios, grupos)
+        for pk, usuarios, grupos in anotar_contagens(Tag.objects.all())
+        .values_list('pk', 'total_usuarios', 'total_grupos')
+    }
+
+
+def contagens_tags():
+    """Retorna as contagens por tag usando o cache"""
+    contagens = cache.get(CACHE_KEY_TAGS)
+    if contagens is None:
+        contagens = calcular_contagens_tags()
+        cache.set(CACHE_KEY_TAGS, contagens, CACHE_TIMEOUT)
+    return contagens
+
+
+def aplicar_contagens(tags):
+    """Preenche tag.total_usuarios e tag.total_grupos a partir do cache"""
+    contagens = contagens_tags()
+    for tag in tags:
+        tag.total_usuarios, tag.total_grupos = contagens.get(tag.pk, (0, 0))
+    return tags
+
+
+def invalidar_contagens_tags():
+    """Remove as contagens das tags do cache"""
+    cache.delete(CACHE_KEY_TAGS)
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from user.models import Usuario
+from user.utils import atribuir_tags_e_grupos
+
+
+class Command(BaseCommand):
+    help = 'Atribui em massa as tags da função e os grupos automáticos aos usuários'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ids', nargs='+', type=int, help='Apenas estes usuários')
+        parser.add_argument('--desde', help='Apenas usuários cadastrados a partir desta data (AAAA-MM-DD)')
+        parser.add_argument('--funcionarios', action='store_true', help='Apenas funcionários')
+        parser.add_argument('--clientes', action='store_true', help='Apenas clientes')
+        parser.add_argument('--substituir', action='store_true',
+                            help='Remove as tags de função que não valem mais (troca de função)')
+        parser.add_argument('--sem-grupos', action='store_true', help='Não mexe nos grupos')
+
+    def handle(self, *args, **options):
+        usuarios = Usuario.objects.all()
+        if options['ids']:
+            usuarios = usuarios.filter(pk__in=options['ids'])
+        if options['desde']:
+            usuarios = usuarios.filter(data_cadastro__date__gte=options['desde'])
+        if options['funcionarios']:
+            usuarios = usuarios.filter(is_staff=True)
+        if options['clientes']:
+            usuarios = usuarios.filter(is_staff=False, is_superuser=False)
+
+        self.stdout.write(self.style.WARNING('🏷️  Atribuindo tags e grupos...'))
+        resultado = atribuir_tags_e_grupos(
+            usuarios,
+            substituir=options['substituir'],
+            grupos=not options['sem_grupos'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {resultado['usuarios']} usuário(s): {resultado['tags_criadas']} tag(s) atribuída(s), "
+            f"{resultado['tags_removidas']} removida(s), {resultado['grupos_criados']} entrada(s) em grupos"
+        ))
@@ -0,0 +1,184 @@
+import json
+import platform
+import statistics
+import time
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from aluguel.models import Aluguel, Pagamento, SolicitacaoAluguel
+from carro.models import Carro
+from user.models import Usuario
+
+# (url name, quem acessa)
+PAGINAS = [
+    ('carro_list', 'funcionario'),
+    ('aluguel_list', 'funcionario'),
+    ('dashboard_funcionario', 'funcionario'),
+    ('tag_list', 'funcionario'),
+    ('meus_grupos', 'cliente'),
+]
+
+
+def endpoints_api():
+    """Nomes das rotas de listagem da API (inclui as actions de coleção)"""
+    from api.urls import router
+    nomes = []
+    for _, viewset, basename in router.registry:
+        nomes.append(f'{basename}-list')
+        for action in viewset.get_extra_actions():
+            if not action.detail:
+                nomes.append(f'{basename}-{action.url_name}')
+    return nomes
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    posicao = min(len(ordenados) - 1, round(p / 100 * (len(ordenados) - 1)))
+    return ordenados[posicao]
+
+
+class Command(BaseCommand):
+    help = 'Mede tempo e número de consultas das páginas e endpoints principais (relatório JSON)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticoes', type=int, default=5, help='Medições por endpoint')
+        parser.add_argument('--aquecimento', type=int, default=1,
+                            help='Requisições descartadas antes de medir')
+        parser.add_argument('--frio', action='store_true',
+                            help='Limpa o cache antes de cada requisição')
+        parser.add_argument('--saida', help='Arquivo do relatório JSON (padrão: stdout)')
+        parser.add_argument('--comparar', help='Relatório anterior para comparar')
+
+    def handle(self, *args, **options):
+        funcionario = Usuario.objects.filter(is_staff=True, is_active=True).first()
+        cliente = Usuario.objects.filter(
+            is_staff=False, is_active=True, perfilcliente__isnull=False
+        ).first()
+        if not funcionario or not cliente:
+            raise CommandError('É preciso ao menos um funcionário e um cliente (rode seed_load).')
+
+        clientes = {
+            'funcionario': self.cliente_sessao(funcionario),
+            'cliente': self.cliente_sessao(cliente),
+            'api': self.cliente_api(),
+        }
+        alvos = [(nome, reverse(nome), quem) for nome, quem in PAGINAS]
+        alvos += [(f'api:{nome}', reverse(nome), 'api') for nome in endpoints_api()]
+
+        resultados = {}
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            for nome, url, quem in alvos:
+                resultados[nome] = self.medir(clientes[quem], url, options)
+                self.stderr.write(
+                    f"{nome:<35} {resultados[nome]['mediana_ms']:>9.1f} ms "
+                    f"{resultados[nome]['consultas']:>5} consultas"
+                )
+
+        relatorio = {
+            'gerado_em': timezone.now().isoformat(),
+            'ambiente': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'banco': connection.vendor,
+                'cache': settings.CACHES['default']['BACKEND'],
+            },
+            'volumes': {
+                'usuarios': Usuario.objects.count(),
+                'carros': Carro.objects.count(),
+                'alugueis': Aluguel.objects.count(),
+                'solicitacoes': SolicitacaoAluguel.objects.count(),
+                'pagamentos': Pagamento.objects.count(),
+            },
+            'parametros': {
+                'repeticoes': options['repeticoes'],
+                'aquecimento': options['aquecimento'],
+                'frio': options['frio'],
+            },
+            'resultados': resultados,
+        }
+
+        texto = json.dumps(relatorio, indent=2, ensure_ascii=False)
+        if options['saida']:
+            with open(options['saida'], 'w', encoding='utf-8') as arquivo:
+                arquivo.write(texto + '\n')
+            self.stderr.write(self.style.SUCCESS(f"✅ Relatório salvo em {options['saida']}"))
+        else:
+            self.stdout.write(texto)
+
+        if options['comparar']:
+            self.comparar(options['comparar'], resultados)
+
+    def cliente_sessao(self, usuario):
+        """Client com a sessão do login próprio do sistema (user_id na sessão)"""
+        client = Client()
+        sessao = client.session
+        sessao['user_id'] = usuario.id_usuario
+        sessao['username'] = usuario.username
+        sessao['is_staff'] = usuario.is_staff
+        sessao['is_superuser'] = usuario.is_superuser
+        sessao.save()
+        return client
+
+    def cliente_api(self):
+        """A API autentica com o User do Django"""
+        usuario, _ = User.objects.get_or_create(
+            username='benchmark', defaults={'is_staff': True}
+        )
+        client = Client()
+        client.force_login(usuario)
+        return client
+
+    def medir(self, client, url, options):
+        for _ in range(options['aquecimento']):
+            client.get(url)
+
+        tempos, consultas, tamanho, status = [], 0, 0, None
+        for _ in range(options['repeticoes']):
+            if options['frio']:
+                cache.clear()
+            with CaptureQueriesContext(connection) as capturadas:
+                inicio = time.perf_counter()
+                resposta = client.get(url)
+                tempos.append((time.perf_counter() - inicio) * 1000)
+            consultas = len(capturadas)
+            tamanho = len(resposta.content)
+            status = resposta.status_code
+
+        return {
+            'url': url,
+            'status': status,
+            'consultas': consultas,
+            'bytes': tamanho,
+            'min_ms': round(min(tempos), 2),
+            'mediana_ms': round(statistics.median(tempos), 2),
+            'p95_ms': round(percentil(tempos, 95), 2),
+            'max_ms': round(max(tempos), 2),
+        }
+
+    def comparar(self, caminho, resultados):
+        with open(caminho, encoding='utf-8') as arquivo:
+            anteriores = json.load(arquivo)['resultados']
+
+        self.stderr.write(f"\n{'endpoint':<35} {'mediana (ms)':>22} {'consultas':>14}")
+        for nome, atual in resultados.items():
+            antes = anteriores.get(nome)
+            if antes is None:
+                self.stderr.write(f'{nome:<35} (novo)')
+                continue
+            variacao = (
+                (atual['mediana_ms'] - antes['mediana_ms']) / antes['mediana_ms'] * 100
+                if antes['mediana_ms'] else 0
+            )
+            self.stderr.write(
+                f"{nome:<35} {antes['mediana_ms']:>8.1f} → {atual['mediana_ms']:>8.1f} "
+                f"({variacao:+5.0f}%) {antes['consultas']:>5} → {atual['consultas']:>5}"
+            )
@@ -0,0 +1,153 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from LouerCar.sqlite import uri_somente_leitura
+from user.management.commands.benchmark import percentil
+
+# Escrita curta (aprovação/login): lê e grava algumas linhas numa transação
+ESCRITA = [
+    "UPDATE aluguel SET status = CASE status WHEN 'ativo' THEN 'finalizado' ELSE 'ativo' END WHERE id = ?",
+    "INSERT INTO evento (aluguel_id, criado_em) VALUES (?, datetime('now'))",
+]
+# Leitura longa (relatório): percorre a tabela inteira
+LEITURA = 'SELECT carro, status, COUNT(*), SUM(valor) FROM aluguel GROUP BY carro, status'
+
+
+def _pragmas(conexao, pragmas):
+    for nome, valor in pragmas.items():
+        conexao.execute(f'PRAGMA {nome}={valor}')
+
+
+def criar_banco(caminho, linhas):
+    conexao = sqlite3.connect(caminho)
+    conexao.executescript("""
+        CREATE TABLE aluguel (id INTEGER PRIMARY KEY, carro INTEGER, status TEXT, valor REAL);
+        CREATE TABLE evento (id INTEGER PRIMARY KEY, aluguel_id INTEGER, criado_em TEXT);
+    """)
+    conexao.executemany(
+        'INSERT INTO aluguel (carro, status, valor) VALUES (?, ?, ?)',
+        ((n % 500, 'ativo' if n % 3 else 'finalizado', 100 + n % 400) for n in range(linhas)),
+    )
+    conexao.commit()
+    conexao.close()
+
+
+def medir(ajustado, escritores, leitores, segundos, linhas):
+    """
+    Roda escritores e leitores ao mesmo tempo sobre um banco novo.
+    ajustado=False: modo padrão do SQLite (journal DELETE, leitores na
+    conexão comum); True: SQLITE_PRAGMAS + leitores somente leitura.
+    """
+    timeout = settings.DATABASES['default'].get('OPTIONS', {}).get('timeout', 5)
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, 'concorrencia.sqlite3')
+        criar_banco(caminho, linhas)
+
+        def conectar(leitura=False):
+            if ajustado and leitura:
+                conexao = sqlite3.connect(uri_somente_leitura(caminho), uri=True, timeout=timeout,
+                                          isolation_level=None, check_same_thread=False)
+                _pragmas(conexao, settings.SQLITE_PRAGMAS_LEITURA)
+            else:
+                conexao = sqlite3.connect(caminho, timeout=timeout, isolation_level=None,
+                                          check_same_thread=False)
+                if ajustado:
+                    _pragmas(conexao, settings.SQLITE_PRAGMAS)
+            return conexao
+
+        conectar().close()  # o primeiro a conectar ativa o WAL no arquivo
+        latencias = []
+        contagem = {'escritas': 0, 'leituras': 0, 'erros': 0}
+        trava = threading.Lock()
+        fim = time.perf_counter() + segundos
+
+        def escritor(numero):
+            conexao = conectar()
+            proximo = numero
+            while time.perf_counter() < fim:
+                inicio = time.perf_counter()
+                try:
+                    conexao.execute('BEGIN IMMEDIATE')
+                    for sql in ESCRITA:
+                        conexao.execute(sql, (proximo % linhas + 1,))
+                    conexao.execute('COMMIT')
+                except sqlite3.OperationalError:
+                    if conexao.in_transaction:
+                        conexao.execute('ROLLBACK')
+                    with trava:
+                        contagem['erros'] += 1
+                    continue
+                with trava:
+                    contagem['escritas'] += 1
+                    latencias.append((time.perf_counter() - inicio) * 1000)
+                proximo += escritores
+            conexao.close()
+
+        def leitor():
+            conexao = conectar(leitura=True)
+            while time.perf_counter() < fim:
+                try:
+                    conexao.execute(LEITURA).fetchall()
+                except sqlite3.OperationalError:
+                    with trava:
+                        contagem['erros'] += 1
+                    continue
+                with trava:
+                    contagem['leituras'] += 1
+            conexao.close()
+
+        threads = [threading.Thread(target=escritor, args=(n,)) for n in range(escritores)]
+        threads += [threading.Thread(target=leitor) for _ in range(leitores)]
+        inicio = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        duracao = time.perf_counter() - inicio
+
+    return {
+        'escritas_por_s': round(contagem['escritas'] / duracao, 1),
+        'leituras_por_s': round(contagem['leituras'] / duracao, 1),
+        'erros': contagem['erros'],
+        'escrita_p95_ms': round(percentil(latencias, 95), 2) if latencias else None,
+    }
+
+
+class Command(BaseCommand):
+    help = ('Mede escritas e leituras concorrentes no SQLite com a configuração padrão '
+            'e com os ajustes de LouerCar/sqlite.py (WAL, PRAGMAs, leitura somente leitura)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--escritores', type=int, default=4, help='Threads gravando')
+        parser.add_argument('--leitores', type=int, default=2, help='Threads lendo relatórios')
+        parser.add_argument('--segundos', type=float, default=5, help='Duração de cada medição')
+        parser.add_argument('--linhas', type=int, default=200_000, help='Linhas da tabela lida')
+        parser.add_argument('--saida', help='Arquivo do relatório JSON')
+
+    def handle(self, *args, **options):
+        parametros = {nome: options[nome] for nome in ('escritores', 'leitores', 'segundos', 'linhas')}
+        resultados = {}
+        for nome, ajustado in (('padrao', False), ('ajustado', True)):
+            resultados[nome] = medir(ajustado, **parametros)
+            self.stdout.write(
+                f"{nome:<10} {resultados[nome]['escritas_por_s']:>9.1f} escritas/s "
+                f"{resultados[nome]['leituras_por_s']:>7.1f} leituras/s "
+                f"p95 escrita {resultados[nome]['escrita_p95_ms'] or 0:>8.1f} ms "
+                f"{resultados[nome]['erros']:>4} erro(s)"
+            )
+
+        padrao, ajustado = resultados['padrao'], resultados['ajustado']
+        if padrao['escritas_por_s']:
+            ganho = ajustado['escritas_por_s'] / padrao['escritas_por_s']
+            self.stdout.write(self.style.SUCCESS(f'✅ Escritas com os ajustes: {ganho:.1f}x'))
+
+        if options['saida']:
+            with open(options['saida'], 'w', encoding='utf-8') as arquivo:
+                json.dump({'parametros': parametros, 'resultados': resultados}, arquivo, indent=2)
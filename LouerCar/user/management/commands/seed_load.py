@@ -0,0 +1,245 @@
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from aluguel import ocupacao
+from aluguel.disponibilidade import invalidar_indice
+from aluguel.estatisticas import invalidar_estatisticas_alugueis, invalidar_estatisticas_solicitacoes
+from aluguel.models import Aluguel, Pagamento, SolicitacaoAluguel
+from busca.indice import reindexar_tudo
+from carro.cache_catalogo import invalidar_catalogo
+from carro.estatisticas import invalidar_estatisticas_frota
+from carro.models import Carro
+from LouerCar.versoes import TABELAS, incrementar
+from relatorios.resumos import reconstruir as reconstruir_resumos
+from user.cache_usuario import invalidar_tags
+from user.models import Grupo, PerfilCliente, Tag, Usuario, UsuarioGrupo, UsuarioTag
+from user.utils import criar_grupos_padrao
+
+MODELOS = [
+    ('Onix', 120), ('HB20', 115), ('Gol', 100), ('Argo', 125), ('Mobi', 95),
+    ('Corolla', 220), ('Civic', 230), ('Compass', 280), ('T-Cross', 210),
+    ('Renegade', 240), ('Kwid', 90), ('Polo', 130), ('Creta', 250), ('Hilux', 350),
+]
+DIA = timedelta(days=1)
+
+
+def placa(n):
+    """Placa única a partir de um número: AAA-0000, AAA-0001, ..."""
+    letras, numero = divmod(n, 10000)
+    prefixo = ''
+    for _ in range(3):
+        letras, resto = divmod(letras, 26)
+        prefixo = chr(65 + resto) + prefixo
+    return f'{prefixo}-{numero:04d}'
+
+
+class Command(BaseCommand):
+    help = 'Gera uma massa de dados sintética (bulk_create) para testes de carga'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--escala', type=float, default=1.0,
+                            help='Multiplica os volumes padrão (ex.: 0.01 para 1%%)')
+        parser.add_argument('--carros', type=int, help='Carros (padrão 100 mil)')
+        parser.add_argument('--usuarios', type=int, help='Usuários (padrão 500 mil)')
+        parser.add_argument('--alugueis', type=int,
+                            help='Aluguéis, com solicitação e pagamento cada (padrão 1 milhão)')
+        parser.add_argument('--lote', type=int, default=5000, help='Linhas por bulk_create')
+        parser.add_argument('--semente', type=int, default=42, help='Semente do gerador aleatório')
+        parser.add_argument('--sem-indice-busca', action='store_true',
+                            help='Não reconstrói o índice de busca no final')
+
+    def handle(self, *args, **options):
+        escala = options['escala']
+        self.lote = options['lote']
+        self.rng = random.Random(options['semente'])
+        self.agora = timezone.now()
+        total_carros = options['carros'] or max(1, int(100_000 * escala))
+        # Ao menos um funcionário e um cliente
+        total_usuarios = max(2, options['usuarios'] or int(500_000 * escala))
+        total_alugueis = options['alugueis'] or int(1_000_000 * escala)
+
+        inicio = time.perf_counter()
+        criar_grupos_padrao()
+        funcionarios, perfis = self.criar_usuarios(total_usuarios)
+        carros = self.criar_carros(total_carros)
+        self.criar_alugueis(total_alugueis, carros, perfis, funcionarios)
+
+        # bulk_create não dispara signals nem Aluguel.save(): ajusta a
+        # ocupação dos carros e invalida caches e índices aqui
+        ocupacao.recalcular()
+        invalidar_estatisticas_frota()
+        invalidar_catalogo()
+        invalidar_estatisticas_alugueis()
+        invalidar_estatisticas_solicitacoes()
+        invalidar_indice()
+        invalidar_tags()
+        incrementar(*TABELAS)
+        if not options['sem_indice_busca']:
+            self.stdout.write('🔎 Reconstruindo índice de busca...')
+            reindexar_tudo()
+        self.stdout.write('📊 Recalculando resumos diários...')
+        reconstruir_resumos()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Massa gerada em {time.perf_counter() - inicio:.1f}s: {total_usuarios} usuários, '
+            f'{total_carros} carros, {total_alugueis} aluguéis/solicitações/pagamentos'
+        ))
+
+    def em_lotes(self, total):
+        for inicio in range(0, total, self.lote):
+            yield range(inicio, min(inicio + self.lote, total))
+
+    def criar_usuarios(self, total):
+        """Cria usuários (1% funcionários), perfis de cliente, tags e grupos"""
+        self.stdout.write(f'👤 Criando {total} usuários...')
+        tags = {tag.nome: tag.pk for tag in Tag.objects.all()}
+        grupos = {}
+        for grupo in Grupo.objects.all():
+            grupos.setdefault(grupo.tag_id, []).append(grupo.pk)
+        senha = make_password('Carga1234')
+        deslocamento = Usuario.objects.count()
+        total_funcionarios = max(1, total // 100)
+        funcionarios, perfis = [], []
+
+        for numeros in self.em_lotes(total):
+            with transaction.atomic():
+                usuarios = Usuario.objects.bulk_create([
+                    Usuario(
+                        username=f'carga{deslocamento + n}',
+                        email=f'carga{deslocamento + n}@louercar.test',
+                        password=senha,
+                        is_staff=n < total_funcionarios,
+                    )
+                    for n in numeros
+                ], batch_size=self.lote)
+
+                usuario_tags, usuario_grupos, novos_perfis = [], [], []
+                for usuario in usuarios:
+                    if usuario.is_staff:
+                        funcionarios.append(usuario.pk)
+                        nomes = ['Funcionário']
+                    else:
+                        novos_perfis.append(PerfilCliente(
+                            usuario=usuario,
+                            CNH=f'CG{usuario.pk:011d}',
+                            telefone=f'119{self.rng.randrange(10**8):08d}',
+                            endereco=f'Rua {self.rng.randrange(1, 2000)}, {self.rng.randrange(1, 999)}',
+                        ))
+                        nomes = ['Cliente Novo']
+                        if self.rng.random() < 0.1:
+                            nomes.append('Cliente VIP')
+                    for nome in nomes:
+                        tag_id = tags.get(nome)
+                        if tag_id is None:
+                            continue
+                        usuario_tags.append(UsuarioTag(usuario=usuario, tag_id=tag_id))
+                        for grupo_id in grupos.get(tag_id, []):
+                            if self.rng.random() < 0.5:
+                                usuario_grupos.append(UsuarioGrupo(usuario=usuario, grupo_id=grupo_id))
+
+                perfis.extend(
+                    perfil.pk for perfil in
+                    PerfilCliente.objects.bulk_create(novos_perfis, batch_size=self.lote)
+                )
+                UsuarioTag.objects.bulk_create(usuario_tags, batch_size=self.lote)
+                UsuarioGrupo.objects.bulk_create(usuario_grupos, batch_size=self.lote)
+
+        return funcionarios, perfis
+
+    def criar_carros(self, total):
+        """Cria carros: ~1/7 alugados, ~1/20 em manutenção, o resto disponível"""
+        self.stdout.write(f'🚗 Criando {total} carros...')
+        deslocamento = Carro.objects.count()
+        carros = []
+        for numeros in self.em_lotes(total):
+            novos = []
+            for n in numeros:
+                modelo, diaria = MODELOS[n % len(MODELOS)]
+                if n % 7 == 0:
+                    status = 'alugado'
+                elif n % 20 == 1:
+                    status = 'manutencao'
+                else:
+                    status = 'disponivel'
+                novos.append(Carro(
+                    modelo=f'{modelo} {2015 + n % 10}',
+                    placa=placa(deslocamento + n),
+                    ano=2015 + n % 10,
+                    status=status,
+                    preco_diaria=Decimal(diaria),
+                ))
+            with transaction.atomic():
+                carros.extend(
+                    (carro.pk, carro.status, carro.preco_diaria)
+                    for carro in Carro.objects.bulk_create(novos, batch_size=self.lote)
+                )
+        return carros
+
+    def criar_alugueis(self, total, carros, perfis, funcionarios):
+        """
+        Cria aluguéis sem sobreposição por carro: o aluguel n usa o carro
+        n % carros, na janela de 10 dias número n // carros contando para trás
+        a partir de hoje. A janela atual fica ativa nos carros alugados.
+        """
+        self.stdout.write(f'📋 Criando {total} aluguéis, solicitações e pagamentos...')
+        for numeros in self.em_lotes(total):
+            alugueis = []
+            for n in numeros:
+                carro_id, status_carro, diaria = carros[n % len(carros)]
+                janela = n // len(carros)
+                dias = self.rng.randint(1, 7)
+                data_inicio = self.agora - (janela * 10 + 3) * DIA
+                if janela == 0 and status_carro == 'alugado':
+                    status = 'ativo'
+                elif janela == 0:
+                    # Carros livres: a janela atual fica no passado
+                    data_inicio -= 10 * DIA
+                    status = 'finalizado'
+                else:
+                    status = 'cancelado' if self.rng.random() < 0.1 else 'finalizado'
+                alugueis.append(Aluguel(
+                    perfil_cliente_id=self.rng.choice(perfis),
+                    carro_id=carro_id,
+                    funcionario_id=self.rng.choice(funcionarios),
+                    data_inicio=data_inicio,
+                    data_fim=data_inicio + dias * DIA,
+                    valor=diaria * dias,
+                    status=status,
+                ))
+
+            with transaction.atomic():
+                alugueis = Aluguel.objects.bulk_create(alugueis, batch_size=self.lote)
+                solicitacoes, pagamentos = [], []
+                for aluguel in alugueis:
+                    solicitacoes.append(SolicitacaoAluguel(
+                        perfil_cliente_id=aluguel.perfil_cliente_id,
+                        carro_id=aluguel.carro_id,
+                        data_inicio=aluguel.data_inicio,
+                        data_fim=aluguel.data_fim,
+                        valor_estimado=aluguel.valor,
+                        status='aprovado',
+                        aluguel_criado=aluguel,
+                    ))
+                    if aluguel.status == 'cancelado':
+                        status_pagamento, pago_em = 'cancelado', None
+                    elif aluguel.status == 'ativo' and self.rng.random() < 0.5:
+                        status_pagamento, pago_em = 'pendente', None
+                    else:
+                        status_pagamento, pago_em = 'aprovado', aluguel.data_inicio
+                    pagamentos.append(Pagamento(
+                        aluguel=aluguel,
+                        metodo_pagamento=self.rng.choice(['pix', 'cartao', 'boleto', 'dinheiro']),
+                        valor=aluguel.valor,
+                        status=status_pagamento,
+                        data_vencimento=aluguel.data_inicio + 3 * DIA,
+                        data_pagamento=pago_em,
+                    ))
+                SolicitacaoAluguel.objects.bulk_create(solicitacoes, batch_size=self.lote)
+                Pagamento.objects.bulk_create(pagamentos, batch_size=self.lote)
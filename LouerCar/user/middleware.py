@@ -1,4 +1,6 @@
 from django.shortcuts import redirect
+from django.utils.functional import SimpleLazyObject
+from .cache_usuario import carregar_usuario, perfil_do_usuario
 
 class AuthMiddleware:
     """Middleware para verificar autenticação em todas as páginas"""
@@ -26,17 +28,17 @@ class AuthMiddleware:
         if not is_public and not request.session.get('user_id'):
             return redirect('login')
         
-        # Adicionar usuário ao request
-        if request.session.get('user_id'):
-            from .models import Usuario
-            try:
-                request.user_obj = Usuario.objects.get(id_usuario=request.session.get('user_id'))
-            except Usuario.DoesNotExist:
-                # Sessão inválida - limpar e redirecionar
-                request.session.flush()
-                return redirect('login')
+        # Adicionar usuário e perfil ao request (carregados só quando usados,
+        # uma vez por requisição, a partir do cache quando possível).
+        # Se o usuário não existir mais, ambos avaliam como falso e os
+        # decorators limpam a sessão.
+        user_id = request.session.get('user_id')
+        if user_id:
+            request.user_obj = SimpleLazyObject(lambda: carregar_usuario(user_id))
+            request.perfil = SimpleLazyObject(lambda: perfil_do_usuario(request.user_obj))
         else:
             request.user_obj = None
+            request.perfil = None
         
         response = self.get_response(request)
-        return response
\ No newline at end of file
+        return response
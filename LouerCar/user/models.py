@@ -130,14 +130,9 @@ class Usuario(models.Model):
     
     def get_grupos_visiveis(self):
         """Retorna grupos que o usuário pode ver baseado em suas tags"""
-        tags_usuario = self.tags.all()
-        
-        if tags_usuario.exists():
-            # Retorna grupos que têm alguma das tags do usuário
-            return Grupo.objects.filter(tag__in=tags_usuario).distinct()
-        else:
-            # Se não tem tags, não vê nenhum grupo
-            return Grupo.objects.none()
+        from .visibilidade import visibilidade_usuario
+        # Ids vindos do índice de visibilidade (sem tags, nenhum grupo)
+        return Grupo.objects.filter(pk__in=visibilidade_usuario(self.pk)['visiveis'])
 
 
 class UsuarioTag(models.Model):
@@ -0,0 +1,60 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from LouerCar.versoes import incrementar_apos_commit
+
+from .cache_usuario import invalidar_tags, invalidar_usuario
+from . import visibilidade
+from .estatisticas import invalidar_contagens_tags
+from .models import Grupo, PerfilCliente, Tag, Usuario, UsuarioGrupo, UsuarioTag
+
+
+@receiver([post_save, post_delete], sender=Usuario)
+def usuario_alterado(sender, instance, **kwargs):
+    """Descarta o usuário do cache quando ele muda"""
+    invalidar_usuario(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=PerfilCliente)
+@receiver([post_save, post_delete], sender=UsuarioTag)
+def dados_do_usuario_alterados(sender, instance, **kwargs):
+    """Descarta o usuário do cache quando o perfil ou as tags dele mudam"""
+    invalidar_usuario(instance.usuario_id)
+
+
+@receiver([post_save, post_delete], sender=Tag)
+def tag_alterada(sender, instance, **kwargs):
+    """Tags são exibidas para todos os usuários: descarta o cache de todos"""
+    invalidar_tags()
+
+
+@receiver([post_save, post_delete], sender=Tag)
+@receiver([post_save, post_delete], sender=Grupo)
+@receiver([post_save, post_delete], sender=UsuarioTag)
+def contagens_tags_alteradas(sender, instance, **kwargs):
+    """Invalida as contagens de usuários/grupos por tag"""
+    invalidar_contagens_tags()
+
+
+@receiver([post_save, post_delete], sender=UsuarioTag)
+@receiver([post_save, post_delete], sender=UsuarioGrupo)
+def visibilidade_usuario_alterada(sender, instance, **kwargs):
+    """Recalcula os grupos visíveis/participações só do usuário afetado"""
+    visibilidade.invalidar_usuario(instance.usuario_id)
+
+
+@receiver([post_save, post_delete], sender=Tag)
+@receiver([post_save, post_delete], sender=Grupo)
+def grupos_alterados(sender, instance, **kwargs):
+    """Grupo (ou a tag exibida nele) mudou: recalcula o índice de visibilidade"""
+    visibilidade.invalidar_grupos()
+
+
+
+@receiver([post_save, post_delete], sender=Usuario)
+@receiver([post_save, post_delete], sender=PerfilCliente)
+@receiver([post_save, post_delete], sender=UsuarioTag)
+@receiver([post_save, post_delete], sender=Tag)
+def versao_usuarios_alterada(sender, instance, **kwargs):
+    """Usuário, perfil e tags aparecem aninhados nas respostas da API (ETag)"""
+    incrementar_apos_commit('usuario')
@@ -1,3 +1,415 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from aluguel.models import Aluguel, Pagamento, SolicitacaoAluguel
+from carro.models import Carro
+from rest_framework.test import APIClient
+from LouerCar import postgres
+from LouerCar.roteador import RoteadorLeituraEscrita
+from . import cache_usuario, utils, visibilidade
+from .estatisticas import contagens_tags
+from .models import Grupo, PerfilCliente, Tag, Usuario, UsuarioGrupo, UsuarioTag
+
+
+class CargaEBenchmarkTest(TestCase):
+    """seed_load gera uma massa consistente e o benchmark mede todos os alvos"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_seed_load_e_benchmark(self):
+        call_command('seed_load', usuarios=30, carros=10, alugueis=40, lote=7, stdout=StringIO())
+
+        self.assertEqual(Usuario.objects.count(), 30)
+        self.assertEqual(PerfilCliente.objects.count(), 29)
+        self.assertEqual(Carro.objects.count(), 10)
+        self.assertEqual(Aluguel.objects.count(), 40)
+        self.assertEqual(SolicitacaoAluguel.objects.count(), 40)
+        self.assertEqual(Pagamento.objects.count(), 40)
+        self.assertTrue(UsuarioTag.objects.exists())
+        # Um único aluguel ativo por carro alugado, nenhum nos demais
+        self.assertEqual(
+            Aluguel.objects.filter(status='ativo').count(),
+            Carro.objects.filter(status='alugado').count(),
+        )
+
+        with tempfile.TemporaryDirectory() as pasta:
+            saida = os.path.join(pasta, 'relatorio.json')
+            call_command('benchmark', repeticoes=1, saida=saida, stdout=StringIO(), stderr=StringIO())
+            with open(saida, encoding='utf-8') as arquivo:
+                relatorio = json.load(arquivo)
+
+        resultados = relatorio['resultados']
+        for nome in ['carro_list', 'aluguel_list', 'dashboard_funcionario', 'tag_list',
+                     'meus_grupos', 'api:carro-list', 'api:pagamento-list']:
+            with self.subTest(nome=nome):
+                self.assertEqual(resultados[nome]['status'], 200)
+                self.assertGreater(resultados[nome]['consultas'], 0)
+        self.assertEqual(relatorio['volumes']['alugueis'], 40)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'PRAGMAs e alias de leitura do SQLite')
+class BancoSQLiteTest(TransactionTestCase):
+    """PRAGMAs por conexão e benchmark de concorrência"""
+
+    databases = '__all__'
+
+    def test_pragmas(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+
+    def test_benchmark_concorrencia(self):
+        saida = StringIO()
+        call_command('benchmark_concorrencia', escritores=2, leitores=1, segundos=0.2, linhas=200,
+                     stdout=saida)
+        self.assertIn('padrao', saida.getvalue())
+        self.assertIn('ajustado', saida.getvalue())
+
+
+@skipUnless('leitura' in settings.DATABASES, 'alias de leitura só existe no SQLite')
+class RoteadorLeituraEscritaTest(TransactionTestCase):
+    """
+    Leituras fora de transação vão para 'leitura'; dentro de atomic() e as
+    escritas ficam no 'default'. Precisa de TransactionTestCase: no TestCase
+    tudo roda dentro de um atomic no 'default'.
+    """
+
+    # No PostgreSQL a classe é pulada, mas o runner confere os aliases antes
+    databases = {'default', 'leitura'} & set(settings.DATABASES)
+
+    def setUp(self):
+        self.roteador = RoteadorLeituraEscrita()
+
+    def consultas(self, alias, funcao):
+        with CaptureQueriesContext(connections[alias]) as capturadas:
+            funcao()
+        return len(capturadas)
+
+    def test_leitura_fora_de_transacao(self):
+        self.assertEqual(self.roteador.db_for_read(Carro), 'leitura')
+        self.assertEqual(self.roteador.db_for_write(Carro), 'default')
+        self.assertEqual(Carro.objects.all().db, 'leitura')
+
+        Carro.objects.create(modelo='Onix', placa='ABC-1234', ano=2024)
+        # O mesmo arquivo: a gravação confirmada já é vista pela conexão de leitura
+        self.assertEqual(self.consultas('default', lambda: self.assertEqual(Carro.objects.count(), 1)), 0)
+        self.assertEqual(self.consultas('leitura', Carro.objects.count), 1)
+
+    def test_leitura_dentro_de_atomic(self):
+        with transaction.atomic():
+            self.assertEqual(self.roteador.db_for_read(Carro), 'default')
+            carro = Carro.objects.create(modelo='Onix', placa='ABC-1234', ano=2024)
+            # Enxerga o que a própria transação gravou, ainda sem commit
+            self.assertEqual(self.consultas('leitura', lambda: self.assertEqual(
+                list(Carro.objects.all()), [carro])), 0)
+            self.assertEqual(Carro.objects.select_for_update().db, 'default')
+        self.assertEqual(self.roteador.db_for_read(Carro), 'leitura')
+
+    def test_sem_alias_de_leitura(self):
+        with mock.patch.dict(settings.DATABASES):
+            del settings.DATABASES['leitura']
+            self.assertIsNone(self.roteador.db_for_read(Carro))
+
+
+class ConfiguracaoPostgresTest(TestCase):
+    """DATABASES montado das variáveis de ambiente (LouerCar/postgres.py)"""
+
+    def test_conexoes_persistentes(self):
+        bancos = postgres.bancos({'DB_NAME': 'frota', 'DB_HOST': 'db', 'DB_CONN_MAX_AGE': '120'})
+        self.assertEqual(list(bancos), ['default'])
+        default = bancos['default']
+        self.assertEqual(default['ENGINE'], 'django.db.backends.postgresql')
+        self.assertEqual((default['NAME'], default['HOST']), ('frota', 'db'))
+        self.assertEqual(default['CONN_MAX_AGE'], 120)
+        self.assertTrue(default['CONN_HEALTH_CHECKS'])
+        self.assertNotIn('pool', default['OPTIONS'])
+
+    def test_pool(self):
+        default = postgres.bancos({'DB_POOL': '1', 'DB_POOL_MAX': '20'})['default']
+        # O Django recusa pool com conexões persistentes e liga o
+        # check_connection do pool a partir de CONN_HEALTH_CHECKS
+        self.assertEqual(default['CONN_MAX_AGE'], 0)
+        self.assertTrue(default['CONN_HEALTH_CHECKS'])
+        self.assertEqual(default['OPTIONS']['pool'], {'min_size': 2, 'max_size': 20, 'timeout': 10.0})
+
+
+class VisibilidadeGruposTest(TestCase):
+    """Grupos visíveis em cache, invalidados após o commit e sem voltar a versões antigas"""
+
+    def setUp(self):
+        cache.clear()
+        self.usuario = Usuario.objects.create(username='cliente', email='cliente@teste.com')
+        self.vip = Tag.objects.create(nome='VIP')
+        self.novo = Tag.objects.create(nome='Novo')
+        self.grupo_vip = Grupo.objects.create(nome='Clube VIP', tag=self.vip)
+        self.grupo_novo = Grupo.objects.create(nome='Boas-vindas', tag=self.novo)
+        UsuarioTag.objects.create(usuario=self.usuario, tag=self.novo)
+
+    def visiveis(self):
+        return visibilidade.visibilidade_usuario(self.usuario.pk)['visiveis']
+
+    def test_cache_e_invalidacao_por_usuario(self):
+        self.assertEqual(self.visiveis(), [self.grupo_novo.pk])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.visiveis(), [self.grupo_novo.pk])
+
+        # Antes do commit a entrada antiga continua valendo
+        with self.captureOnCommitCallbacks(execute=True):
+            UsuarioTag.objects.create(usuario=self.usuario, tag=self.vip)
+            with self.assertNumQueries(0):
+                self.assertEqual(self.visiveis(), [self.grupo_novo.pk])
+        self.assertEqual(self.visiveis(), [self.grupo_novo.pk, self.grupo_vip.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            UsuarioGrupo.objects.create(usuario=self.usuario, grupo=self.grupo_vip)
+        self.assertEqual(
+            visibilidade.visibilidade_usuario(self.usuario.pk)['participando'], {self.grupo_vip.pk}
+        )
+
+    def test_grupo_alterado_invalida_todos(self):
+        self.visiveis()
+        with self.captureOnCommitCallbacks(execute=True):
+            outro = Grupo.objects.create(nome='Avisos', tag=self.novo)
+        self.assertEqual(self.visiveis(), [outro.pk, self.grupo_novo.pk])
+
+    def test_versao_nao_volta_quando_a_chave_some(self):
+        antiga = visibilidade._versao()
+        self.visiveis()
+        with self.captureOnCommitCallbacks(execute=True):
+            Grupo.objects.create(nome='Avisos', tag=self.novo)
+        self.visiveis()
+        # Remoção por falta de espaço: a versão recomeça do relógio, não de
+        # um valor que já valeu (e cujas entradas ainda podem estar no cache)
+        cache.delete(f'versao:{visibilidade.TABELA_VERSAO}')
+        self.assertNotIn(visibilidade._versao(), (antiga, antiga + 1))
+        self.assertGreater(visibilidade._versao(), antiga + 1)
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class CacheUsuarioTest(TestCase):
+    """Usuário logado carregado uma vez (perfil + tags) e guardado em cache versionado"""
+
+    def setUp(self):
+        cache.clear()
+        self.usuario = Usuario.objects.create(username='cliente', email='cliente@teste.com')
+        self.perfil = PerfilCliente.objects.create(
+            usuario=self.usuario, CNH='CNH1', telefone='11999999999', endereco='Rua A'
+        )
+        self.tag = Tag.objects.create(nome='Cliente Novo')
+        UsuarioTag.objects.create(usuario=self.usuario, tag=self.tag)
+
+    def test_cache_e_invalidacao(self):
+        with self.assertNumQueries(2):
+            usuario = cache_usuario.carregar_usuario(self.usuario.pk)
+        with self.assertNumQueries(0):
+            usuario = cache_usuario.carregar_usuario(self.usuario.pk)
+            self.assertEqual(cache_usuario.perfil_do_usuario(usuario).CNH, 'CNH1')
+            self.assertEqual([tag.nome for tag in usuario.tags.all()], ['Cliente Novo'])
+        self.assertIsNone(cache_usuario.carregar_usuario(10**6))
+
+        # Antes do commit a entrada antiga continua valendo
+        with self.captureOnCommitCallbacks(execute=True):
+            self.perfil.telefone = '11888888888'
+            self.perfil.save()
+            self.assertEqual(cache_usuario.carregar_usuario(self.usuario.pk).perfilcliente.telefone, '11999999999')
+        self.assertEqual(cache_usuario.carregar_usuario(self.usuario.pk).perfilcliente.telefone, '11888888888')
+
+        # Tag renomeada: vale para todos os usuários
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tag.nome = 'Cliente VIP'
+            self.tag.save()
+        usuario = cache_usuario.carregar_usuario(self.usuario.pk)
+        self.assertEqual([tag.nome for tag in usuario.tags.all()], ['Cliente VIP'])
+
+    def test_versao_nao_volta_quando_a_chave_some(self):
+        cache_usuario.carregar_usuario(self.usuario.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            Usuario.objects.filter(pk=self.usuario.pk).update(username='renomeado')
+            cache_usuario.invalidar_usuario(self.usuario.pk)
+        self.assertEqual(cache_usuario.carregar_usuario(self.usuario.pk).username, 'renomeado')
+        # A versão recomeça do relógio: a entrada da primeira versão não volta a valer
+        cache.delete(f'versao:usuario:{self.usuario.pk}')
+        self.assertEqual(cache_usuario.carregar_usuario(self.usuario.pk).username, 'renomeado')
+
+    def test_middleware_reaproveita_o_usuario(self):
+        sessao = self.client.session
+        sessao['user_id'] = self.usuario.pk
+        sessao['is_staff'] = False
+        sessao.save()
+
+        def consultas_ao_usuario():
+            with CaptureQueriesContext(connection) as consultas:
+                self.assertEqual(self.client.get('/dashboard/cliente/').status_code, 200)
+            return [c['sql'] for c in consultas.captured_queries if c['sql'].startswith('SELECT "usuario"."id_usuario"')]
+
+        # Uma consulta na primeira requisição (decorator e view usam o mesmo objeto), nenhuma depois
+        self.assertEqual(len(consultas_ao_usuario()), 1)
+        self.assertEqual(consultas_ao_usuario(), [])
+
+
+@override_settings(ALLOWED_HOSTS=['testserver'])
+class ContagensTagsTest(TestCase):
+    """Usuários e grupos por tag em uma consulta, em cache compartilhado"""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = Usuario.objects.create(username='admin', email='admin@teste.com', is_staff=True)
+        self.usuarios = [
+            Usuario.objects.create(username=f'cliente{n}', email=f'cliente{n}@teste.com') for n in range(3)
+        ]
+        self.vip = Tag.objects.create(nome='VIP')
+        self.novo = Tag.objects.create(nome='Novo')
+        for usuario in self.usuarios:
+            UsuarioTag.objects.create(usuario=usuario, tag=self.novo)
+        UsuarioTag.objects.create(usuario=self.usuarios[0], tag=self.vip)
+        Grupo.objects.create(nome='Clube VIP', tag=self.vip)
+
+    def criar_tags(self, quantidade):
+        inicio = Tag.objects.count()
+        for n in range(inicio, inicio + quantidade):
+            tag = Tag.objects.create(nome=f'Tag {n}')
+            Grupo.objects.create(nome=f'Grupo {n}', tag=tag)
+            UsuarioTag.objects.create(usuario=self.usuarios[n % 3], tag=tag)
+
+    def test_cache_e_invalidacao(self):
+        with self.assertNumQueries(1):
+            contagens = contagens_tags()
+        # Uma tag com 1 usuário e 1 grupo: os totais não se multiplicam
+        self.assertEqual(contagens, {self.vip.pk: (1, 1), self.novo.pk: (3, 0)})
+        with self.assertNumQueries(0):
+            contagens_tags()
+
+        UsuarioTag.objects.filter(usuario=self.usuarios[2], tag=self.novo).delete()
+        Grupo.objects.create(nome='Boas-vindas', tag=self.novo)
+        self.assertEqual(contagens_tags()[self.novo.pk], (2, 1))
+
+    def test_tag_list_e_api(self):
+        sessao = self.client.session
+        sessao['user_id'] = self.admin.pk
+        sessao['is_staff'] = True
+        sessao.save()
+
+        def consultas():
+            cache.delete('estatisticas:tags')
+            with CaptureQueriesContext(connection) as capturadas:
+                self.assertEqual(self.client.get('/tags/').status_code, 200)
+            return len(capturadas)
+
+        # A primeira requisição também carrega o usuário logado
+        consultas()
+        poucas = consultas()
+        self.criar_tags(10)
+        self.assertEqual(consultas(), poucas)
+        resposta = self.client.get('/tags/')
+        tags = {tag.nome: tag for tag in resposta.context['tags']}
+        self.assertEqual((tags['VIP'].total_usuarios, tags['VIP'].total_grupos), (1, 1))
+
+        # A API lê o mesmo cache
+        api = APIClient()
+        api.force_authenticate(User.objects.create(username='admin'))
+        with CaptureQueriesContext(connection) as capturadas:
+            resultados = api.get('/api/tags/').json()['results']
+        self.assertFalse([c for c in capturadas.captured_queries if 'COUNT' in c['sql']])
+        novo = next(tag for tag in resultados if tag['nome'] == 'Novo')
+        self.assertEqual((novo['total_usuarios'], novo['total_grupos']), (3, 0))
+
+
+class AtribuirTagsGruposTest(TestCase):
+    """Tags de função e grupos atribuídos em massa, com número fixo de consultas"""
+
+    def setUp(self):
+        cache.clear()
+        self.tags = {nome: Tag.objects.create(nome=nome) for nome in utils.TAGS_FUNCAO}
+        self.extra = Tag.objects.create(nome='Motorista de app')
+        self.grupo_novos = Grupo.objects.create(nome='Novos', tag=self.tags['Cliente Novo'])
+        self.grupo_equipe = Grupo.objects.create(nome='Equipe', tag=self.tags['Funcionário'])
+        self.grupo_extra = Grupo.objects.create(nome='Apps', tag=self.extra)
+
+    def criar(self, quantidade, **campos):
+        prefixo = 'func' if campos.get('is_staff') else 'cli'
+        return [
+            Usuario.objects.create(username=f'{prefixo}{n}', email=f'{prefixo}{n}@teste.com', **campos)
+            for n in range(quantidade)
+        ]
+
+    def tags_de(self, usuario):
+        return set(UsuarioTag.objects.filter(usuario=usuario).values_list('tag__nome', flat=True))
+
+    def grupos_de(self, usuario):
+        return set(UsuarioGrupo.objects.filter(usuario=usuario).values_list('grupo__nome', flat=True))
+
+    def test_em_massa_e_idempotente(self):
+        clientes = self.criar(5)
+        funcionario, = self.criar(1, is_staff=True)
+
+        with CaptureQueriesContext(connection) as poucos:
+            utils.atribuir_tags_e_grupos(Usuario.objects.filter(pk__in=[clientes[0].pk, funcionario.pk]))
+        with CaptureQueriesContext(connection) as muitos:
+            resultado = utils.atribuir_tags_e_grupos(Usuario.objects.all())
+        # Consultas por lote, não por usuário
+        self.assertEqual(len(muitos), len(poucos))
+        self.assertEqual((resultado['tags_criadas'], resultado['grupos_criados']), (4, 4))
+
+        self.assertEqual(self.tags_de(clientes[3]), {'Cliente Novo'})
+        self.assertEqual(self.grupos_de(clientes[3]), {'Novos'})
+        self.assertEqual(self.tags_de(funcionario), {'Funcionário'})
+        self.assertEqual(self.grupos_de(funcionario), {'Equipe'})
+
+        de_novo = utils.atribuir_tags_e_grupos(Usuario.objects.all())
+        self.assertEqual((de_novo['tags_criadas'], de_novo['grupos_criados']), (0, 0))
+
+    def test_substituir_troca_as_tags_de_funcao(self):
+        usuario, = self.criar(1)
+        UsuarioTag.objects.create(usuario=usuario, tag=self.tags['Cliente VIP'])
+        UsuarioTag.objects.create(usuario=usuario, tag=self.extra)
+        Usuario.objects.filter(pk=usuario.pk).update(is_staff=True)
+
+        resultado = utils.atribuir_tags_e_grupos(Usuario.objects.filter(pk=usuario.pk), substituir=True)
+        self.assertEqual(resultado['tags_removidas'], 1)
+        self.assertEqual(self.tags_de(usuario), {'Funcionário', 'Motorista de app'})
+
+    def test_funcoes_de_compatibilidade_mantem_o_contrato(self):
+        usuario, = self.criar(1)
+        UsuarioTag.objects.create(usuario=usuario, tag=self.extra)
+
+        # Só grupos das tags que o usuário já tem, sem atribuir tags
+        self.assertEqual(utils.adicionar_usuario_em_grupo_automatico(usuario), ['Apps'])
+        self.assertEqual(self.tags_de(usuario), {'Motorista de app'})
+
+        # Só tags, sem entrar em grupos
+        self.assertEqual(utils.atualizar_tags_por_funcao(usuario), ['Cliente Novo'])
+        self.assertEqual(self.tags_de(usuario), {'Cliente Novo', 'Motorista de app'})
+        self.assertEqual(self.grupos_de(usuario), {'Apps'})
+
+    def test_invalidacao_global_acima_do_limite(self):
+        self.criar(3)
+        with mock.patch.object(utils, 'LIMITE_INVALIDACAO_INDIVIDUAL', 2), \
+                mock.patch.object(utils, 'invalidar_tags') as invalidar_tags, \
+                mock.patch.object(utils, 'invalidar_usuario') as invalidar_usuario, \
+                mock.patch.object(utils.visibilidade, 'invalidar_grupos') as invalidar_grupos:
+            utils.atribuir_tags_e_grupos(Usuario.objects.all())
+        invalidar_tags.assert_called_once_with()
+        invalidar_grupos.assert_called_once_with()
+        invalidar_usuario.assert_not_called()
+
+        # Abaixo do limite: só os usuários alterados
+        novo, = self.criar(1, is_staff=True)
+        with mock.patch.object(utils, 'invalidar_usuario') as invalidar_usuario, \
+                mock.patch.object(utils.visibilidade, 'invalidar_grupos') as invalidar_grupos:
+            utils.atribuir_tags_e_grupos(Usuario.objects.all())
+        invalidar_usuario.assert_called_once_with(novo.pk)
+        invalidar_grupos.assert_not_called()
@@ -1,6 +1,13 @@
 # user/utils.py - CRIAR ESTE ARQUIVO NOVO
 
-from .models import Tag, UsuarioTag, Grupo, UsuarioGrupo
+from django.db import transaction
+
+from LouerCar.versoes import incrementar_apos_commit
+
+from . import visibilidade
+from .cache_usuario import invalidar_tags, invalidar_usuario
+from .estatisticas import invalidar_contagens_tags
+from .models import Tag, UsuarioTag, Grupo, UsuarioGrupo, Usuario
 
 def criar_tags_padrao():
     """
@@ -97,75 +104,166 @@ def criar_grupos_padrao():
     return grupos_criados
 
 
+TAGS_FUNCAO = ['Cliente Novo', 'Cliente VIP', 'Funcionário', 'Administrador']
+TAMANHO_LOTE = 2000
+# Acima disso, invalida o cache de todos os usuários de uma vez
+LIMITE_INVALIDACAO_INDIVIDUAL = 1000
+
+
+def tags_da_funcao(is_staff, is_superuser):
+    """Nomes das tags automáticas para a função do usuário"""
+    nomes = []
+    if is_superuser:
+        nomes.append('Administrador')
+    if is_staff:
+        nomes.append('Funcionário')
+    if not is_staff and not is_superuser:
+        nomes.append('Cliente Novo')
+    return nomes
+
+
+def atribuir_tags_e_grupos(usuarios, substituir=False, grupos=True, tags=True):
+    """
+    Motor em massa: atribui as tags da função a todos os usuários do queryset
+    e os coloca nos grupos das suas tags.
+
+    Trabalha em lotes de TAMANHO_LOTE usuários com um número fixo de consultas
+    por lote (tags e participações existentes + bulk_create), independente
+    de quantas tags e grupos existem.
+
+    substituir=True remove antes as tags de função que não valem mais
+    (inclusive 'Cliente VIP'), como numa troca de função. grupos=False só
+    mexe nas tags; tags=False só coloca os usuários nos grupos das tags que
+    eles já têm.
+
+    Retorna {'usuarios', 'tags_criadas', 'tags_removidas', 'grupos_criados',
+    'tags': nomes atribuídos, 'grupos': nomes dos grupos com novos membros}.
+    """
+    tags_por_nome = dict(Tag.objects.filter(nome__in=TAGS_FUNCAO).values_list('nome', 'pk'))
+    ids_tags_funcao = set(tags_por_nome.values())
+    grupos_por_tag = {}
+    nomes_grupos = {}
+    if grupos:
+        for pk, tag_id, nome in Grupo.objects.filter(tag__isnull=False).values_list('pk', 'tag_id', 'nome'):
+            grupos_por_tag.setdefault(tag_id, []).append(pk)
+            nomes_grupos[pk] = nome
+
+    resultado = {
+        'usuarios': 0, 'tags_criadas': 0, 'tags_removidas': 0, 'grupos_criados': 0,
+        'tags': set(), 'grupos': set(),
+    }
+    afetados = []
+    lote = []
+    funcoes = usuarios.order_by().values_list('pk', 'is_staff', 'is_superuser')
+    for linha in funcoes.iterator(chunk_size=TAMANHO_LOTE):
+        lote.append(linha)
+        if len(lote) >= TAMANHO_LOTE:
+            afetados += _processar_lote(lote, tags_por_nome, ids_tags_funcao, grupos_por_tag,
+                                        nomes_grupos, substituir, tags, resultado)
+            lote = []
+    if lote:
+        afetados += _processar_lote(lote, tags_por_nome, ids_tags_funcao, grupos_por_tag,
+                                    nomes_grupos, substituir, tags, resultado)
+
+    _invalidar_caches(afetados)
+    return resultado
+
+
+def _processar_lote(lote, tags_por_nome, ids_tags_funcao, grupos_por_tag, nomes_grupos,
+                    substituir, tags, resultado):
+    """Aplica tags e grupos a um lote de (pk, is_staff, is_superuser); retorna os ids alterados"""
+    ids = [pk for pk, _, _ in lote]
+    esperadas = set()
+    if tags:
+        for pk, is_staff, is_superuser in lote:
+            for nome in tags_da_funcao(is_staff, is_superuser):
+                if nome in tags_por_nome:
+                    esperadas.add((pk, tags_por_nome[nome]))
+                    resultado['tags'].add(nome)
+
+    with transaction.atomic():
+        existentes = {}
+        for pk, usuario_id, tag_id in UsuarioTag.objects.filter(usuario_id__in=ids).values_list(
+            'pk', 'usuario_id', 'tag_id'
+        ):
+            existentes[(usuario_id, tag_id)] = pk
+
+        remover = []
+        if substituir:
+            remover = [
+                par for par in existentes
+                if par[1] in ids_tags_funcao and par not in esperadas
+            ]
+            if remover:
+                UsuarioTag.objects.filter(pk__in=[existentes.pop(par) for par in remover]).delete()
+
+        novas = esperadas - existentes.keys()
+        UsuarioTag.objects.bulk_create(
+            [UsuarioTag(usuario_id=usuario_id, tag_id=tag_id) for usuario_id, tag_id in novas],
+            ignore_conflicts=True,
+        )
+
+        novos_grupos = set()
+        if grupos_por_tag:
+            participando = set(
+                UsuarioGrupo.objects.filter(usuario_id__in=ids).values_list('usuario_id', 'grupo_id')
+            )
+            for usuario_id, tag_id in existentes.keys() | novas:
+                for grupo_id in grupos_por_tag.get(tag_id, []):
+                    if (usuario_id, grupo_id) not in participando:
+                        novos_grupos.add((usuario_id, grupo_id))
+            UsuarioGrupo.objects.bulk_create(
+                [UsuarioGrupo(usuario_id=usuario_id, grupo_id=grupo_id)
+                 for usuario_id, grupo_id in novos_grupos],
+                ignore_conflicts=True,
+            )
+
+    resultado['usuarios'] += len(lote)
+    resultado['tags_criadas'] += len(novas)
+    resultado['tags_removidas'] += len(remover)
+    resultado['grupos_criados'] += len(novos_grupos)
+    resultado['grupos'].update(nomes_grupos[grupo_id] for _, grupo_id in novos_grupos)
+    return list({usuario_id for usuario_id, _ in novas | novos_grupos})
+
+
+def _invalidar_caches(ids):
+    """bulk_create não dispara signals: invalida os caches dos usuários alterados"""
+    if not ids:
+        return
+    if len(ids) > LIMITE_INVALIDACAO_INDIVIDUAL:
+        invalidar_tags()
+        visibilidade.invalidar_grupos()
+    else:
+        for user_id in ids:
+            invalidar_usuario(user_id)
+            visibilidade.invalidar_usuario(user_id)
+    invalidar_contagens_tags()
+    incrementar_apos_commit('usuario')
+
+
 def atribuir_tags_automaticas(usuario):
     """
     Atribui tags automaticamente ao usuário baseado em sua função
     """
-    tags_atribuidas = []
-    
-    # ADMINISTRADOR
-    if usuario.is_superuser:
-        try:
-            tag_admin = Tag.objects.get(nome='Administrador')
-            UsuarioTag.objects.get_or_create(usuario=usuario, tag=tag_admin)
-            tags_atribuidas.append('Administrador')
-        except Tag.DoesNotExist:
-            pass
-    
-    # FUNCIONÁRIO
-    if usuario.is_staff:
-        try:
-            tag_func = Tag.objects.get(nome='Funcionário')
-            UsuarioTag.objects.get_or_create(usuario=usuario, tag=tag_func)
-            tags_atribuidas.append('Funcionário')
-        except Tag.DoesNotExist:
-            pass
-    
-    # CLIENTE NOVO
-    if not usuario.is_staff and not usuario.is_superuser:
-        try:
-            tag_cliente = Tag.objects.get(nome='Cliente Novo')
-            UsuarioTag.objects.get_or_create(usuario=usuario, tag=tag_cliente)
-            tags_atribuidas.append('Cliente Novo')
-        except Tag.DoesNotExist:
-            pass
-    
-    return tags_atribuidas
+    resultado = atribuir_tags_e_grupos(Usuario.objects.filter(pk=usuario.pk), grupos=False)
+    return sorted(resultado['tags'])
 
 
 def atualizar_tags_por_funcao(usuario):
     """
     Atualiza tags quando a função do usuário muda
     """
-    # Remover todas as tags de função antiga
-    tags_funcao = ['Cliente Novo', 'Cliente VIP', 'Funcionário', 'Administrador']
-    UsuarioTag.objects.filter(
-        usuario=usuario,
-        tag__nome__in=tags_funcao
-    ).delete()
-    
-    # Atribuir novas tags
-    return atribuir_tags_automaticas(usuario)
+    # Remove as tags de função antigas e atribui as novas
+    resultado = atribuir_tags_e_grupos(
+        Usuario.objects.filter(pk=usuario.pk), substituir=True, grupos=False
+    )
+    return sorted(resultado['tags'])
 
 
 def adicionar_usuario_em_grupo_automatico(usuario):
     """
     Adiciona usuário automaticamente nos grupos de sua tag
     """
-    grupos_adicionados = []
-    tags_usuario = usuario.get_tags()
-    
-    for tag in tags_usuario:
-        # Buscar grupos desta tag
-        grupos = Grupo.objects.filter(tag=tag)
-        
-        for grupo in grupos:
-            # Verificar se já não está no grupo
-            ug, created = UsuarioGrupo.objects.get_or_create(
-                usuario=usuario,
-                grupo=grupo
-            )
-            if created:
-                grupos_adicionados.append(grupo.nome)
-    
-    return grupos_adicionados
\ No newline at end of file
+    # Só os grupos das tags que o usuário já tem
+    resultado = atribuir_tags_e_grupos(Usuario.objects.filter(pk=usuario.pk), tags=False)
+    return sorted(resultado['grupos'])
@@ -1,11 +1,14 @@
 # user/views.py - SUBSTITUA O ARQUIVO COMPLETO
 
+from django.http import Http404
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from .models import Usuario, PerfilCliente, Grupo, UsuarioGrupo, Tag, UsuarioTag
 from .forms import (UsuarioForm, UsuarioUpdateForm, PerfilClienteForm, 
                     GrupoForm, UsuarioGrupoForm, TagForm, UsuarioTagForm)
 from .decorators import admin_required, staff_required, cliente_required
+from .estatisticas import aplicar_contagens
+from .visibilidade import visibilidade_usuario
 
 # ========== VIEWS DE TAG (APENAS ADMIN) ==========
 
@@ -14,10 +17,8 @@ def tag_list(request):
     """Lista todas as tags - APENAS ADMIN"""
     tags = Tag.objects.all().order_by('nome')
     
-    # Estatísticas
-    for tag in tags:
-        tag.total_usuarios = UsuarioTag.objects.filter(tag=tag).count()
-        tag.total_grupos = Grupo.objects.filter(tag=tag).count()
+    # Estatísticas (uma consulta agregada, com cache)
+    tags = aplicar_contagens(list(tags))
     
     context = {
         'tags': tags,
@@ -346,14 +347,8 @@ def usuario_grupo_delete(request, pk):
 @cliente_required
 def meu_perfil(request):
     """Exibe o perfil completo do usuário logado"""
-    user_id = request.session.get('user_id')
-    usuario = get_object_or_404(Usuario, id_usuario=user_id)
-    
-    # Buscar perfil
-    try:
-        perfil = PerfilCliente.objects.get(usuario=usuario)
-    except PerfilCliente.DoesNotExist:
-        perfil = None
+    usuario = request.user_obj
+    perfil = request.perfil or None
     
     # Buscar tags
     tags = UsuarioTag.objects.filter(usuario=usuario).select_related('tag')
@@ -389,13 +384,8 @@ def meu_perfil(request):
 @cliente_required
 def editar_meu_perfil(request):
     """Permite que qualquer usuário edite seu próprio perfil"""
-    user_id = request.session.get('user_id')
-    usuario = get_object_or_404(Usuario, id_usuario=user_id)
-    
-    try:
-        perfil = PerfilCliente.objects.get(usuario=usuario)
-    except PerfilCliente.DoesNotExist:
-        perfil = None
+    usuario = request.user_obj
+    perfil = request.perfil or None
     
     if request.method == 'POST':
         usuario.email = request.POST.get('email', usuario.email)
@@ -444,39 +434,15 @@ def editar_meu_perfil(request):
 @cliente_required
 def meus_grupos(request):
     """Exibe grupos visíveis baseado nas tags do usuário"""
-    user_id = request.session.get('user_id')
-    usuario = get_object_or_404(Usuario, id_usuario=user_id)
-    
-    # Tags do usuário
-    tags_usuario = usuario.tags.all()
+    usuario = request.user_obj
     
-    # DEBUG: Verificar se tem tags
-    print(f"🔍 DEBUG - Usuário: {usuario.username}")
-    print(f"🔍 DEBUG - Total de tags: {tags_usuario.count()}")
-    for tag in tags_usuario:
-        print(f"   - Tag: {tag.nome}")
-    
-    # Grupos visíveis baseado nas tags
-    if tags_usuario.exists():
-        grupos_visiveis = Grupo.objects.filter(tag__in=tags_usuario).distinct()
-    else:
-        # Se não tem tags, não vê nenhum grupo
-        grupos_visiveis = Grupo.objects.none()
-    
-    # DEBUG: Verificar grupos
-    print(f"🔍 DEBUG - Total de grupos visíveis: {grupos_visiveis.count()}")
-    for grupo in grupos_visiveis:
-        print(f"   - Grupo: {grupo.nome} (Tag: {grupo.tag.nome if grupo.tag else 'Sem tag'})")
-    
-    # Grupos que já participa
-    grupos_participando = UsuarioGrupo.objects.filter(
-        usuario=usuario
-    ).values_list('grupo_id', flat=True)
+    # Grupos visíveis e participações vêm do índice de visibilidade (cache)
+    visibilidade = visibilidade_usuario(usuario.pk)
     
     context = {
-        'tags': tags_usuario,
-        'grupos': grupos_visiveis,
-        'grupos_participando': list(grupos_participando),
+        'tags': usuario.tags.all(),  # já carregadas com o usuário
+        'grupos': [visibilidade['grupos'][pk] for pk in visibilidade['visiveis']],
+        'grupos_participando': visibilidade['participando'],
     }
     
     return render(request, 'user/meus_grupos.html', context)
@@ -484,22 +450,27 @@ def meus_grupos(request):
 @cliente_required
 def entrar_grupo(request, grupo_id):
     """Adiciona usuário ao grupo"""
-    user_id = request.session.get('user_id')
-    usuario = get_object_or_404(Usuario, id_usuario=user_id)
-    grupo = get_object_or_404(Grupo, pk=grupo_id)
+    usuario = request.user_obj
+    visibilidade = visibilidade_usuario(usuario.pk)
+    grupo = visibilidade['grupos'].get(grupo_id)
+    if grupo is None:
+        raise Http404('Grupo não encontrado')
     
     # Verificar tag
-    if grupo.tag and grupo.tag not in usuario.get_tags():
+    if grupo.tag_id and grupo.tag_id not in visibilidade['tags']:
         messages.error(request, '❌ Você não tem permissão para entrar neste grupo!')
         return redirect('meus_grupos')
     
     # Verificar se já está
-    if UsuarioGrupo.objects.filter(usuario=usuario, grupo=grupo).exists():
+    if grupo_id in visibilidade['participando']:
         messages.warning(request, '⚠️ Você já está neste grupo!')
         return redirect('meus_grupos')
     
     # Adicionar
-    UsuarioGrupo.objects.create(usuario=usuario, grupo=grupo)
+    _, criado = UsuarioGrupo.objects.get_or_create(usuario=usuario, grupo=grupo)
+    if not criado:
+        messages.warning(request, '⚠️ Você já está neste grupo!')
+        return redirect('meus_grupos')
     messages.success(request, f'✅ Você entrou no grupo "{grupo.nome}"!')
     
     # Redirecionar para WhatsApp se disponível
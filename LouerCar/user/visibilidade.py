@@ -0,0 +1,91 @@
+"""
+Índice de visibilidade de grupos.
+
+- Índice global (um por versão): todos os grupos com a tag carregada e o
+  mapa tag → grupos. Muda só quando um Grupo ou uma Tag muda, o que
+  incrementa a versão e faz todos os usuários serem recalculados.
+- Entrada por usuário: ids das tags, dos grupos visíveis e dos grupos em
+  que ele já está. É descartada quando UsuarioTag ou UsuarioGrupo daquele
+  usuário mudam, e recalculada na próxima leitura.
+
+Assim, montar "Meus Grupos" é uma leitura de cache no caso comum.
+
+A versão usa o contador de LouerCar/versoes.py (sem expiração e, se a chave
+sumir do cache, recomeçando de um valor tirado do relógio): uma versão
+antiga nunca volta a valer com entradas que ainda estejam no cache. As
+invalidações rodam após o commit, para uma leitura concorrente não guardar
+os dados de antes sob a versão nova.
+"""
+from django.core.cache import cache
+from django.db import transaction
+
+from LouerCar.versoes import incrementar_apos_commit, versoes
+
+from .models import Grupo, UsuarioGrupo, UsuarioTag
+
+CACHE_TIMEOUT = 3600  # segundos
+TABELA_VERSAO = 'visibilidade'
+
+
+def _chave_grupos(versao):
+    return f'visibilidade:grupos:v{versao}'
+
+
+def _chave_usuario(user_id, versao):
+    return f'visibilidade:usuario:{user_id}:v{versao}'
+
+
+def _versao():
+    return versoes(TABELA_VERSAO)[0]
+
+
+def _indice_grupos(versao):
+    """{'grupos': {id: Grupo}, 'por_tag': {id_tag: [ids]}} do cache ou do banco"""
+    chave = _chave_grupos(versao)
+    indice = cache.get(chave)
+    if indice is None:
+        grupos = {}
+        por_tag = {}
+        for grupo in Grupo.objects.select_related('tag').order_by('nome', 'pk'):
+            grupos[grupo.pk] = grupo
+            if grupo.tag_id is not None:
+                por_tag.setdefault(grupo.tag_id, []).append(grupo.pk)
+        indice = {'grupos': grupos, 'por_tag': por_tag}
+        cache.set(chave, indice, CACHE_TIMEOUT)
+    return indice
+
+
+def visibilidade_usuario(user_id):
+    """
+    Retorna {'tags': set, 'visiveis': [ids na ordem de exibição],
+    'participando': set, 'grupos': {id: Grupo}}
+    """
+    versao = _versao()
+    indice = _indice_grupos(versao)
+    chave = _chave_usuario(user_id, versao)
+    entrada = cache.get(chave)
+    if entrada is None:
+        tags = set(UsuarioTag.objects.filter(usuario_id=user_id).values_list('tag_id', flat=True))
+        visiveis = set()
+        for tag_id in tags:
+            visiveis.update(indice['por_tag'].get(tag_id, []))
+        entrada = {
+            'tags': tags,
+            # Mesma ordem do índice (por nome)
+            'visiveis': [pk for pk in indice['grupos'] if pk in visiveis],
+            'participando': set(
+                UsuarioGrupo.objects.filter(usuario_id=user_id).values_list('grupo_id', flat=True)
+            ),
+        }
+        cache.set(chave, entrada, CACHE_TIMEOUT)
+    return {**entrada, 'grupos': indice['grupos']}
+
+
+def invalidar_usuario(user_id):
+    """Descarta a entrada de um usuário (tags ou participações mudaram)"""
+    transaction.on_commit(lambda: cache.delete(_chave_usuario(user_id, _versao())))
+
+
+def invalidar_grupos():
+    """Grupos ou tags mudaram: descarta o índice global e todas as entradas"""
+    incrementar_apos_commit(TABELA_VERSAO)